@@ -1,16 +1,23 @@
 import os
 import sys
-import traceback
+import asyncio
 import logging
+from datetime import datetime, timezone
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from api.usecase_handler import UseCaseHandler
 from api.summary_generator import UserSummaryGenerator
-from api.database_utils import get_all_users
+from api.database_utils import get_morning_summaries, load_all_preferences
+from api.morning_scheduler import MAX_DATA_AGE
+from api.proactivity_engine import ProactivityEngine, PROACTIVITY_JOB
+from api.job_queue import JobQueue
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum time /proactivity waits for the workers to generate the messages of the current run
+PROACTIVITY_WAIT_SECONDS = float(os.getenv("PROACTIVITY_WAIT_SECONDS", "60"))
+
 class AnswerProcessor:
     """
     A class to process user messages and generate responses, morning summaries, and proactive suggestions.
@@ -27,9 +34,10 @@ class AnswerProcessor:
     async def get_answer(self, message: str, user_id: str):
         use_cases, info = await UseCaseHandler().get_use_cases_and_info(message, user_id)
         logger.info(f"Use Cases: {use_cases}, Info: {info}")
-        api_data = UseCaseHandler().call_apis(use_cases, info)
+        # The fetchers and the OpenAI call block, so they run in worker threads to keep the event loop free
+        api_data = await asyncio.to_thread(UseCaseHandler().call_apis, use_cases, info)
         logger.info(f"API Data: {api_data}")
-        response = UseCaseHandler().get_response(message, api_data)
+        response = await asyncio.to_thread(UseCaseHandler().get_response, message, api_data)
         logger.info(f"Response: {response}")
         return {"response": response}
 
@@ -39,15 +47,23 @@ class AnswerProcessor:
     #   - None
     #
     # Returns:
-    #   - dict: Morning summaries for all users, e.g., {"results": [{"user_id": "user123", "response": "Good morning!"}]}
+    #   - dict: Precomputed (or, if missing or stale, freshly generated) morning summaries for all users, e.g., {"results": [{"user_id": "user123", "response": "Good morning!"}]}
     async def get_morning(self):
-        user_ids = await get_all_users()
+        now = datetime.now(timezone.utc)
+        summaries = await get_morning_summaries(now.date(), now - MAX_DATA_AGE)
+        missing = [record['username'] for record in summaries if record['response'] is None]
+        preferences = await load_all_preferences(missing) if missing else None
         results = []
 
-        for record in user_ids:
+        for record in summaries:
             user_id = record['username']
+            if record['response'] is not None:
+                results.append({"user_id": user_id, "response": record['response']})
+                continue
+
+            # No fresh precomputed summary, fall back to generating it on demand
             try:
-                result = await UserSummaryGenerator().get_user_morning(user_id)
+                result = await UserSummaryGenerator(preferences).get_user_morning(user_id)
                 results.append({"user_id": user_id, "response": result["response"]})
             except Exception as e:
                 results.append({"user_id": user_id, "response": f"Error: {str(e)}"})
@@ -60,17 +76,18 @@ class AnswerProcessor:
     #   - None
     #
     # Returns:
-    #   - dict: Proactive suggestions for all users, e.g., {"results": [{"user_id": "user123", "response": "Hey, did you know..."}]}
+    #   - dict: Proactive suggestions for all users whose stocks or news changed since the last run, e.g., {"results": [{"user_id": "user123", "response": "Hey, did you know..."}]}
     async def get_proactivity(self):
-        user_ids = await get_all_users()
-        results = []
-
-        for record in user_ids:
-            user_id = record['username']
-            try:
-                result = await UserSummaryGenerator().get_user_proactivity(user_id)
-                results.append({"user_id": user_id, "response": result["response"]})
-            except Exception as e:
-                results.append({"user_id": user_id, "response": f"Error: {str(e)}\nTraceback:\n{traceback.format_exc()}"})
+        run_key = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        engine = ProactivityEngine()
+        changes = await engine.detect_changes()
 
+        # The messages are generated by the workers, results of earlier runs that finished late are delivered as well
+        queue = JobQueue()
+        await queue.enqueue(PROACTIVITY_JOB, run_key, changes)
+        # Only now the changes count as reported, if the enqueue failed the next run detects them again
+        await engine.store_state()
+        if changes:
+            await queue.wait_for_batch(PROACTIVITY_JOB, run_key, timeout=PROACTIVITY_WAIT_SECONDS)
+        results = await queue.collect_results(PROACTIVITY_JOB)
         return {"results": results}
\ No newline at end of file
@@ -4,43 +4,44 @@ import sys
 from datetime import date, timedelta
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from api.database import get_db_connection
+from api.database_utils import fetch_user_preferences
+
+# Preference column each database-backed key is filled from
+PREFERENCE_COLUMNS = {
+    'Stock-Name': 'stocks',
+    'News-Topic': 'news',
+    'City': 'city',
+    'Canteen-Name': 'cafeteria',
+    'Transport-Medium': 'preferred_transport_medium',
+    'Start-Airpot': 'city',
+    'Start-Location': 'city',
+}
 
 class DataFiller:
     """
     A utility class to fill missing data fields for user inputs using default values or database queries.
     """
 
-    # Fetch Data from Database
+    def __init__(self, preferences: Optional[Dict[str, dict]] = None):
+        """
+        Optionally takes preferences preloaded with load_all_preferences, which are used instead of database queries.
+        """
+        self.preferences = preferences
+
+    # Get Value from Preloaded Preferences
     #
     # Parameters:
-    #   - key (str): The key for which data needs to be fetched, e.g., "Stock-Name"
+    #   - key (str): The key for which data is needed, e.g., "Stock-Name"
     #   - user_id (str): The unique identifier of the user, e.g., "user123"
     #
     # Returns:
-    #   - Optional[str]: A list of values fetched from the database for the given key, or None if no data is found
-    @staticmethod
-    async def __fetch_from_database(key: str, user_id: str) -> Optional[str]:
-        query_map = {
-            'Stock-Name': "SELECT stock_name FROM stocks s JOIN user_stocks us ON s.s_id = us.s_id JOIN users u ON us.u_id = u.u_id WHERE u.username = $1",
-            'News-Topic': "SELECT news_name FROM news n JOIN user_news un ON n.n_id = un.n_id JOIN users u ON un.u_id = u.u_id WHERE u.username = $1",
-            'City': "SELECT city FROM users WHERE username = $1",
-            'Canteen-Name': "SELECT cafeteria FROM users WHERE username = $1",
-            'Transport-Medium': "SELECT preferred_transport_medium FROM users WHERE username = $1",
-            'Start_Airpot': "SELECT city FROM users WHERE username = $1",
-            'Start_Location': "SELECT city FROM users WHERE username = $1",
-        }
-
-        query = query_map.get(key)
-        if not query:
-            return None
-
-        conn = await get_db_connection()
-        try:
-            result = await conn.fetch(query, user_id)
-            return [record[0] for record in result] if result else None
-        finally:
-            await conn.close()
+    #   - Optional[list]: The preference values for the given key, or None if the user has none
+    def __get_from_preferences(self, key: str, user_id: str) -> Optional[list]:
+        value = self.preferences.get(user_id, {}).get(PREFERENCE_COLUMNS[key])
+        if isinstance(value, list):
+            # A copy, as the preferences may be shared with the preference cache
+            return list(value) or None
+        return [value] if value else None
 
     # Get Default Value for Missing Data
     #
@@ -74,8 +75,12 @@ class DataFiller:
     async def fill_missing_values(self, data: Dict[str, str], user_id: str) -> Dict[str, str]:
         for key in data:
             if data[key] == "" or data[key] == [""]:
-                if key in ['Stock-Name', 'News-Topic', 'City', 'Canteen-Name', 'Transport-Medium', 'Start-Airpot', 'Start-Location']:
-                    data[key] = await self.__fetch_from_database(key, user_id) or None
+                if key in PREFERENCE_COLUMNS:
+                    if self.preferences is None:
+                        # One query for all database-backed keys of the user
+                        preferences = await fetch_user_preferences(user_id)
+                        self.preferences = {user_id: preferences} if preferences else {}
+                    data[key] = self.__get_from_preferences(key, user_id)
                 else:
                     data[key] = self.__get_default_value(key)
         return data
\ No newline at end of file
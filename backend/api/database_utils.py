@@ -1,11 +1,91 @@
 import sys
 import os
 from fastapi import HTTPException
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from api.database import get_db_connection
+from api.database import get_db_connection, get_db_pool
 from api.models import User, UserUpdate
+from api.preference_cache import preference_cache, PREFERENCES_CHANNEL
+
+# Number of imported users copied into the staging tables at once
+BULK_COPY_BATCH = int(os.getenv("BULK_COPY_BATCH", "5000"))
+
+# Number of rows the export cursor fetches from the server at once
+EXPORT_PREFETCH = int(os.getenv("EXPORT_PREFETCH", "1000"))
+
+# Number of rows the user cursors fetch from the server at once
+USER_CURSOR_PREFETCH = int(os.getenv("USER_CURSOR_PREFETCH", "1000"))
+
+# Query for all preferences of a single user, with stocks and news aggregated into arrays
+USER_PREFERENCES_QUERY = """
+    SELECT
+        u.u_id,
+        u.version,
+        u.username,
+        u.course,
+        u.cafeteria,
+        u.city,
+        u.preferred_transport_medium,
+        ARRAY(SELECT s.stock_name
+            FROM user_stocks us
+            JOIN stocks s ON us.s_id = s.s_id
+            WHERE us.u_id = u.u_id) AS stocks,
+        ARRAY(SELECT n.news_name
+            FROM user_news un
+            JOIN news n ON un.n_id = n.n_id
+            WHERE un.u_id = u.u_id) AS news
+    FROM users u
+    WHERE u.username = $1
+"""
+
+# Query for the preferences of all users, with stocks and news aggregated in one pass over the link tables
+ALL_PREFERENCES_QUERY = """
+    SELECT
+        u.username,
+        u.course,
+        u.cafeteria,
+        u.city,
+        u.preferred_transport_medium,
+        COALESCE(us.stocks, '{}') AS stocks,
+        COALESCE(un.news, '{}') AS news
+    FROM users u
+    LEFT JOIN (
+        SELECT us.u_id, ARRAY_AGG(s.stock_name) AS stocks
+        FROM user_stocks us
+        JOIN stocks s ON us.s_id = s.s_id
+        GROUP BY us.u_id
+    ) us ON us.u_id = u.u_id
+    LEFT JOIN (
+        SELECT un.u_id, ARRAY_AGG(n.news_name) AS news
+        FROM user_news un
+        JOIN news n ON un.n_id = n.n_id
+        GROUP BY un.u_id
+    ) un ON un.u_id = u.u_id
+"""
+
+# Query for the preferences of some users, callers append the WHERE clause.
+# Stocks and news are only collected for the matching users, not aggregated for everyone first.
+PREFERENCES_QUERY = """
+    SELECT
+        u.username,
+        u.course,
+        u.cafeteria,
+        u.city,
+        u.preferred_transport_medium,
+        ARRAY(SELECT s.stock_name
+            FROM user_stocks us
+            JOIN stocks s ON us.s_id = s.s_id
+            WHERE us.u_id = u.u_id) AS stocks,
+        ARRAY(SELECT n.news_name
+            FROM user_news un
+            JOIN news n ON un.n_id = n.n_id
+            WHERE un.u_id = u.u_id) AS news
+    FROM users u
+"""
+
+# Query for the preferences of the given usernames
+SELECTED_PREFERENCES_QUERY = PREFERENCES_QUERY + " WHERE u.username = ANY($1::text[])"
 
 # Initialize User Preferences
 #
@@ -19,82 +99,53 @@ async def init_user_preferences(user: User):
     Initialize user preferences by inserting user data into the database.
     """
     conn = await get_db_connection()
-    async with conn.transaction():
-        check_query = "SELECT COUNT(*) FROM users WHERE username = $1"
-        existing = await conn.fetchval(check_query, user.username)
+    try:
+        async with conn.transaction():
+            insert_user_query = """
+            INSERT INTO users (username, course, cafeteria, city, preferred_transport_medium)
+            VALUES ($1, $2, $3, $4, $5)
+            ON CONFLICT (username) DO NOTHING
+            RETURNING u_id
+            """
+            user_id = await conn.fetchval(insert_user_query, user.username, user.course, user.cafeteria, user.city, user.preferred_transport_medium)
 
-        if existing > 0:
-            raise HTTPException(status_code=400, detail="User already exists")
+            if not user_id:
+                raise HTTPException(status_code=400, detail="User already exists")
 
-        insert_user_query = """
-        INSERT INTO users (username, course, cafeteria, city, preferred_transport_medium)
-        VALUES ($1, $2, $3, $4, $5)
-        RETURNING u_id
-        """
-        user_id = await conn.fetchval(insert_user_query, user.username, user.course, user.cafeteria, user.city, user.preferred_transport_medium)
-
-        if user.stocks:
-            for stock_name in user.stocks:
-                stock_id = await conn.fetchval("SELECT s_id FROM stocks WHERE stock_name = $1", stock_name)
-                if not stock_id:
-                    stock_id = await conn.fetchval("INSERT INTO stocks (stock_name) VALUES ($1) RETURNING s_id", stock_name)
-                await conn.execute("INSERT INTO user_stocks (u_id, s_id) VALUES ($1, $2)", user_id, stock_id)
-
-        if user.news:
-            for news_name in user.news:
-                news_id = await conn.fetchval("SELECT n_id FROM news WHERE news_name = $1", news_name)
-                if not news_id:
-                    news_id = await conn.fetchval("INSERT INTO news (news_name) VALUES ($1) RETURNING n_id", news_name)
-                await conn.execute("INSERT INTO user_news (u_id, n_id) VALUES ($1, $2)", user_id, news_id)
-
-    await conn.close()
+            await __update_list_preferences(conn, user_id, {"add": user.stocks}, "stocks", "s_id", "stock_name", "user_stocks", "s_id")
+            await __update_list_preferences(conn, user_id, {"add": user.news}, "news", "n_id", "news_name", "user_news", "n_id")
+
+            await conn.execute("SELECT pg_notify($1, $2)", PREFERENCES_CHANNEL, user.username)
+    finally:
+        await conn.close()
+
+    preference_cache.invalidate(user.username)
     return {"message": "User created successfully", "user_id": user_id}
 
+# Get Preferences ETag
+#
+# Parameters:
+#   - preferences (dict): Preferences of a user as returned by fetch_user_preferences, e.g., {"u_id": 42, "version": 3, ...}
+#
+# Returns:
+#   - str: Entity tag that changes with every update of the user, e.g., '"42-3"'
+def preferences_etag(preferences: dict) -> str:
+    return f'"{preferences["u_id"]}-{preferences["version"]}"'
+
 # Retrieve User Preferences
 #
 # Parameters:
 #   - username (str): The username of the user, e.g., "john_doe"
 #
 # Returns:
-#   - User: User object containing preferences, or raises HTTPException if the user is not found
-async def get_user_preferences(username: str) -> Optional[User]:
+#   - tuple: User object containing preferences and its ETag, or raises HTTPException if the user is not found
+async def get_user_preferences(username: str) -> Tuple[User, str]:
     """
-    Retrieve user preferences from the database.
+    Retrieve user preferences, from the preference cache if possible.
     """
-    conn = await get_db_connection()
-    
-    query = """
-        SELECT 
-            u.username, 
-            u.course, 
-            u.cafeteria, 
-            u.city, 
-            u.preferred_transport_medium,
-            (SELECT STRING_AGG(s.stock_name, ',') 
-            FROM user_stocks us
-            JOIN stocks s ON us.s_id = s.s_id
-            WHERE us.u_id = u.u_id) AS stocks,
-            (SELECT STRING_AGG(n.news_name, ',') 
-            FROM user_news un
-            JOIN news n ON un.n_id = n.n_id
-            WHERE un.u_id = u.u_id) AS news
-        FROM users u
-        WHERE u.username = $1;
-    """
-
-    result = await conn.fetchrow(query, username)
-    await conn.close()
-    
-    if result:
-        return User(
-            username=result["username"],
-            course=result["course"],
-            cafeteria=result["cafeteria"],
-            city=result["city"],
-            preferred_transport_medium=result["preferred_transport_medium"],
-            stocks=result["stocks"].split(",") if result["stocks"] else [],
-            news=result["news"].split(",") if result["news"] else [],
-        )
+    preferences = await fetch_user_preferences(username)
+    if preferences:
+        return User(**preferences), preferences_etag(preferences)
     else:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -116,19 +167,52 @@ async def __update_list_preferences(conn, user_id, items, table, id_column, name
     """
     Add or remove items in the user's preferences list.
     """
-    add_items = items.get("add", [])
-    delete_items = items.get("delete", [])
-    
+    add_items = items.get("add") or []
+    delete_items = items.get("delete") or []
+
+    # Each step is a single statement with an array parameter, independent of the number of items
     if add_items:
-        for item_name in add_items:
-            item_id = await conn.fetchval(f"SELECT {id_column} FROM {table} WHERE {name_column} = $1", item_name)
-            if not item_id:
-                item_id = await conn.fetchval(f"INSERT INTO {table} ({name_column}) VALUES ($1) RETURNING {id_column}", item_name)
-            await conn.execute(f"INSERT INTO {link_table} (u_id, {link_column}) VALUES ($1, $2) ON CONFLICT DO NOTHING", user_id, item_id)
-    
+        await conn.execute(f"INSERT INTO {table} ({name_column}) SELECT unnest($1::text[]) ON CONFLICT ({name_column}) DO NOTHING", add_items)
+        await conn.execute(f"INSERT INTO {link_table} (u_id, {link_column}) SELECT $1, {id_column} FROM {table} WHERE {name_column} = ANY($2::text[]) ON CONFLICT DO NOTHING", user_id, add_items)
+
     if delete_items:
-        for item_name in delete_items:
-            await conn.execute(f"DELETE FROM {link_table} WHERE u_id = $1 AND {link_column} = (SELECT {id_column} FROM {table} WHERE {name_column} = $2)", user_id, item_name)
+        await conn.execute(f"DELETE FROM {link_table} WHERE u_id = $1 AND {link_column} IN (SELECT {id_column} FROM {table} WHERE {name_column} = ANY($2::text[]))", user_id, delete_items)
+
+# Apply User Update
+#
+# Parameters:
+#   - conn: Database connection with an open transaction
+#   - username (str): The username of the user, e.g., "john_doe"
+#   - user (UserUpdate): Object containing updated preferences, e.g., {"city": "Berlin"}
+#
+# Returns:
+#   - int: The ID of the updated user, or raises HTTPException if the user is not found
+async def __apply_user_update(conn, username: str, user: UserUpdate):
+    """
+    Update the scalar preferences and the stock and news lists of a user with a fixed number of statements.
+    """
+    # Unset or empty fields keep their current value
+    update_query = """
+        UPDATE users
+        SET course = COALESCE(NULLIF($2, ''), course),
+            cafeteria = COALESCE(NULLIF($3, ''), cafeteria),
+            city = COALESCE(NULLIF($4, ''), city),
+            preferred_transport_medium = COALESCE(NULLIF($5, ''), preferred_transport_medium),
+            version = version + 1
+        WHERE username = $1
+        RETURNING u_id
+    """
+    user_id = await conn.fetchval(update_query, username, user.course, user.cafeteria, user.city, user.preferred_transport_medium)
+
+    if not user_id:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    await __update_list_preferences(conn, user_id, {"add": user.add_stocks, "delete": user.delete_stocks}, "stocks", "s_id", "stock_name", "user_stocks", "s_id")
+    await __update_list_preferences(conn, user_id, {"add": user.add_news, "delete": user.delete_news}, "news", "n_id", "news_name", "user_news", "n_id")
+
+    # Delivered to every API replica once the transaction commits
+    await conn.execute("SELECT pg_notify($1, $2)", PREFERENCES_CHANNEL, username)
+    return user_id
 
 # Update User Preferences
 #
@@ -145,40 +229,35 @@ async def update_user_preferences(username: str, user: UserUpdate):
     conn = await get_db_connection()
     try:
         async with conn.transaction():
-            check_query = "SELECT u_id FROM users WHERE username = $1"
-            user_id = await conn.fetchval(check_query, username)
+            await __apply_user_update(conn, username, user)
 
-            if not user_id:
-                raise HTTPException(status_code=404, detail="User not found")
-
-            update_fields = []
-            update_values = []
-
-            if user.course:
-                update_fields.append("course = $1")
-                update_values.append(user.course)
-            if user.cafeteria:
-                update_fields.append("cafeteria = $2")
-                update_values.append(user.cafeteria)
-            if user.city:
-                update_fields.append("city = $3")
-                update_values.append(user.city)
-            if user.preferred_transport_medium:
-                update_fields.append("preferred_transport_medium = $4")
-                update_values.append(user.preferred_transport_medium)
-
-            if update_fields:
-                update_query = f"""
-                    UPDATE users
-                    SET {', '.join(update_fields)}
-                    WHERE u_id = $5
-                """
-                await conn.execute(update_query, *update_values, user_id)
+        preference_cache.invalidate(username)
+        return {"message": "User preferences updated successfully"}
+    finally:
+        await conn.close()
 
-            await __update_list_preferences(conn, user_id, {"add": user.add_stocks, "delete": user.delete_stocks}, "stocks", "s_id", "stock_name", "user_stocks", "s_id")
-            await __update_list_preferences(conn, user_id, {"add": user.add_news, "delete": user.delete_news}, "news", "n_id", "news_name", "user_news", "n_id")
+# Patch User Preferences
+#
+# Parameters:
+#   - username (str): The username of the user, e.g., "john_doe"
+#   - user (UserUpdate): Object containing only the changed preferences, e.g., {"add_stocks": ["Tesla"]}
+#
+# Returns:
+#   - tuple: The preferences of the user after the update and their ETag, or raises HTTPException if the user is not found
+async def patch_user_preferences(username: str, user: UserUpdate) -> Tuple[User, str]:
+    """
+    Apply a partial update atomically and return the new preferences from the same transaction.
+    """
+    generation = preference_cache.generation
+    conn = await get_db_connection()
+    try:
+        async with conn.transaction():
+            await __apply_user_update(conn, username, user)
+            row = await conn.fetchrow(USER_PREFERENCES_QUERY, username)
 
-        return {"message": "User preferences updated successfully"}
+        preferences = {**dict(row), "stocks": list(row["stocks"]), "news": list(row["news"])}
+        preference_cache.set(username, preferences, generation)
+        return User(**preferences), preferences_etag(preferences)
     finally:
         await conn.close()
 
@@ -197,4 +276,365 @@ async def get_all_users():
     try:
         return await conn.fetch("SELECT username FROM users")
     finally:
-        await conn.close()
\ No newline at end of file
+        await conn.close()
+
+# Iterate Users
+#
+# Parameters:
+#   - shard_count (int): Number of shards the users are split into, e.g., 4
+#   - shard_index (int): The shard to iterate, from 0 to shard_count - 1, e.g., 0
+#   - prefetch (int): Number of rows fetched from the server at once, e.g., 1000
+#
+# Returns:
+#   - AsyncIterator[Record]: The users of the shard with "username", ordered by user ID
+async def iter_users(shard_count: int = 1, shard_index: int = 0, prefetch: int = USER_CURSOR_PREFETCH):
+    """
+    Stream usernames through a server-side cursor, so that callers can start on the first users immediately.
+    """
+    conn = await get_db_connection()
+    try:
+        async with conn.transaction():
+            query = "SELECT username FROM users WHERE u_id % $1 = $2 ORDER BY u_id"
+            async for record in conn.cursor(query, shard_count, shard_index, prefetch=prefetch):
+                yield record
+    finally:
+        await conn.close()
+
+# Get Morning Summaries
+#
+# Parameters:
+#   - summary_date (date): The day the summaries were generated for, e.g., date(2025, 4, 15)
+#   - min_data_fetched_at (datetime): Summaries based on data fetched before this time are treated as stale
+#
+# Returns:
+#   - list: One record per user with "username" and "response", where "response" is None if no fresh summary is stored
+async def get_morning_summaries(summary_date, min_data_fetched_at):
+    """
+    Retrieve the precomputed morning summaries of all users in a single query.
+    """
+    conn = await get_db_connection()
+    try:
+        query = """
+            SELECT u.username, m.response
+            FROM users u
+            LEFT JOIN morning_summaries m
+                ON m.u_id = u.u_id
+                AND m.summary_date = $1
+                AND m.data_fetched_at >= $2
+        """
+        return await conn.fetch(query, summary_date, min_data_fetched_at)
+    finally:
+        await conn.close()
+
+# Store Morning Summary
+#
+# Parameters:
+#   - username (str): The username of the user, e.g., "john_doe"
+#   - summary_date (date): The day the summary is generated for, e.g., date(2025, 4, 15)
+#   - response (str): The generated morning summary, e.g., "Guten Morgen! ..."
+#   - data_fetched_at (datetime): The time the oldest underlying stock, news or weather data was fetched
+#
+# Returns:
+#   - None
+async def store_morning_summary(username: str, summary_date, response: str, data_fetched_at):
+    """
+    Insert or replace the precomputed morning summary of a user.
+    """
+    conn = await get_db_connection()
+    try:
+        query = """
+            INSERT INTO morning_summaries (u_id, summary_date, response, data_fetched_at)
+            SELECT u_id, $2, $3, $4 FROM users WHERE username = $1
+            ON CONFLICT (u_id) DO UPDATE
+            SET summary_date = EXCLUDED.summary_date,
+                response = EXCLUDED.response,
+                data_fetched_at = EXCLUDED.data_fetched_at,
+                generated_at = NOW()
+        """
+        await conn.execute(query, username, summary_date, response, data_fetched_at)
+    finally:
+        await conn.close()
+
+# Fetch User Preferences
+#
+# Parameters:
+#   - username (str): The username of the user, e.g., "john_doe"
+#
+# Returns:
+#   - Optional[dict]: Scalar preferences and the stock and news lists of the user, e.g., {"u_id": 42, "version": 3, "username": "john_doe",
+#                     "course": "IN22", "cafeteria": "Mensa Central", "city": "Stuttgart",
+#                     "preferred_transport_medium": "driving-car", "stocks": ["Apple"], "news": ["business"]},
+#                     or None if the user does not exist
+async def fetch_user_preferences(username: str) -> Optional[dict]:
+    """
+    Retrieve all preferences of a user, reading the database with one query only on a cache miss.
+    """
+    preferences = preference_cache.get(username)
+    if preferences is not None:
+        return preferences
+
+    # Invalidations arriving while the query runs keep the possibly outdated result out of the cache
+    generation = preference_cache.generation
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(USER_PREFERENCES_QUERY, username)
+    if not row:
+        return None
+    preferences = {**dict(row), "stocks": list(row["stocks"]), "news": list(row["news"])}
+    preference_cache.set(username, preferences, generation)
+    return preferences
+
+# Load All Preferences
+#
+# Parameters:
+#   - usernames (list[str], optional): Only load these users, e.g., ["john_doe"]; all users if None
+#
+# Returns:
+#   - dict: Preferences keyed by username, e.g., {"john_doe": {"course": "IN22", "city": "Stuttgart", "cafeteria": "Mensa Central",
+#           "preferred_transport_medium": "driving-car", "stocks": ["Apple"], "news": ["business"]}}
+async def load_all_preferences(usernames: Optional[List[str]] = None) -> Dict[str, dict]:
+    """
+    Retrieve the preferences of all (or the given) users in a single set-based query.
+    """
+    conn = await get_db_connection()
+    try:
+        if usernames is None:
+            rows = await conn.fetch(ALL_PREFERENCES_QUERY)
+        else:
+            rows = await conn.fetch(SELECTED_PREFERENCES_QUERY, usernames)
+        return {
+            row["username"]: {**dict(row), "stocks": list(row["stocks"]), "news": list(row["news"])}
+            for row in rows
+        }
+    finally:
+        await conn.close()
+
+# Iterate Preferences
+#
+# Parameters:
+#   - shard_count (int): Number of shards the users are split into, e.g., 4
+#   - shard_index (int): The shard to iterate, from 0 to shard_count - 1, e.g., 0
+#   - prefetch (int): Number of rows fetched from the server at once, e.g., 1000
+#
+# Returns:
+#   - AsyncIterator[dict]: Preferences of the users of the shard, see load_all_preferences, ordered by user ID
+async def iter_preferences(shard_count: int = 1, shard_index: int = 0, prefetch: int = USER_CURSOR_PREFETCH):
+    """
+    Stream the preferences of all users through a server-side cursor instead of loading them at once.
+    """
+    conn = await get_db_connection()
+    try:
+        async with conn.transaction():
+            query = PREFERENCES_QUERY + " WHERE u.u_id % $1 = $2 ORDER BY u.u_id"
+            async for row in conn.cursor(query, shard_count, shard_index, prefetch=prefetch):
+                yield {**dict(row), "stocks": list(row["stocks"]), "news": list(row["news"])}
+    finally:
+        await conn.close()
+
+# Get Subscribed Items
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - tuple: All stocks and all news categories at least one user subscribed to, e.g., (["Apple", "Tesla"], ["business"])
+async def get_subscribed_items():
+    """
+    Retrieve the distinct subscribed stocks and news categories without loading the users.
+    """
+    conn = await get_db_connection()
+    try:
+        stocks = await conn.fetch(
+            "SELECT s.stock_name FROM stocks s WHERE EXISTS (SELECT 1 FROM user_stocks us WHERE us.s_id = s.s_id) ORDER BY s.stock_name"
+        )
+        news = await conn.fetch(
+            "SELECT n.news_name FROM news n WHERE EXISTS (SELECT 1 FROM user_news un WHERE un.n_id = n.n_id) ORDER BY n.news_name"
+        )
+        return [row["stock_name"] for row in stocks], [row["news_name"] for row in news]
+    finally:
+        await conn.close()
+
+# Get Proactivity State
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - tuple: Last seen quote per stock, e.g., {"Apple": {"quote_timestamp": "...", "price": 173.8, "notified_price": None}},
+#            and the already seen article ids per news category, e.g., {"business": ["https://..."]}
+async def get_proactivity_state():
+    """
+    Retrieve the state the proactivity engine stored during its last run.
+    """
+    conn = await get_db_connection()
+    try:
+        stock_rows = await conn.fetch("SELECT stock_name, quote_timestamp, price, notified_price FROM proactivity_stock_state")
+        news_rows = await conn.fetch("SELECT news_name, article_ids FROM proactivity_news_state")
+        stocks = {row["stock_name"]: dict(row) for row in stock_rows}
+        news = {row["news_name"]: list(row["article_ids"]) for row in news_rows}
+        return stocks, news
+    finally:
+        await conn.close()
+
+# Store Proactivity State
+#
+# Parameters:
+#   - stocks (dict): Last seen quote per stock, keyed by stock name
+#   - news (dict): Seen article ids per news category, keyed by category
+#
+# Returns:
+#   - None
+async def store_proactivity_state(stocks, news):
+    """
+    Insert or replace the state of the proactivity engine in one transaction.
+    """
+    conn = await get_db_connection()
+    try:
+        async with conn.transaction():
+            await conn.executemany(
+                """
+                INSERT INTO proactivity_stock_state (stock_name, quote_timestamp, price, notified_price)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (stock_name) DO UPDATE
+                SET quote_timestamp = EXCLUDED.quote_timestamp,
+                    price = EXCLUDED.price,
+                    notified_price = EXCLUDED.notified_price,
+                    updated_at = NOW()
+                """,
+                [(name, s["quote_timestamp"], s["price"], s["notified_price"]) for name, s in stocks.items()]
+            )
+            await conn.executemany(
+                """
+                INSERT INTO proactivity_news_state (news_name, article_ids)
+                VALUES ($1, $2)
+                ON CONFLICT (news_name) DO UPDATE
+                SET article_ids = EXCLUDED.article_ids,
+                    updated_at = NOW()
+                """,
+                list(news.items())
+            )
+    finally:
+        await conn.close()
+
+# Copy Staged Users
+#
+# Parameters:
+#   - conn: Database connection with the staging tables
+#   - users (list[User]): A batch of imported users
+#
+# Returns:
+#   - None
+async def __copy_staged_users(conn, users: List[User]):
+    """
+    Write a batch of users and their stock and news names into the staging tables with COPY.
+    """
+    await conn.copy_records_to_table(
+        "staging_users",
+        records=[(u.username, u.course, u.cafeteria, u.city, u.preferred_transport_medium) for u in users],
+        columns=["username", "course", "cafeteria", "city", "preferred_transport_medium"],
+    )
+    await conn.copy_records_to_table(
+        "staging_stocks",
+        records=[(u.username, stock) for u in users for stock in u.stocks or []],
+        columns=["username", "stock_name"],
+    )
+    await conn.copy_records_to_table(
+        "staging_news",
+        records=[(u.username, topic) for u in users for topic in u.news or []],
+        columns=["username", "news_name"],
+    )
+
+# Bulk Import User Preferences
+#
+# Parameters:
+#   - users (AsyncIterator[User]): The users to import, e.g., parsed from an NDJSON upload
+#
+# Returns:
+#   - dict: Number of created users and of skipped users that already existed, e.g., {"created": 120, "skipped": 2}
+#
+# Notes:
+#   - The import is atomic: if a record is invalid, no user is created.
+async def bulk_import_preferences(users: AsyncIterator[User]):
+    """
+    Import many users by copying them into staging tables and merging them set-based.
+    """
+    conn = await get_db_connection()
+    try:
+        async with conn.transaction():
+            await conn.execute("""
+                CREATE TEMP TABLE staging_users (
+                    username VARCHAR(100), course VARCHAR(100), cafeteria VARCHAR(100),
+                    city VARCHAR(100), preferred_transport_medium VARCHAR(100)
+                ) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_stocks (username VARCHAR(100), stock_name VARCHAR(100)) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_news (username VARCHAR(100), news_name VARCHAR(255)) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_created (u_id INT, username VARCHAR(100)) ON COMMIT DROP;
+            """)
+
+            staged = 0
+            batch = []
+            async for user in users:
+                batch.append(user)
+                if len(batch) >= BULK_COPY_BATCH:
+                    await __copy_staged_users(conn, batch)
+                    staged += len(batch)
+                    batch = []
+            if batch:
+                await __copy_staged_users(conn, batch)
+                staged += len(batch)
+
+            await conn.execute("""
+                WITH created AS (
+                    INSERT INTO users (username, course, cafeteria, city, preferred_transport_medium)
+                    SELECT DISTINCT ON (username) username, course, cafeteria, city, preferred_transport_medium
+                    FROM staging_users
+                    ORDER BY username
+                    ON CONFLICT (username) DO NOTHING
+                    RETURNING u_id, username
+                )
+                INSERT INTO staging_created SELECT u_id, username FROM created
+            """)
+            await conn.execute("INSERT INTO stocks (stock_name) SELECT DISTINCT stock_name FROM staging_stocks ON CONFLICT (stock_name) DO NOTHING")
+            await conn.execute("""
+                INSERT INTO user_stocks (u_id, s_id)
+                SELECT c.u_id, s.s_id
+                FROM staging_stocks st
+                JOIN staging_created c ON c.username = st.username
+                JOIN stocks s ON s.stock_name = st.stock_name
+                ON CONFLICT DO NOTHING
+            """)
+            await conn.execute("INSERT INTO news (news_name) SELECT DISTINCT news_name FROM staging_news ON CONFLICT (news_name) DO NOTHING")
+            await conn.execute("""
+                INSERT INTO user_news (u_id, n_id)
+                SELECT c.u_id, n.n_id
+                FROM staging_news sn
+                JOIN staging_created c ON c.username = sn.username
+                JOIN news n ON n.news_name = sn.news_name
+                ON CONFLICT DO NOTHING
+            """)
+            created = await conn.fetchval("SELECT COUNT(*) FROM staging_created")
+
+        return {"created": created, "skipped": staged - created}
+    finally:
+        await conn.close()
+
+# Stream All Preferences
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - AsyncIterator[dict]: Preferences of every user, ordered by username, e.g., {"username": "john_doe",
+#                          "course": "IN22", "cafeteria": "Mensa Central", "city": "Stuttgart",
+#                          "preferred_transport_medium": "driving-car", "stocks": ["Apple"], "news": ["business"]}
+async def stream_all_preferences():
+    """
+    Stream the preferences of all users through a server-side cursor, EXPORT_PREFETCH rows at a time.
+    """
+    conn = await get_db_connection()
+    try:
+        async with conn.transaction():
+            async for row in conn.cursor(ALL_PREFERENCES_QUERY + " ORDER BY u.username", prefetch=EXPORT_PREFETCH):
+                yield {**dict(row), "stocks": list(row["stocks"]), "news": list(row["news"])}
+    finally:
+        await conn.close()
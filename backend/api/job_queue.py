@@ -0,0 +1,260 @@
+import os
+import sys
+import json
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database import get_db_connection
+
+# Base delay in seconds before a failed job is retried, doubled with every attempt
+RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "5"))
+
+# Time in seconds a claimed job stays locked before another worker may take it over
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+# Time in days finished and failed jobs are kept before they are deleted
+RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+class JobQueue:
+    """
+    A Postgres-backed job queue. Jobs are unique per kind, user and run, so enqueueing
+    the same batch twice is harmless, and workers claim them with FOR UPDATE SKIP LOCKED.
+    """
+
+    # Enqueue Jobs
+    #
+    # Parameters:
+    #   - kind (str): The kind of job, e.g., "morning"
+    #   - run_key (str): Identifier of the batch the jobs belong to, e.g., "2025-04-15"
+    #   - jobs (list[tuple]): Username and payload per job, e.g., [("john_doe", None)]
+    #
+    # Returns:
+    #   - None
+    async def enqueue(self, kind: str, run_key: str, jobs):
+        conn = await get_db_connection()
+        try:
+            await conn.executemany(
+                """
+                INSERT INTO jobs (kind, username, run_key, payload)
+                VALUES ($1, $2, $3, $4::jsonb)
+                ON CONFLICT (kind, username, run_key) DO NOTHING
+                """,
+                [(kind, username, run_key, json.dumps(payload) if payload is not None else None) for username, payload in jobs]
+            )
+        finally:
+            await conn.close()
+
+    # Claim Jobs
+    #
+    # Parameters:
+    #   - limit (int): Maximum number of jobs to claim, e.g., 1
+    #   - kinds (list[str]): Kinds of jobs the worker can handle, e.g., ["morning", "proactivity"]
+    #
+    # Returns:
+    #   - list: Claimed jobs as dicts with "job_id", "kind", "username", "run_key", "payload" and "attempts"
+    #
+    # Notes:
+    #   - Jobs whose lease expired in their last attempt are marked as failed first, so their batch can settle.
+    async def claim(self, limit: int, kinds):
+        conn = await get_db_connection()
+        try:
+            await conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'failed',
+                    last_error = 'Lease expired in attempt ' || attempts || COALESCE(', last error: ' || last_error, ''),
+                    locked_until = NULL,
+                    updated_at = NOW()
+                WHERE kind = ANY($1::text[])
+                AND status = 'running' AND locked_until < NOW() AND attempts >= max_attempts
+                """,
+                list(kinds)
+            )
+            rows = await conn.fetch(
+                """
+                UPDATE jobs
+                SET status = 'running',
+                    attempts = attempts + 1,
+                    locked_until = NOW() + make_interval(secs => $3),
+                    updated_at = NOW()
+                WHERE job_id IN (
+                    SELECT job_id FROM jobs
+                    WHERE kind = ANY($2::text[])
+                    AND ((status = 'queued' AND run_after <= NOW())
+                        OR (status = 'running' AND locked_until < NOW() AND attempts < max_attempts))
+                    ORDER BY run_after
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING job_id, kind, username, run_key, payload, attempts
+                """,
+                limit, list(kinds), LEASE_SECONDS
+            )
+            return [
+                {**dict(row), "payload": json.loads(row["payload"]) if row["payload"] else None}
+                for row in rows
+            ]
+        finally:
+            await conn.close()
+
+    # Complete Job
+    #
+    # Parameters:
+    #   - job_id (int): The ID of the job, e.g., 42
+    #   - attempts (int): The attempt the job was claimed with, e.g., 1
+    #   - result (str): The result of the job, e.g., "Hey, hast du schon gehört? ..."
+    #
+    # Returns:
+    #   - bool: False if the lease was lost, i.e. another worker took the job over and its result is kept
+    async def complete(self, job_id: int, attempts: int, result):
+        conn = await get_db_connection()
+        try:
+            status = await conn.execute(
+                """
+                UPDATE jobs SET status = 'done', result = $3, locked_until = NULL, updated_at = NOW()
+                WHERE job_id = $1 AND attempts = $2 AND status = 'running'
+                """,
+                job_id, attempts, result
+            )
+            return status == "UPDATE 1"
+        finally:
+            await conn.close()
+
+    # Fail Job
+    #
+    # Parameters:
+    #   - job_id (int): The ID of the job, e.g., 42
+    #   - attempts (int): The attempt the job was claimed with, e.g., 1
+    #   - error (str): The error message, e.g., "Error processing input: timeout"
+    #
+    # Returns:
+    #   - bool: False if the lease was lost, i.e. another worker took the job over
+    #
+    # Notes:
+    #   - The job is retried with exponential backoff until max_attempts is reached, then marked as failed.
+    async def fail(self, job_id: int, attempts: int, error: str):
+        conn = await get_db_connection()
+        try:
+            status = await conn.execute(
+                """
+                UPDATE jobs
+                SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                    run_after = NOW() + make_interval(secs => $3 * power(2, attempts - 1)),
+                    last_error = $2,
+                    locked_until = NULL,
+                    updated_at = NOW()
+                WHERE job_id = $1 AND attempts = $4 AND status = 'running'
+                """,
+                job_id, error, RETRY_BASE_DELAY, attempts
+            )
+            return status == "UPDATE 1"
+        finally:
+            await conn.close()
+
+    # Get Job
+    #
+    # Parameters:
+    #   - job_id (int): The ID of the job, e.g., 42
+    #
+    # Returns:
+    #   - dict: The job without its payload, or None if it does not exist
+    async def get_job(self, job_id: int):
+        conn = await get_db_connection()
+        try:
+            row = await conn.fetchrow(
+                """
+                SELECT job_id, kind, username, run_key, status, attempts, max_attempts,
+                    run_after, result, last_error, created_at, updated_at
+                FROM jobs WHERE job_id = $1
+                """,
+                job_id
+            )
+            return dict(row) if row else None
+        finally:
+            await conn.close()
+
+    # Get Batch Status
+    #
+    # Parameters:
+    #   - kind (str): The kind of job, e.g., "morning"
+    #   - run_key (str): Identifier of the batch, e.g., "2025-04-15"
+    #
+    # Returns:
+    #   - dict: Number of jobs per status, e.g., {"queued": 10, "running": 2, "done": 88, "failed": 0}
+    async def get_batch_status(self, kind: str, run_key: str):
+        conn = await get_db_connection()
+        try:
+            rows = await conn.fetch(
+                "SELECT status, COUNT(*) AS count FROM jobs WHERE kind = $1 AND run_key = $2 GROUP BY status",
+                kind, run_key
+            )
+            status = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            status.update({row["status"]: row["count"] for row in rows})
+            return status
+        finally:
+            await conn.close()
+
+    # Wait for Batch
+    #
+    # Parameters:
+    #   - kind (str): The kind of job, e.g., "proactivity"
+    #   - run_key (str): Identifier of the batch, e.g., "2025-04-15T08:10:00"
+    #   - timeout (float): Maximum time to wait in seconds, e.g., 60
+    #   - interval (float): Time between status checks in seconds, e.g., 1
+    #
+    # Returns:
+    #   - dict: The last batch status, see get_batch_status
+    async def wait_for_batch(self, kind: str, run_key: str, timeout: float, interval: float = 1.0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            status = await self.get_batch_status(kind, run_key)
+            if status["queued"] + status["running"] == 0 or loop.time() >= deadline:
+                return status
+            await asyncio.sleep(interval)
+
+    # Collect Results
+    #
+    # Parameters:
+    #   - kind (str): The kind of job, e.g., "proactivity"
+    #
+    # Returns:
+    #   - list: Finished, not yet delivered results, e.g., [{"user_id": "john_doe", "response": "Hey, ..."}]
+    #
+    # Notes:
+    #   - Every result is returned only once.
+    async def collect_results(self, kind: str):
+        conn = await get_db_connection()
+        try:
+            rows = await conn.fetch(
+                """
+                UPDATE jobs SET delivered_at = NOW()
+                WHERE kind = $1 AND status = 'done' AND delivered_at IS NULL
+                RETURNING username, result
+                """,
+                kind
+            )
+            return [{"user_id": row["username"], "response": row["result"]} for row in rows]
+        finally:
+            await conn.close()
+
+    # Delete Old Jobs
+    #
+    # Parameters:
+    #   - retention_days (float): Days finished and failed jobs are kept, e.g., 7
+    #
+    # Returns:
+    #   - int: Number of deleted jobs
+    async def delete_old_jobs(self, retention_days: float = RETENTION_DAYS):
+        conn = await get_db_connection()
+        try:
+            status = await conn.execute(
+                """
+                DELETE FROM jobs
+                WHERE status IN ('done', 'failed') AND updated_at < NOW() - make_interval(secs => $1)
+                """,
+                retention_days * 86400
+            )
+            return int(status.split()[-1])
+        finally:
+            await conn.close()
@@ -1,21 +1,53 @@
-from fastapi import FastAPI, Query, HTTPException
-from typing import Optional
-from pydantic import BaseModel
+from fastapi import FastAPI, Query, HTTPException, Request, Response
+import time
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import re
+import asyncio
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from api.answer_processor import AnswerProcessor
+from api.morning_scheduler import MorningScheduler
+from api.job_queue import JobQueue
+from api.database import close_db_pool
+from api.migrations import apply_migrations
+from api.preference_cache import preference_cache
+from api.tracing import span, server_timing, SPAN_KIND_SERVER
+from api.metrics import REQUEST_LATENCY, start_request, render_metrics
 from api.models import User, UserUpdate
+from api.preference_io import parse_ndjson, parse_csv, format_ndjson, format_csv, format_csv_header
 from api.database_utils import (
     init_user_preferences,
     get_user_preferences,
     update_user_preferences,
+    patch_user_preferences,
+    bulk_import_preferences,
+    stream_all_preferences,
 )
 
-app = FastAPI()
+# Application Lifespan
+#
+# Applies pending schema migrations, starts the morning scheduler, which precomputes the morning
+# summaries in the background, and listens for preference changes of other replicas to keep the
+# preference cache fresh. Both are stopped and the database pool is closed again on shutdown.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A failed migration stops the startup instead of serving a half-migrated schema
+    await apply_migrations()
+    scheduler_task = asyncio.create_task(MorningScheduler().run())
+    await preference_cache.start_listener()
+    try:
+        yield
+    finally:
+        scheduler_task.cancel()
+        await preference_cache.stop_listener()
+        await close_db_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +57,71 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Trace Requests
+#
+# Parameters:
+#   - request (Request): The incoming request
+#   - call_next: Calls the endpoint
+#
+# Returns:
+#   - Response: The response of the endpoint with a Server-Timing header listing the duration of every stage
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Run every request in its own trace, so the stages of e.g. /answer show up as spans.
+    """
+    with span(f"{request.method} {request.url.path}", kind=SPAN_KIND_SERVER, **{"http.method": request.method}) as root:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            # The route template keeps usernames and IDs out of the span name
+            root.name = f"{request.method} {route.path}"
+        root.attributes["http.route"] = getattr(route, "path", request.url.path)
+        root.attributes["http.status_code"] = response.status_code
+    response.headers["Server-Timing"] = server_timing(root)
+    return response
+
+# Record Request Metrics
+#
+# Parameters:
+#   - request (Request): The incoming request
+#   - call_next: Calls the endpoint
+#
+# Returns:
+#   - Response: The response of the endpoint
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Observe the latency of every request, labelled by route, status and the use cases of the message.
+    """
+    labels = start_request()
+    started_at = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status), labels["use_case"]
+        ).observe(time.perf_counter() - started_at)
+
+# Prometheus Metrics
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - Response: All metrics in the Prometheus text format
+@app.get("/metrics")
+async def metrics():
+    """
+    Expose the metrics for Prometheus to scrape.
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 # Process User Message
 #
 # Parameters:
@@ -47,11 +144,11 @@ async def get_answer(message: str = Query(..., min_length=1), user_id: str = Que
 #   - None
 #
 # Returns:
-#   - dict: Morning summaries for all users
+#   - dict: Morning summaries for all users, read from the precomputed summaries where possible
 @app.get("/morning")
 async def get_morning():
     """
-    Generate morning summaries for all users.
+    Return the morning summaries for all users.
     """
     answer_processor = AnswerProcessor()
     return await answer_processor.get_morning()
@@ -62,11 +159,11 @@ async def get_morning():
 #   - None
 #
 # Returns:
-#   - dict: Proactive suggestions for all users
+#   - dict: Proactive suggestions for all users whose stocks or news changed since the last call
 @app.get("/proactivity")
 async def get_proactivity():
     """
-    Generate proactive suggestions for all users.
+    Generate proactive suggestions for users with changed stocks or news.
     """
     answer_processor = AnswerProcessor()
     return await answer_processor.get_proactivity()
@@ -85,19 +182,85 @@ async def init_preferences(user: User):
     """
     return await init_user_preferences(user)
 
+# Bulk Import User Preferences
+#
+# Parameters:
+#   - request (Request): Body with one user per line, as NDJSON or (with "Content-Type: text/csv") as CSV
+#
+# Returns:
+#   - dict: Number of created users and of skipped users that already existed
+@app.post("/preferences/bulk")
+async def bulk_import(request: Request):
+    """
+    Import many users at once, e.g., a whole course.
+    """
+    parse = parse_csv if request.headers.get("content-type", "").startswith("text/csv") else parse_ndjson
+    counts = await bulk_import_preferences(parse(request.stream()))
+    return {"message": "Users imported successfully", **counts}
+
+# Bulk Export User Preferences
+#
+# Parameters:
+#   - format (str): "ndjson" or "csv", e.g., "csv"
+#
+# Returns:
+#   - StreamingResponse: The preferences of all users, one user per line
+@app.get("/preferences/bulk")
+async def bulk_export(format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Stream the preferences of all users.
+    """
+    async def lines():
+        if format == "csv":
+            yield format_csv_header()
+        async for record in stream_all_preferences():
+            yield format_csv(record) if format == "csv" else format_ndjson(record)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(lines(), media_type=media_type)
+
+# Entity tags in an If-None-Match header, optionally weak, e.g., 'W/"42-3", "42-4"'
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+# Check If-None-Match
+#
+# Parameters:
+#   - if_none_match (str): The If-None-Match header values, joined with commas, e.g., 'W/"42-3", "42-4"' or "*"
+#   - etag (str): The current ETag of the resource, e.g., '"42-3"'
+#
+# Returns:
+#   - bool: True if the header matches the current ETag, so the client's copy is still valid
+#
+# Notes:
+#   - Follows RFC 9110, section 13.1.2: "*" matches any current representation, and entity tags
+#     are compared weakly, i.e., a W/ prefix on either side is ignored.
+def if_none_match_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    return opaque_tag in ENTITY_TAG.findall(if_none_match)
+
 # Retrieve User Preferences
 #
 # Parameters:
 #   - username (str): The username of the user, e.g., "john_doe"
+#   - request (Request): The request, an "If-None-Match" header with the last ETag allows a 304 response
+#   - response (Response): The response, gets the ETag of the preferences
 #
 # Returns:
-#   - User: User object containing preferences, or None if the user does not exist
+#   - User: User object containing preferences, or an empty 304 response if they did not change
 @app.get("/preferences/{username}", response_model=User)
-async def get_preferences(username: str) -> Optional[User]:
+async def get_preferences(username: str, request: Request, response: Response):
     """
     Retrieve user preferences from the database.
     """
-    return await get_user_preferences(username)
+    user, etag = await get_user_preferences(username)
+    if if_none_match_matches(", ".join(request.headers.getlist("if-none-match")), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return user
 
 # Update User Preferences
 #
@@ -112,4 +275,53 @@ async def update_preferences(username: str, user: UserUpdate):
     """
     Update user preferences in the database.
     """
-    return await update_user_preferences(username, user)
\ No newline at end of file
+    return await update_user_preferences(username, user)
+
+# Patch User Preferences
+#
+# Parameters:
+#   - username (str): The username of the user, e.g., "john_doe"
+#   - user (UserUpdate): Object containing only the changed preferences, e.g., {"add_stocks": ["Tesla"]}
+#
+# Returns:
+#   - User: The preferences of the user after the update
+@app.patch("/preferences/{username}", response_model=User)
+async def patch_preferences(username: str, user: UserUpdate, response: Response):
+    """
+    Apply a partial update to the user preferences and return the new state.
+    """
+    new_user, etag = await patch_user_preferences(username, user)
+    response.headers["ETag"] = etag
+    return new_user
+
+# Retrieve Job Status
+#
+# Parameters:
+#   - job_id (int): The ID of the job, e.g., 42
+#
+# Returns:
+#   - dict: Status, attempts, result and last error of the job
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int):
+    """
+    Retrieve the status of a single morning or proactivity job.
+    """
+    job = await JobQueue().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Retrieve Batch Status
+#
+# Parameters:
+#   - kind (str): The kind of job, e.g., "morning"
+#   - run_key (str): Identifier of the batch, e.g., "2025-04-15"
+#
+# Returns:
+#   - dict: Number of jobs per status, e.g., {"queued": 10, "running": 2, "done": 88, "failed": 0}
+@app.get("/jobs/{kind}/{run_key}")
+async def get_batch_status(kind: str, run_key: str):
+    """
+    Retrieve the progress of a batch of jobs.
+    """
+    return await JobQueue().get_batch_status(kind, run_key)
\ No newline at end of file
@@ -0,0 +1,185 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database import get_pool_stats
+
+# Use case label of everything that happens outside of a classified /answer request
+NO_USE_CASE = "none"
+
+# Labels of the request being processed, the use cases are only known once the message is classified
+_request_labels: ContextVar[Optional[dict]] = ContextVar("request_labels", default=None)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Latency of the API endpoints",
+    ["method", "route", "status", "use_case"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+FETCHER_LATENCY = Histogram(
+    "service_fetcher_duration_seconds",
+    "Latency of the upstream service fetchers",
+    ["use_case", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+OPENAI_LATENCY = Histogram(
+    "openai_request_duration_seconds",
+    "Latency of the OpenAI chat completion calls",
+    ["operation", "model", "status", "use_case"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total",
+    "Tokens used by the OpenAI chat completion calls",
+    ["type", "model", "use_case"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Lookups in the in-process caches, the hit ratio is hits divided by all lookups",
+    ["cache", "result", "use_case"],
+)
+
+class PreferenceReadPoolCollector:
+    """
+    Reports the size and usage of the asyncpg pool whenever the metrics are scraped.
+    Only fetch_user_preferences uses the pool. The job queue, the schedulers, the proactivity state and the
+    writes open a connection per call and are not part of these numbers.
+    """
+
+    # Collect Pool Metrics
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - Iterator[GaugeMetricFamily]: Connections of the pool by state, nothing while the pool does not exist
+    def collect(self):
+        stats = get_pool_stats()
+        if stats is None:
+            return
+        gauge = GaugeMetricFamily(
+            "db_preference_read_pool_connections",
+            "Connections of the asyncpg pool of the preference reads, other queries open their own connections",
+            labels=["state"],
+        )
+        for state, value in stats.items():
+            gauge.add_metric([state], value)
+        yield gauge
+
+REGISTRY.register(PreferenceReadPoolCollector())
+
+# Start Request
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - dict: The labels of the new request, shared with the code handling it
+def start_request() -> dict:
+    labels = {"use_case": NO_USE_CASE}
+    _request_labels.set(labels)
+    return labels
+
+# Set Use Case
+#
+# Parameters:
+#   - use_case (str): The use cases of the current request, e.g., "NEWS,WEATHER"
+#
+# Returns:
+#   - None
+def set_use_case(use_case: str):
+    labels = _request_labels.get()
+    if labels is not None:
+        labels["use_case"] = use_case or NO_USE_CASE
+
+# Get Use Case
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - str: The use cases of the current request, or "none" outside of a classified request
+def current_use_case() -> str:
+    labels = _request_labels.get()
+    return labels["use_case"] if labels else NO_USE_CASE
+
+# Observe Service Fetcher
+#
+# Parameters:
+#   - use_case (str): Name of the use case whose fetcher is called, e.g., "WEATHER"
+#
+# Returns:
+#   - None
+@contextmanager
+def observe_fetcher(use_case: str):
+    """
+    Time a service fetcher call and count it as "error" if it raises.
+    """
+    started_at = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        FETCHER_LATENCY.labels(use_case, status).observe(time.perf_counter() - started_at)
+
+# Observe OpenAI Call
+#
+# Parameters:
+#   - operation (str): The ChatGPTProcessor method, e.g., "process_input"
+#   - model (str): The model, e.g., "gpt-4o-mini"
+#
+# Returns:
+#   - dict: Holder for the response, its token usage is counted once the block is left
+@contextmanager
+def observe_openai(operation: str, model: str):
+    """
+    Time an OpenAI call and count its prompt and completion tokens.
+    """
+    use_case = current_use_case()
+    started_at = time.perf_counter()
+    call = {"response": None}
+    status = "ok"
+    try:
+        yield call
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        OPENAI_LATENCY.labels(operation, model, status, use_case).observe(time.perf_counter() - started_at)
+        usage = getattr(call["response"], "usage", None)
+        for token_type in ("prompt", "completion"):
+            tokens = getattr(usage, f"{token_type}_tokens", None)
+            if isinstance(tokens, int):
+                OPENAI_TOKENS.labels(token_type, model, use_case).inc(tokens)
+
+# Count Cache Lookup
+#
+# Parameters:
+#   - cache (str): Name of the cache, e.g., "preferences"
+#   - hit (bool): Whether the lookup was a hit
+#   - use_case (Optional[str]): Use case of the lookup, defaults to the use cases of the current request
+#
+# Returns:
+#   - None
+def count_cache_lookup(cache: str, hit: bool, use_case: Optional[str] = None):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss", use_case or current_use_case()).inc()
+
+# Render Metrics
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - tuple: The metrics in the Prometheus text format and their content type
+def render_metrics():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,95 @@
+import os
+import re
+import sys
+import asyncio
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database import get_db_connection
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Directory with the versioned schema migrations, named like "0001_preference_indexes.sql"
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'migrations'))
+
+# Key of the advisory lock that keeps several replicas from migrating at the same time
+MIGRATION_LOCK_ID = 7031
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Load Migrations
+#
+# Parameters:
+#   - directory (str): Directory containing the migration files, e.g., "backend/db/migrations"
+#
+# Returns:
+#   - list[tuple]: Version, name and SQL of every migration, ordered by version,
+#                  e.g., [(1, "preference_indexes", "CREATE UNIQUE INDEX ...")]
+def load_migrations(directory: str = MIGRATIONS_DIR):
+    """
+    Read all migration files of a directory in version order.
+    """
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding="utf-8") as file:
+            migrations.append((int(match.group(1)), match.group(2), file.read()))
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+# Apply Migrations
+#
+# Parameters:
+#   - conn (optional): Database connection to migrate; a new connection is opened if None
+#   - directory (str): Directory containing the migration files
+#
+# Returns:
+#   - list[int]: Versions of the migrations applied in this run, e.g., [1]
+async def apply_migrations(conn=None, directory: str = MIGRATIONS_DIR):
+    """
+    Apply all pending migrations, each in its own transaction, and record them in schema_migrations.
+    """
+    own_connection = conn is None
+    if own_connection:
+        conn = await get_db_connection()
+    try:
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """
+            )
+            applied_versions = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+
+            applied = []
+            for version, name, sql in load_migrations(directory):
+                if version in applied_versions:
+                    continue
+                logger.info(f"Applying migration {version:04d}_{name}")
+                async with conn.transaction():
+                    await conn.execute(sql)
+                    await conn.execute("INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", version, name)
+                applied.append(version)
+            return applied
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    finally:
+        if own_connection:
+            await conn.close()
+
+
+if __name__ == "__main__":
+    applied = asyncio.run(apply_migrations())
+    logger.info(f"Applied migrations: {applied or 'none'}")
@@ -0,0 +1,138 @@
+import os
+import sys
+import asyncio
+import logging
+from datetime import datetime, time, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from UseCases import UseCases
+from api.data_filler import DataFiller
+from api.database_utils import iter_users, store_morning_summary
+from api.job_queue import JobQueue
+from api.service_data_cache import ServiceDataCache
+from api.summary_generator import UserSummaryGenerator
+
+logger = logging.getLogger(__name__)
+
+# Time of day (UTC) at which the summaries are precomputed, shortly before the bot sends them at 07:00
+PRECOMPUTE_TIME = time.fromisoformat(os.getenv("MORNING_PRECOMPUTE_TIME", "06:30"))
+
+# Job kind used for morning summaries in the job queue
+MORNING_JOB = "morning"
+
+# Stored summaries based on older data are regenerated on demand by /morning
+MAX_DATA_AGE = timedelta(minutes=int(os.getenv("MORNING_MAX_DATA_AGE_MINUTES", "120")))
+
+# Shard of the users this scheduler enqueues, so that several API replicas can split the users among them
+SHARD_COUNT = int(os.getenv("MORNING_SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.getenv("MORNING_SHARD_INDEX", "0"))
+
+# Number of jobs written to the job queue at once while the users are streamed
+ENQUEUE_BATCH = 1000
+
+class MorningScheduler:
+    """
+    Schedules the precomputation of the morning summaries of all users ahead of time and stores
+    them in the database, so that /morning only has to read them.
+    """
+
+    def __init__(self, cache: ServiceDataCache = None):
+        self.cache = cache or ServiceDataCache()
+
+    # Get Morning Data for a User
+    #
+    # Parameters:
+    #   - user_id (str): Unique identifier for the user, e.g., "user123"
+    #   - preferences (dict, optional): Preferences preloaded with load_all_preferences
+    #
+    # Returns:
+    #   - tuple: Stock, news and weather data keyed by use case descriptions, and the time the oldest part was fetched
+    async def get_morning_data(self, user_id: str, preferences=None):
+        info = await DataFiller(preferences).fill_missing_values(
+            {"Stock-Name": "", "News-Topic": "", "City": ""}, user_id
+        )
+
+        api_data = {}
+        oldest = datetime.now(timezone.utc)
+        for use_case, key in [(UseCases.STOCKS, "Stock-Name"), (UseCases.NEWS, "News-Topic"), (UseCases.WEATHER, "City")]:
+            data, fetched_at = await asyncio.to_thread(self.cache.get_many, use_case, info.get(key))
+            api_data[use_case.description] = data
+            oldest = min(oldest, fetched_at)
+        return api_data, oldest
+
+    # Precompute Morning Summary for a User
+    #
+    # Parameters:
+    #   - user_id (str): Unique identifier for the user, e.g., "user123"
+    #   - summary_date (date): The day the summary is generated for
+    #   - preferences (dict, optional): Preferences preloaded with load_all_preferences
+    #
+    # Returns:
+    #   - None
+    async def precompute_user(self, user_id: str, summary_date, preferences=None):
+        api_data, data_fetched_at = await self.get_morning_data(user_id, preferences)
+        result = await UserSummaryGenerator().get_user_morning(user_id, api_data)
+        await store_morning_summary(user_id, summary_date, result["response"], data_fetched_at)
+
+    # Enqueue Morning Jobs for All Users
+    #
+    # Parameters:
+    #   - shard_count (int): Number of shards the users are split into, e.g., 2
+    #   - shard_index (int): The shard of users to enqueue, e.g., 0
+    #
+    # Returns:
+    #   - str: The run key of the enqueued batch, i.e. the day the summaries are generated for, e.g., "2025-04-15"
+    #
+    # Notes:
+    #   - The summaries are generated by the workers (see api/worker.py) through precompute_user.
+    #   - Jobs are enqueued in batches while the users are streamed, so workers can start on the first users right away.
+    async def enqueue_all(self, shard_count: int = SHARD_COUNT, shard_index: int = SHARD_INDEX):
+        run_key = datetime.now(timezone.utc).date().isoformat()
+        queue = JobQueue()
+        batch = []
+        enqueued = 0
+        async for record in iter_users(shard_count, shard_index):
+            batch.append((record['username'], None))
+            if len(batch) >= ENQUEUE_BATCH:
+                await queue.enqueue(MORNING_JOB, run_key, batch)
+                enqueued += len(batch)
+                batch = []
+        if batch:
+            await queue.enqueue(MORNING_JOB, run_key, batch)
+            enqueued += len(batch)
+        logger.info(f"Enqueued {enqueued} morning jobs for {run_key} (shard {shard_index + 1}/{shard_count})")
+        return run_key
+
+    # Get Seconds Until Next Run
+    #
+    # Parameters:
+    #   - now (datetime): The current time (UTC)
+    #
+    # Returns:
+    #   - float: Seconds until the next precompute time
+    @staticmethod
+    def seconds_until_next_run(now: datetime) -> float:
+        next_run = datetime.combine(now.date(), PRECOMPUTE_TIME, tzinfo=timezone.utc)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    # Run Scheduler Loop
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None (runs until cancelled)
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run(datetime.now(timezone.utc)))
+            try:
+                await self.enqueue_all()
+            except Exception as e:
+                logger.error(f"Enqueueing morning jobs failed: {e}")
+            try:
+                deleted = await JobQueue().delete_old_jobs()
+                logger.info(f"Deleted {deleted} old jobs")
+            except Exception as e:
+                logger.error(f"Deleting old jobs failed: {e}")
@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database import get_db_connection
+from api.metrics import count_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel on which changed usernames are announced to all API replicas
+PREFERENCES_CHANNEL = "preferences_changed"
+
+class PreferenceCache:
+    """
+    A bounded in-memory cache for user preferences. The least recently used entries are evicted
+    when the cache is full, and entries expire after a TTL in case an invalidation got lost.
+    Once the listener for invalidations was started, the cache is bypassed while it is disconnected.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 600, reconnect_delay: float = 1, max_reconnect_delay: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._listener_conn = None
+        self._listener_down = False
+        self._reconnect_task = None
+        self._stopped = True
+
+    # Current Generation
+    #
+    # Returns:
+    #   - int: Counter bumped by every invalidation, to be passed to set() after reading the database
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    # Get Cached Preferences
+    #
+    # Parameters:
+    #   - username (str): The username of the user, e.g., "john_doe"
+    #
+    # Returns:
+    #   - Optional[dict]: The cached preferences, or None on a cache miss
+    def get(self, username: str) -> Optional[dict]:
+        entry = None if self._listener_down else self._entries.get(username)
+        if entry is None:
+            count_cache_lookup("preferences", False)
+            return None
+        preferences, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[username]
+            count_cache_lookup("preferences", False)
+            return None
+        self._entries.move_to_end(username)
+        count_cache_lookup("preferences", True)
+        return preferences
+
+    # Store Preferences
+    #
+    # Parameters:
+    #   - username (str): The username of the user, e.g., "john_doe"
+    #   - preferences (dict): The preferences of the user
+    #   - generation (int, optional): The generation read before the preferences were loaded, e.g., 17
+    #
+    # Returns:
+    #   - None
+    #
+    # Notes:
+    #   - The preferences are not stored if an invalidation arrived since the given generation, as they
+    #     might have been read before the change. This also skips users that did not change, which only
+    #     costs another database read.
+    def set(self, username: str, preferences: dict, generation: Optional[int] = None):
+        if self._listener_down or (generation is not None and generation != self._generation):
+            return
+        self._entries[username] = (preferences, time.monotonic())
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    # Invalidate Preferences
+    #
+    # Parameters:
+    #   - username (str): The username of the user, e.g., "john_doe"
+    #
+    # Returns:
+    #   - None
+    def invalidate(self, username: str):
+        self._generation += 1
+        self._entries.pop(username, None)
+
+    # Clear Cache
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    # Handle Notification
+    #
+    # Parameters:
+    #   - connection: The listening database connection
+    #   - pid (int): Process ID of the notifying Postgres backend
+    #   - channel (str): The notification channel, e.g., "preferences_changed"
+    #   - payload (str): The username whose preferences changed, e.g., "john_doe"
+    #
+    # Returns:
+    #   - None
+    def handle_notification(self, connection, pid, channel, payload):
+        self.invalidate(payload)
+
+    # Handle Lost Listener Connection
+    #
+    # Parameters:
+    #   - connection: The listening database connection
+    #
+    # Returns:
+    #   - None
+    #
+    # Notes:
+    #   - Invalidations might be missed until the listener is reconnected, so the whole cache is dropped
+    #     and bypassed until then.
+    def handle_termination(self, connection):
+        if connection is not self._listener_conn:
+            return
+        logger.warning("Preference listener connection lost, bypassing preference cache until it is reconnected")
+        self._listener_conn = None
+        self._listener_down = True
+        self.clear()
+        self.__schedule_reconnect()
+
+    # Connect Listener
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - bool: Whether the listener is connected
+    async def __connect_listener(self) -> bool:
+        conn = None
+        try:
+            conn = await get_db_connection()
+            await conn.add_listener(PREFERENCES_CHANNEL, self.handle_notification)
+            conn.add_termination_listener(self.handle_termination)
+        except Exception as e:
+            logger.warning(f"Could not listen for preference changes: {e}")
+            if conn is not None:
+                conn.terminate()
+            self._listener_down = True
+            self.clear()
+            return False
+
+        self._listener_conn = conn
+        self._listener_down = False
+        return True
+
+    # Schedule Reconnect
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    def __schedule_reconnect(self):
+        if self._stopped or (self._reconnect_task is not None and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = asyncio.get_running_loop().create_task(self.__reconnect())
+
+    # Reconnect Listener
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    #
+    # Notes:
+    #   - The delay between attempts doubles up to max_reconnect_delay.
+    async def __reconnect(self):
+        delay = self.reconnect_delay
+        while not self._stopped:
+            await asyncio.sleep(delay)
+            if await self.__connect_listener():
+                logger.info("Preference listener reconnected")
+                return
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    # Start Listening for Invalidations
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    #
+    # Notes:
+    #   - If the listener cannot connect, the cache is bypassed and the connection retried in the background.
+    async def start_listener(self):
+        self._stopped = False
+        if not await self.__connect_listener():
+            self.__schedule_reconnect()
+
+    # Stop Listening for Invalidations
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    async def stop_listener(self):
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listener_conn is not None:
+            conn, self._listener_conn = self._listener_conn, None
+            await conn.close()
+        self._listener_down = False
+
+
+preference_cache = PreferenceCache(
+    max_size=int(os.getenv("PREFERENCE_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("PREFERENCE_CACHE_TTL", "600")),
+)
@@ -0,0 +1,147 @@
+import os
+import io
+import sys
+import csv
+import json
+from collections import deque
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.models import User
+
+# Columns of the CSV format, stocks and news are separated by LIST_SEPARATOR within their column
+CSV_COLUMNS = ["username", "course", "cafeteria", "city", "preferred_transport_medium", "stocks", "news"]
+LIST_SEPARATOR = ";"
+
+# Iterate Lines
+#
+# Parameters:
+#   - chunks (AsyncIterator[bytes]): The raw request body, e.g., request.stream()
+#   - skip_empty (bool): Whether empty lines are left out, e.g., False if they may belong to a quoted CSV field
+#
+# Returns:
+#   - AsyncIterator[tuple]: Line number and decoded line, e.g., (1, '{"username": "john_doe", ...}')
+async def iter_lines(chunks, skip_empty: bool = True):
+    """
+    Split a streamed body into lines without reading it into memory at once.
+    """
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if line.strip() or not skip_empty:
+                yield number, line.decode("utf-8").rstrip("\r")
+    if buffer.strip():
+        yield number + 1, buffer.decode("utf-8").rstrip("\r")
+
+# Parse NDJSON Users
+#
+# Parameters:
+#   - chunks (AsyncIterator[bytes]): The raw request body with one JSON user per line
+#
+# Returns:
+#   - AsyncIterator[User]: The parsed users, raises HTTPException (422) on the first invalid line
+async def parse_ndjson(chunks):
+    """
+    Parse a stream of newline-delimited JSON user records.
+    """
+    async for number, line in iter_lines(chunks):
+        try:
+            yield User(**json.loads(line))
+        except (json.JSONDecodeError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid user in line {number}: {e}")
+
+# Parse CSV Users
+#
+# Parameters:
+#   - chunks (AsyncIterator[bytes]): The raw request body with a header line, see CSV_COLUMNS
+#
+# Returns:
+#   - AsyncIterator[User]: The parsed users, raises HTTPException (422) on the first invalid record
+#
+# Notes:
+#   - Quoted fields may contain line breaks, so one reader parses the whole body. It is only advanced once
+#     the quotes of the pending lines are balanced, i.e., a record is complete.
+#   - CSV cannot tell an empty string from a missing value. Empty fields are read as empty strings, as User
+#     requires strings, so a NULL column that was exported as an empty field comes back as an empty string.
+async def parse_csv(chunks):
+    """
+    Parse a stream of CSV user records.
+    """
+    pending = deque()
+    reader = csv.reader(iter(pending.popleft, None))
+    header = None
+    first_line = None
+    quotes = 0
+    async for number, line in iter_lines(chunks, skip_empty=False):
+        if not pending and not line.strip():
+            continue
+        pending.append(line + "\n")
+        first_line = first_line or number
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            raise HTTPException(status_code=422, detail=f"Invalid CSV in line {first_line}: {e}")
+        except IndexError:
+            # The reader wanted more lines than the quotes suggested, e.g., for a quote inside an unquoted field
+            values = None
+        if values is None or pending:
+            raise HTTPException(status_code=422, detail=f"Invalid CSV in line {first_line}: unbalanced quotes")
+        record_line, first_line, quotes = first_line, None, 0
+
+        if header is None:
+            header = values
+            continue
+        try:
+            record = dict(zip(header, values))
+            for column in ("stocks", "news"):
+                record[column] = [item for item in record.get(column, "").split(LIST_SEPARATOR) if item]
+            yield User(**record)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid user in line {record_line}: {e}")
+
+    if pending:
+        raise HTTPException(status_code=422, detail=f"Invalid CSV in line {first_line}: unterminated quoted field")
+
+# Format NDJSON User
+#
+# Parameters:
+#   - record (dict): Preferences of a user, e.g., {"username": "john_doe", "stocks": ["Apple"], ...}
+#
+# Returns:
+#   - str: The user as a single JSON line
+def format_ndjson(record: dict) -> str:
+    return json.dumps({column: record[column] for column in CSV_COLUMNS}) + "\n"
+
+# Format CSV User
+#
+# Parameters:
+#   - record (dict): Preferences of a user, e.g., {"username": "john_doe", "stocks": ["Apple"], ...}
+#
+# Returns:
+#   - str: The user as a single CSV line
+def format_csv(record: dict) -> str:
+    output = io.StringIO()
+    csv.writer(output, lineterminator="\n").writerow([
+        LIST_SEPARATOR.join(record[column]) if column in ("stocks", "news") else record[column]
+        for column in CSV_COLUMNS
+    ])
+    return output.getvalue()
+
+# Format CSV Header
+#
+# Parameters:
+#   - None
+#
+# Returns:
+#   - str: The header line of the CSV format
+def format_csv_header() -> str:
+    return ",".join(CSV_COLUMNS) + "\n"
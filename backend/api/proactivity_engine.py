@@ -0,0 +1,157 @@
+import os
+import sys
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from UseCases import UseCases
+from api.database_utils import get_subscribed_items, iter_preferences, get_proactivity_state, store_proactivity_state
+
+logger = logging.getLogger(__name__)
+
+# Job kind used for proactivity messages in the job queue
+PROACTIVITY_JOB = "proactivity"
+
+# Minimum hourly change (and minimum move since the last notification) in percent for a stock to be reported
+SIGNIFICANT_CHANGE = 1.0
+
+# Number of article ids remembered per news category
+MAX_SEEN_ARTICLES = 50
+
+class ProactivityEngine:
+    """
+    Detects what changed since the last proactivity run, so that messages are only generated
+    for users whose subscribed stocks or news categories actually changed.
+    """
+
+    def __init__(self):
+        self.stock_state = None
+        self.news_state = None
+
+    # Detect Changes
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - list[tuple]: Username and the changed stock and news data of every affected user,
+    #                  e.g., [("user123", {"Stock Market Information": {"Apple": {...}}, "Latest News Updates": {}})]
+    #
+    # Notes:
+    #   - The new state is only kept on the engine; store_state() persists it once the changes are enqueued,
+    #     so that a failed run reports the same changes again.
+    async def detect_changes(self):
+        symbols, categories = await get_subscribed_items()
+
+        # Each stock and category is fetched once, no matter how many users subscribed to it
+        stock_data = await asyncio.to_thread(UseCases.STOCKS.func, symbols) if symbols else {}
+        news_data = await asyncio.to_thread(UseCases.NEWS.func, categories) if categories else {}
+
+        self.stock_state, self.news_state = await get_proactivity_state()
+        changed_stocks = self.get_changed_stocks(stock_data, self.stock_state)
+        changed_news = self.get_changed_news(news_data, self.news_state)
+
+        # The users are streamed, so only the affected ones are kept in memory
+        changes = []
+        if changed_stocks or changed_news:
+            async for record in iter_preferences():
+                user_stocks = {name: changed_stocks[name] for name in record["stocks"] if name in changed_stocks}
+                user_news = {topic: changed_news[topic] for topic in record["news"] if topic in changed_news}
+                if user_stocks or user_news:
+                    api_data = {UseCases.STOCKS.description: user_stocks, UseCases.NEWS.description: user_news}
+                    changes.append((record["username"], api_data))
+
+        logger.info(f"Proactivity: {len(changed_stocks)} changed stocks, {len(changed_news)} changed categories, {len(changes)} affected users")
+        return changes
+
+    # Store State
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    async def store_state(self):
+        if self.stock_state is not None:
+            await store_proactivity_state(self.stock_state, self.news_state)
+
+    # Get Changed Stocks
+    #
+    # Parameters:
+    #   - stock_data (dict): Current quotes, keyed by stock name, e.g., {"Apple": {"price": "173.80", "timestamp": "...", "changeFrom1hour": "1.5"}}
+    #   - stock_state (dict): Last seen quote per stock, updated in place with the current quotes
+    #
+    # Returns:
+    #   - dict: Stocks with a new quote that moved significantly since the last notification, e.g., {"Apple": {...}}
+    def get_changed_stocks(self, stock_data, stock_state):
+        changed = {}
+        for name, stock in stock_data.items():
+            previous = stock_state.get(name) or {"quote_timestamp": None, "price": None, "notified_price": None}
+            try:
+                price = float(stock.get("price"))
+                change = float(stock.get("changeFrom1hour") or 0)
+            except (TypeError, ValueError):
+                continue
+
+            is_new_quote = stock.get("timestamp") != previous["quote_timestamp"]
+            notified_price = previous["notified_price"]
+            moved_since_notification = (
+                not notified_price
+                or abs(price - notified_price) / notified_price * 100 > SIGNIFICANT_CHANGE
+            )
+            if is_new_quote and abs(change) > SIGNIFICANT_CHANGE and moved_since_notification:
+                changed[name] = stock
+                notified_price = price
+
+            stock_state[name] = {"quote_timestamp": stock.get("timestamp"), "price": price, "notified_price": notified_price}
+        return changed
+
+    # Get Changed News
+    #
+    # Parameters:
+    #   - news_data (dict): Current articles, keyed by category, e.g., {"business": [{"title": "...", "source": "https://...", "publishedAt": "..."}]}
+    #   - news_state (dict): Seen article ids per category, updated in place with the current articles
+    #
+    # Returns:
+    #   - dict: Unseen articles published within the last hour, keyed by category
+    def get_changed_news(self, news_data, news_state):
+        changed = {}
+        for topic, articles in news_data.items():
+            seen = news_state.get(topic, [])
+            new_articles = [
+                article for article in articles
+                if self.__article_id(article) not in seen and self.__within_last_hour(article.get("publishedAt", ""))
+            ]
+            if new_articles:
+                changed[topic] = new_articles
+
+            ids = [self.__article_id(article) for article in articles if self.__article_id(article) not in seen]
+            news_state[topic] = (ids + seen)[:MAX_SEEN_ARTICLES]
+        return changed
+
+    # Get Article Id
+    #
+    # Parameters:
+    #   - article (dict): A news article, e.g., {"title": "...", "source": "https://..."}
+    #
+    # Returns:
+    #   - str: The article URL, or its title if no URL is available
+    @staticmethod
+    def __article_id(article) -> str:
+        return article.get("source") or article.get("title") or ""
+
+    # Check if Published Within Last Hour
+    #
+    # Parameters:
+    #   - ts (str): Publication datetime in ISO format, e.g., "2025-04-15T08:00:00Z"
+    #
+    # Returns:
+    #   - bool: True if the timestamp lies within the last hour
+    @staticmethod
+    def __within_last_hour(ts: str) -> bool:
+        try:
+            t = datetime.strptime(ts, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+            return timedelta(0) <= (datetime.now(timezone.utc) - t) < timedelta(hours=1)
+        except (TypeError, ValueError):
+            return False
@@ -0,0 +1,86 @@
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from UseCases import UseCases
+from api.metrics import observe_fetcher, count_cache_lookup
+
+# Maximum age of cached upstream data per use case before it is fetched again
+DEFAULT_MAX_AGE = {
+    UseCases.STOCKS: timedelta(minutes=30),
+    UseCases.NEWS: timedelta(hours=1),
+    UseCases.WEATHER: timedelta(hours=1),
+}
+
+class ServiceDataCache:
+    """
+    Caches service fetcher results per use case and item (e.g. one stock or one city),
+    so that data shared by many users is only fetched once while it is still fresh.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = dict(DEFAULT_MAX_AGE)
+        if max_age:
+            self.max_age.update(max_age)
+        self._entries = {}
+
+    # Check Freshness
+    #
+    # Parameters:
+    #   - use_case (UseCases): The use case the data belongs to, e.g., UseCases.STOCKS
+    #   - fetched_at (datetime): The time the data was fetched
+    #
+    # Returns:
+    #   - bool: True if the data is younger than the maximum age of the use case
+    def is_fresh(self, use_case: UseCases, fetched_at: datetime) -> bool:
+        max_age = self.max_age.get(use_case, timedelta(0))
+        return datetime.now(timezone.utc) - fetched_at < max_age
+
+    # Get Item Data
+    #
+    # Parameters:
+    #   - use_case (UseCases): The use case to fetch data for, e.g., UseCases.WEATHER
+    #   - item (str): A single item of the use case, e.g., "Stuttgart"
+    #
+    # Returns:
+    #   - tuple: The fetcher result for the item, e.g., {"Stuttgart": {...}}, and the time it was fetched
+    def get(self, use_case: UseCases, item: str):
+        entry = self._entries.get((use_case, item))
+        if entry and self.is_fresh(use_case, entry[1]):
+            count_cache_lookup("service_data", True, use_case.name)
+            return entry
+
+        count_cache_lookup("service_data", False, use_case.name)
+        with observe_fetcher(use_case.name):
+            data = use_case.func([item])
+        entry = (data, datetime.now(timezone.utc))
+        self._entries[(use_case, item)] = entry
+        return entry
+
+    # Get Use Case Data for Several Items
+    #
+    # Parameters:
+    #   - use_case (UseCases): The use case to fetch data for, e.g., UseCases.STOCKS
+    #   - items (list[str]): Items of the use case, e.g., ["Apple", "Tesla"]
+    #
+    # Returns:
+    #   - tuple: The merged fetcher results, keyed like the fetcher output, and the time the oldest item was fetched
+    def get_many(self, use_case: UseCases, items):
+        merged = {}
+        oldest = datetime.now(timezone.utc)
+        for item in items or []:
+            data, fetched_at = self.get(use_case, item)
+            merged.update(data)
+            oldest = min(oldest, fetched_at)
+        return merged, oldest
+
+    # Clear Cache
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    def clear(self):
+        self._entries.clear()
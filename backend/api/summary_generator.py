@@ -1,5 +1,6 @@
 import os
 import sys
+import asyncio
 from datetime import datetime, timezone, timedelta
 
 # Append parent directory to sys.path for module imports
@@ -8,47 +9,57 @@ from api.usecase_handler import UseCaseHandler
 from UseCases import UseCases
 from api.data_filler import DataFiller
 
+MORNING_USE_CASES = [UseCases.STOCKS.value, UseCases.NEWS.value, UseCases.WEATHER.value]
+
 class UserSummaryGenerator:
     """
     Generates personalized summaries for users based on their preferences and data.
     """
 
+    def __init__(self, preferences=None):
+        """
+        Optionally takes preferences preloaded with load_all_preferences, so no further database access is needed.
+        """
+        self.preferences = preferences
+
     # Get User Morning Summary
     #
     # Parameters:
     #   - user_id (str): Unique identifier for the user, e.g., "user123"
+    #   - api_data (dict, optional): Already fetched stock, news and weather data, keyed by use case descriptions
     #
     # Returns:
     #   - dict: Contains a morning summary response as plain text, e.g., {"response": "Guten Morgen! ..."}
-    async def get_user_morning(self, user_id: str):
-        use_cases = [UseCases.STOCKS.value, UseCases.NEWS.value, UseCases.WEATHER.value]
-        api_data = await self.__get_api_data_without_gpt(use_cases, user_id)
+    async def get_user_morning(self, user_id: str, api_data=None):
+        if api_data is None:
+            api_data = await self.__get_api_data_without_gpt(MORNING_USE_CASES, user_id)
         message = "Fass mir die wichtigsten Informationen für meinen Morgen zusammen. Geb mir das als einen zusammnhängenden Text zurück. Ohne Fomratierungen. Sag am Anfang Guten Morgen!"
-        response = UseCaseHandler().get_response(message, api_data)
+        response = await asyncio.to_thread(UseCaseHandler().get_response, message, api_data)
         return {"response": response}
 
     # Get User Proactivity Summary
     #
     # Parameters:
     #   - user_id (str): Unique identifier for the user, e.g., "user123"
+    #   - api_data (dict, optional): Already detected stock and news changes, keyed by use case descriptions
     #
     # Returns:
     #   - dict: Contains a proactive summary response as plain text, or None if no significant data is found
-    async def get_user_proactivity(self, user_id: str):
-        use_cases = [UseCases.STOCKS.value, UseCases.NEWS.value]
-        api_data = await self.__get_api_data_without_gpt(use_cases, user_id)
-        print(api_data)
-        stocks = api_data[UseCases.STOCKS.description]
-        news = api_data[UseCases.NEWS.description]
+    async def get_user_proactivity(self, user_id: str, api_data=None):
+        if api_data is None:
+            use_cases = [UseCases.STOCKS.value, UseCases.NEWS.value]
+            api_data = await self.__get_api_data_without_gpt(use_cases, user_id)
+            stocks = api_data[UseCases.STOCKS.description]
+            news = api_data[UseCases.NEWS.description]
 
-        significant_stocks = self.__get_significant_stocks(stocks)
-        recent_news = self.__get_recent_news(news)
+            significant_stocks = self.__get_significant_stocks(stocks)
+            recent_news = self.__get_recent_news(news)
 
-        if not (significant_stocks or recent_news):
-            return {"response": None}
+            if not (significant_stocks or recent_news):
+                return {"response": None}
 
         message = "Stell dir vor du bist proaktiv und erzählst mir etwas Neues über meine Aktien oder News. Erwähne bei den Aktien, wie sie sich in der letzten Stunde verändert haben. Beginne mit Hey, hast du schon gehört?"
-        response = UseCaseHandler().get_response(message, api_data)
+        response = await asyncio.to_thread(UseCaseHandler().get_response, message, api_data)
         return {"response": response}
 
     # Get API Data Without GPT
@@ -64,8 +75,8 @@ class UserSummaryGenerator:
             info: "" for use_case in UseCases if use_case.value in use_cases
             for info in use_case.information_needed
         }
-        info = await DataFiller().fill_missing_values(info_dict, user_id)
-        return UseCaseHandler().call_apis(use_cases, info)
+        info = await DataFiller(self.preferences).fill_missing_values(info_dict, user_id)
+        return await asyncio.to_thread(UseCaseHandler().call_apis, use_cases, info)
 
     # Get Significant Stocks
     #
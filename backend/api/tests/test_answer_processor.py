@@ -23,10 +23,14 @@ class TestAnswerProcessor(unittest.IsolatedAsyncioTestCase):
         mock_handler.call_apis.assert_called_once_with(["uc1"], {"key": "value"})
         mock_handler.get_response.assert_called_once_with("Hello", {"api": "data"})
 
-    @patch('api.answer_processor.get_all_users')
+    @patch('api.answer_processor.load_all_preferences', new_callable=AsyncMock)
+    @patch('api.answer_processor.get_morning_summaries')
     @patch('api.answer_processor.UserSummaryGenerator')
-    async def test_get_morning(self, MockUserSummaryGenerator, mock_get_all_users):
-        mock_get_all_users.return_value = [{"username": "user1"}, {"username": "user2"}]
+    async def test_get_morning(self, MockUserSummaryGenerator, mock_get_morning_summaries, mock_load_preferences):
+        mock_get_morning_summaries.return_value = [
+            {"username": "user1", "response": None},
+            {"username": "user2", "response": None}
+        ]
         mock_generator = MockUserSummaryGenerator.return_value
         mock_generator.get_user_morning = AsyncMock(side_effect=[
             {"response": "Good morning, user1!"},
@@ -45,25 +49,80 @@ class TestAnswerProcessor(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('api.answer_processor.get_all_users')
+    @patch('api.answer_processor.load_all_preferences', new_callable=AsyncMock)
+    @patch('api.answer_processor.get_morning_summaries')
     @patch('api.answer_processor.UserSummaryGenerator')
-    async def test_get_proactivity(self, MockUserSummaryGenerator, mock_get_all_users):
-        mock_get_all_users.return_value = [{"username": "user1"}, {"username": "user2"}]
+    async def test_get_morning_uses_precomputed_summaries(self, MockUserSummaryGenerator, mock_get_morning_summaries, mock_load_preferences):
+        mock_get_morning_summaries.return_value = [
+            {"username": "user1", "response": "Guten Morgen, user1!"},
+            {"username": "user2", "response": None}
+        ]
         mock_generator = MockUserSummaryGenerator.return_value
-        mock_generator.get_user_proactivity = AsyncMock(side_effect=[
-            {"response": "User1 is proactive!"},
-            Exception("Something went wrong")
+        mock_generator.get_user_morning = AsyncMock(return_value={"response": "Guten Morgen, user2!"})
+
+        processor = AnswerProcessor()
+        result = await processor.get_morning()
+
+        self.assertEqual(result, {
+            "results": [
+                {"user_id": "user1", "response": "Guten Morgen, user1!"},
+                {"user_id": "user2", "response": "Guten Morgen, user2!"}
+            ]
+        })
+        mock_generator.get_user_morning.assert_awaited_once_with("user2")
+        mock_load_preferences.assert_awaited_once_with(["user2"])
+        MockUserSummaryGenerator.assert_called_once_with(mock_load_preferences.return_value)
+
+    @patch('api.answer_processor.JobQueue')
+    @patch('api.answer_processor.ProactivityEngine')
+    async def test_get_proactivity(self, MockProactivityEngine, MockJobQueue):
+        changes = [("user1", {"Stock Market Information": {"Apple": {}}})]
+        MockProactivityEngine.return_value.detect_changes = AsyncMock(return_value=changes)
+        MockProactivityEngine.return_value.store_state = AsyncMock()
+        mock_queue = MockJobQueue.return_value
+        mock_queue.enqueue = AsyncMock()
+        mock_queue.wait_for_batch = AsyncMock()
+        mock_queue.collect_results = AsyncMock(return_value=[
+            {"user_id": "user1", "response": "User1 is proactive!"}
         ])
 
         processor = AnswerProcessor()
         result = await processor.get_proactivity()
 
-        self.assertEqual(result["results"][0]["user_id"], "user1")
-        self.assertEqual(result["results"][0]["response"], "User1 is proactive!")
-        self.assertEqual(result["results"][1]["user_id"], "user2")
-        self.assertTrue("Error: Something went wrong" in result["results"][1]["response"])
-        self.assertTrue("Traceback:" in result["results"][1]["response"])
+        self.assertEqual(result, {"results": [{"user_id": "user1", "response": "User1 is proactive!"}]})
+        mock_queue.enqueue.assert_awaited_once_with("proactivity", unittest.mock.ANY, changes)
+        MockProactivityEngine.return_value.store_state.assert_awaited_once()
+        mock_queue.wait_for_batch.assert_awaited_once()
+        mock_queue.collect_results.assert_awaited_once_with("proactivity")
+
+    @patch('api.answer_processor.JobQueue')
+    @patch('api.answer_processor.ProactivityEngine')
+    async def test_get_proactivity_keeps_state_when_enqueue_fails(self, MockProactivityEngine, MockJobQueue):
+        MockProactivityEngine.return_value.detect_changes = AsyncMock(return_value=[("user1", {})])
+        MockProactivityEngine.return_value.store_state = AsyncMock()
+        MockJobQueue.return_value.enqueue = AsyncMock(side_effect=OSError("connection refused"))
+
+        with self.assertRaises(OSError):
+            await AnswerProcessor().get_proactivity()
+
+        # Die Änderungen werden beim nächsten Lauf erneut erkannt
+        MockProactivityEngine.return_value.store_state.assert_not_awaited()
+
+    @patch('api.answer_processor.JobQueue')
+    @patch('api.answer_processor.ProactivityEngine')
+    async def test_get_proactivity_without_changes(self, MockProactivityEngine, MockJobQueue):
+        MockProactivityEngine.return_value.detect_changes = AsyncMock(return_value=[])
+        MockProactivityEngine.return_value.store_state = AsyncMock()
+        mock_queue = MockJobQueue.return_value
+        mock_queue.enqueue = AsyncMock()
+        mock_queue.wait_for_batch = AsyncMock()
+        mock_queue.collect_results = AsyncMock(return_value=[])
+
+        processor = AnswerProcessor()
+        result = await processor.get_proactivity()
 
+        self.assertEqual(result, {"results": []})
+        mock_queue.wait_for_batch.assert_not_awaited()
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,34 +1,46 @@
 import unittest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..','..')))
 from backend.api.main import app
+from api.preference_cache import preference_cache
+from api.tracing import span
+from api.metrics import set_use_case
 
 class TestGetPreferences(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.client = TestClient(app)  
+        preference_cache.clear()
 
-    @patch("api.database_utils.get_db_connection")
-    async def test_get_preferences(self, mock_get_db_connection):
+    def mock_pool(self, mock_get_db_pool, mock_conn):
+        mock_pool = MagicMock()
+        mock_pool.acquire.return_value = DummyTransaction(mock_conn)
+        mock_get_db_pool.return_value = mock_pool
+
+    @patch("api.database_utils.get_db_pool", new_callable=AsyncMock)
+    async def test_get_preferences(self, mock_get_db_pool):
         
         mock_conn = AsyncMock()
-        mock_get_db_connection.return_value = mock_conn
+        self.mock_pool(mock_get_db_pool, mock_conn)
         mock_conn.fetchrow.return_value = {
+            "u_id": 7,
+            "version": 3,
             "username": "testuser",
             "course": "Computer Science",
             "cafeteria": "Main Hall",
             "city": "Berlin",
             "preferred_transport_medium": "Bike",
-            "stocks": "Apple,Google",
-            "news": "CNN,BBC"
+            "stocks": ["Apple", "Google"],
+            "news": ["CNN", "BBC"]
         }
 
         response = self.client.get("/preferences/testuser")
 
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], '"7-3"')
         self.assertEqual(response.json(), {
             "username": "testuser",
             "course": "Computer Science",
@@ -39,10 +51,10 @@ class TestGetPreferences(unittest.IsolatedAsyncioTestCase):
             "news": ["CNN", "BBC"]
         })
 
-    @patch("api.database_utils.get_db_connection")
-    async def test_get_preferences_user_not_found(self, mock_get_db_connection):
+    @patch("api.database_utils.get_db_pool", new_callable=AsyncMock)
+    async def test_get_preferences_user_not_found(self, mock_get_db_pool):
         mock_conn = AsyncMock()
-        mock_get_db_connection.return_value = mock_conn
+        self.mock_pool(mock_get_db_pool, mock_conn)
         mock_conn.fetchrow.return_value = None 
 
         response = self.client.get("/preferences/nonexistentuser")
@@ -50,6 +62,70 @@ class TestGetPreferences(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.json(), {"detail": "User not found"})
 
+    @patch("api.database_utils.get_db_pool", new_callable=AsyncMock)
+    async def test_get_preferences_not_modified(self, mock_get_db_pool):
+        mock_conn = AsyncMock()
+        self.mock_pool(mock_get_db_pool, mock_conn)
+        mock_conn.fetchrow.return_value = {
+            "u_id": 7,
+            "version": 3,
+            "username": "testuser",
+            "course": "Computer Science",
+            "cafeteria": "Main Hall",
+            "city": "Berlin",
+            "preferred_transport_medium": "Bike",
+            "stocks": [],
+            "news": []
+        }
+
+        response = self.client.get("/preferences/testuser", headers={"If-None-Match": '"7-3"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.get("/preferences/testuser", headers={"If-None-Match": '"7-2"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], '"7-3"')
+
+        # Schwache Tags, Listen und "*" nach RFC 9110
+        for if_none_match in ('W/"7-3"', '"7-1", W/"7-3"', '"a,b", "7-3"', "*"):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.client.get("/preferences/testuser", headers={"If-None-Match": if_none_match})
+                self.assertEqual(response.status_code, 304)
+
+        response = self.client.get("/preferences/testuser", headers={"If-None-Match": '"7-1", "7-2", "7-3-1"'})
+        self.assertEqual(response.status_code, 200)
+
+    @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
+    @patch("api.database_utils.get_db_pool", new_callable=AsyncMock)
+    async def test_get_preferences_cached_until_update(self, mock_get_db_pool, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        self.mock_pool(mock_get_db_pool, mock_conn)
+        mock_conn.fetchrow.return_value = {
+            "u_id": 7,
+            "version": 1,
+            "username": "testuser",
+            "course": "Computer Science",
+            "cafeteria": "Main Hall",
+            "city": "Berlin",
+            "preferred_transport_medium": "Bike",
+            "stocks": [],
+            "news": []
+        }
+
+        self.client.get("/preferences/testuser")
+        self.client.get("/preferences/testuser")
+        self.assertEqual(mock_conn.fetchrow.await_count, 1)
+
+        update_conn = AsyncMock()
+        update_conn.transaction = lambda: DummyTransaction(update_conn)
+        update_conn.fetchval.return_value = 1
+        mock_get_db_connection.return_value = update_conn
+        self.client.put("/preferences/testuser", json={"city": "Stuttgart"})
+
+        update_conn.execute.assert_any_await("SELECT pg_notify($1, $2)", "preferences_changed", "testuser")
+        self.client.get("/preferences/testuser")
+        self.assertEqual(mock_conn.fetchrow.await_count, 2)
+
 # Definiere einen Dummy asynchronen Kontextmanager
 class DummyTransaction:
     def __init__(self, conn):
@@ -73,15 +149,8 @@ class TestInitPreferences(unittest.IsolatedAsyncioTestCase):
         mock_conn.transaction = lambda: DummyTransaction(mock_conn)
         mock_get_db_connection.return_value = mock_conn
 
-        # Reihenfolge der fetchval-Aufrufe:
-        # 1. COUNT(*) -> 0
-        # 2. INSERT INTO users -> user_id 100
-        # 3. Für "Apple": SELECT -> None, INSERT -> 200
-        # 4. Für "Google": SELECT -> None, INSERT -> 201
-        # 5. Für "CNN": SELECT -> None, INSERT -> 300
-        # 6. Für "BBC": SELECT -> None, INSERT -> 301
-        mock_conn.fetchval.side_effect = [0, 100, None, 200, 201, None, 300, 301]
-        mock_conn.fetchrow.return_value = None
+        # INSERT INTO users ... ON CONFLICT DO NOTHING liefert die neue user_id 100
+        mock_conn.fetchval.return_value = 100
 
         user_data = {
             "username": "testuser",
@@ -96,7 +165,14 @@ class TestInitPreferences(unittest.IsolatedAsyncioTestCase):
         response = self.client.post("/preferences/init", json=user_data)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"message": "User created successfully", "user_id": 100})
-        mock_conn.fetchval.assert_any_call("SELECT COUNT(*) FROM users WHERE username = $1", "testuser")
+        mock_conn.fetchval.assert_awaited_once()
+        mock_conn.execute.assert_any_await(
+            "INSERT INTO stocks (stock_name) SELECT unnest($1::text[]) ON CONFLICT (stock_name) DO NOTHING", ["Apple", "Google"]
+        )
+        mock_conn.execute.assert_any_await(
+            "INSERT INTO user_news (u_id, n_id) SELECT $1, n_id FROM news WHERE news_name = ANY($2::text[]) ON CONFLICT DO NOTHING", 100, ["CNN", "BBC"]
+        )
+        mock_conn.close.assert_awaited_once()
 
     @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
     async def test_init_preferences_user_already_exists(self, mock_get_db_connection):
@@ -104,8 +180,8 @@ class TestInitPreferences(unittest.IsolatedAsyncioTestCase):
         mock_conn.transaction = lambda: DummyTransaction(mock_conn)
         mock_get_db_connection.return_value = mock_conn
 
-        # Bereits existierender User: fetchval liefert 1
-        mock_conn.fetchval.side_effect = [1]
+        # Bereits existierender User: INSERT ... ON CONFLICT DO NOTHING liefert keine user_id
+        mock_conn.fetchval.return_value = None
 
         user_data = {
             "username": "existinguser",
@@ -120,22 +196,16 @@ class TestInitPreferences(unittest.IsolatedAsyncioTestCase):
         response = self.client.post("/preferences/init", json=user_data)
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {"detail": "User already exists"})
+        mock_conn.execute.assert_not_awaited()
+        mock_conn.close.assert_awaited_once()
         
     @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
-    async def test_init_preferences_with_existing_stocks_and_news(self, mock_get_db_connection):
+    async def test_init_preferences_round_trips_independent_of_list_length(self, mock_get_db_connection):
         mock_conn = AsyncMock()
         # Ersetze die transaction-Methode mit einer Lambda, die den Dummy-Transaktions-Kontextmanager zurückgibt
         mock_conn.transaction = lambda: DummyTransaction(mock_conn)
         mock_get_db_connection.return_value = mock_conn
-
-        # Reihenfolge der Aufrufe:
-        # 1. Überprüfen, ob der User existiert (0 = existiert nicht)
-        # 2. Einfügen des Users und Rückgabe der u_id (43)
-        # 3. Für "Amazon": SELECT -> 10 (existierender s_id)
-        # 4. Für "Microsoft": SELECT -> 11
-        # 5. Für "NYT": SELECT -> 20 (existierender n_id)
-        # 6. Für "Guardian": SELECT -> 21
-        mock_conn.fetchval.side_effect = [0, 43, 10, 11, 20, 21]
+        mock_conn.fetchval.return_value = 43
 
         user_data = {
             "username": "testuser2",
@@ -143,18 +213,17 @@ class TestInitPreferences(unittest.IsolatedAsyncioTestCase):
             "cafeteria": "Science Cafe",
             "city": "Hamburg",
             "preferred_transport_medium": "Train",
-            "stocks": ["Amazon", "Microsoft"],
-            "news": ["NYT", "Guardian"]
+            "stocks": [f"Stock {i}" for i in range(50)],
+            "news": [f"topic-{i}" for i in range(20)]
         }
 
         response = self.client.post("/preferences/init", json=user_data)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"message": "User created successfully", "user_id": 43})
 
-        mock_conn.fetchval.assert_any_call("SELECT s_id FROM stocks WHERE stock_name = $1", "Amazon")
-        mock_conn.fetchval.assert_any_call("SELECT s_id FROM stocks WHERE stock_name = $1", "Microsoft")
-        mock_conn.fetchval.assert_any_call("SELECT n_id FROM news WHERE news_name = $1", "NYT")
-        mock_conn.fetchval.assert_any_call("SELECT n_id FROM news WHERE news_name = $1", "Guardian")
+        # Je Liste ein Upsert und ein Link-Insert, plus die Benachrichtigung
+        self.assertEqual(mock_conn.fetchval.await_count, 1)
+        self.assertEqual(mock_conn.execute.await_count, 5)
 
 
 class TestUpdatePreferences(unittest.IsolatedAsyncioTestCase):
@@ -168,14 +237,8 @@ class TestUpdatePreferences(unittest.IsolatedAsyncioTestCase):
         mock_conn.transaction = lambda: DummyTransaction(mock_conn)
         mock_get_db_connection.return_value = mock_conn
         
-        # Reihenfolge der Aufrufe:
-        # 1. Gibt die Benutzer-ID zurück (user_id).
-        # 2. Gibt None zurück (stock 1 existiert nicht).
-        # 3. Gibt None zurück (stock 2 existiert nicht).
-        # 4. Gibt eine ID für ein existierendes Stock zurück (stock 3).
-        # 5. Gibt None zurück (news 1 existiert nicht).
-        # 6. Gibt None zurück (news 2 existiert nicht).
-        mock_conn.fetchval.side_effect = [1, None, None, 2, None, None]
+        # Gibt die Benutzer-ID zurück (user_id), alle Listen werden mit execute geschrieben
+        mock_conn.fetchval.return_value = 1
 
         response = self.client.put(
             "/preferences/testuser",
@@ -196,7 +259,10 @@ class TestUpdatePreferences(unittest.IsolatedAsyncioTestCase):
         
         # Prüfe, ob execute und fetchval aufgerufen wurden und die Verbindung geschlossen wurde
         mock_conn.execute.assert_called()
-        mock_conn.fetchval.assert_called()
+        mock_conn.fetchval.assert_called_once()
+        mock_conn.execute.assert_any_await(
+            "DELETE FROM user_stocks WHERE u_id = $1 AND s_id IN (SELECT s_id FROM stocks WHERE stock_name = ANY($2::text[]))", 1, ["Google"]
+        )
         mock_conn.close.assert_called()
 
     @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
@@ -218,5 +284,185 @@ class TestUpdatePreferences(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response.json(), {"detail": "User not found"})
         mock_conn.close.assert_called()
 
+class TestPatchPreferences(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        preference_cache.clear()
+
+    @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
+    async def test_patch_preferences_returns_new_state(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.transaction = lambda: DummyTransaction(mock_conn)
+        mock_get_db_connection.return_value = mock_conn
+        mock_conn.fetchval.return_value = 1
+        new_state = {
+            "u_id": 7,
+            "version": 4,
+            "username": "testuser",
+            "course": "IN22",
+            "cafeteria": "Mensa Central",
+            "city": "Stuttgart",
+            "preferred_transport_medium": "driving-car",
+            "stocks": ["Apple", "Tesla"],
+            "news": []
+        }
+        mock_conn.fetchrow.return_value = new_state
+
+        response = self.client.patch("/preferences/testuser", json={"add_stocks": ["Tesla"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {k: v for k, v in new_state.items() if k not in ("u_id", "version")})
+        self.assertEqual(response.headers["etag"], '"7-4"')
+        # Ein UPDATE ... RETURNING statt SELECT und UPDATE, ungesetzte Felder bleiben NULL
+        update_args = mock_conn.fetchval.await_args.args
+        self.assertEqual(update_args[1:], ("testuser", None, None, None, None))
+        self.assertEqual(preference_cache.get("testuser"), new_state)
+        mock_conn.close.assert_awaited_once()
+
+    @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
+    async def test_patch_preferences_user_not_found(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.transaction = lambda: DummyTransaction(mock_conn)
+        mock_get_db_connection.return_value = mock_conn
+        mock_conn.fetchval.return_value = None
+
+        response = self.client.patch("/preferences/unknownuser", json={"city": "Berlin"})
+
+        self.assertEqual(response.status_code, 404)
+        mock_conn.fetchrow.assert_not_awaited()
+
+class TestBulkPreferences(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    @patch("api.database_utils.BULK_COPY_BATCH", 2)
+    @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
+    async def test_bulk_import_ndjson(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.transaction = lambda: DummyTransaction(mock_conn)
+        mock_get_db_connection.return_value = mock_conn
+        mock_conn.fetchval.return_value = 2
+
+        body = "".join(
+            f'{{"username": "user{i}", "course": "IN22", "cafeteria": "Mensa Central", "city": "Stuttgart", '
+            f'"preferred_transport_medium": "driving-car", "stocks": ["Apple"], "news": []}}\n'
+            for i in range(3)
+        )
+        response = self.client.post("/preferences/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"message": "Users imported successfully", "created": 2, "skipped": 1})
+        # Zwei Batches mit je drei COPY-Befehlen (users, stocks, news)
+        self.assertEqual(mock_conn.copy_records_to_table.await_count, 6)
+        mock_conn.close.assert_awaited_once()
+
+    @patch("api.database_utils.get_db_connection", new_callable=AsyncMock)
+    async def test_bulk_import_invalid_csv(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.transaction = lambda: DummyTransaction(mock_conn)
+        mock_get_db_connection.return_value = mock_conn
+
+        body = "username,course\njohn_doe,IN22\n"
+        response = self.client.post("/preferences/bulk", content=body, headers={"Content-Type": "text/csv"})
+
+        self.assertEqual(response.status_code, 422)
+        mock_conn.fetchval.assert_not_awaited()
+
+    @patch("backend.api.main.stream_all_preferences")
+    async def test_bulk_export_csv(self, mock_stream_all_preferences):
+        async def records():
+            yield {
+                "username": "john_doe", "course": "IN22", "cafeteria": "Mensa Central", "city": "Stuttgart",
+                "preferred_transport_medium": "driving-car", "stocks": ["Apple"], "news": []
+            }
+        mock_stream_all_preferences.side_effect = records
+
+        response = self.client.get("/preferences/bulk?format=csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, (
+            "username,course,cafeteria,city,preferred_transport_medium,stocks,news\n"
+            "john_doe,IN22,Mensa Central,Stuttgart,driving-car,Apple,\n"
+        ))
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    @patch("backend.api.main.JobQueue")
+    def test_get_job_not_found(self, MockJobQueue):
+        MockJobQueue.return_value.get_job = AsyncMock(return_value=None)
+
+        response = self.client.get("/jobs/42")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Job not found"})
+
+    @patch("backend.api.main.JobQueue")
+    def test_get_batch_status(self, MockJobQueue):
+        status = {"queued": 1, "running": 0, "done": 2, "failed": 0}
+        MockJobQueue.return_value.get_batch_status = AsyncMock(return_value=status)
+
+        response = self.client.get("/jobs/morning/2025-04-15")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), status)
+        MockJobQueue.return_value.get_batch_status.assert_awaited_once_with("morning", "2025-04-15")
+
+class TestServerTiming(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    @patch("backend.api.main.AnswerProcessor")
+    def test_answer_reports_stage_durations(self, MockAnswerProcessor):
+        async def get_answer(message, user_id):
+            with span("llm.classify"):
+                pass
+            with span("api.weather", use_case="WEATHER"):
+                pass
+            return {"response": "Sonnig"}
+
+        MockAnswerProcessor.return_value.get_answer.side_effect = get_answer
+
+        response = self.client.get("/answer", params={"message": "Wetter?", "user_id": "user123"})
+
+        self.assertEqual(response.status_code, 200)
+        stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+        self.assertEqual(stages, ["llm.classify", "api.weather", "total"])
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    @patch("backend.api.main.AnswerProcessor")
+    def test_answer_latency_is_labelled_by_use_case(self, MockAnswerProcessor):
+        async def get_answer(message, user_id):
+            set_use_case("WEATHER")
+            return {"response": "Sonnig"}
+
+        MockAnswerProcessor.return_value.get_answer.side_effect = get_answer
+
+        self.client.get("/answer", params={"message": "Wetter?", "user_id": "user123"})
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'api_request_duration_seconds_count{method="GET",route="/answer",status="200",use_case="WEATHER"}',
+            response.text
+        )
+
+class TestLifespan(unittest.TestCase):
+    @patch("backend.api.main.MorningScheduler")
+    @patch("backend.api.main.apply_migrations", new_callable=AsyncMock)
+    def test_failed_migration_stops_startup(self, mock_apply_migrations, MockMorningScheduler):
+        mock_apply_migrations.side_effect = RuntimeError("Duplicate usernames, resolve them before migrating: a (2 users)")
+
+        with self.assertRaises(RuntimeError):
+            with TestClient(app):
+                pass
+
+        # Ohne Schema-Migration werden weder Scheduler noch Listener gestartet
+        MockMorningScheduler.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import AsyncMock, patch, MagicMock
+from unittest.mock import AsyncMock, patch
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..')))
@@ -7,12 +7,17 @@ from api.data_filler import DataFiller  # Passe den Importpfad ggf. an
 
 class TestDataFiller(unittest.IsolatedAsyncioTestCase):
 
-    @patch('api.data_filler.get_db_connection')  # Passe den Pfad zum Modul an
-    async def test_fill_missing_values_fetch_from_database_and_defaults(self, mock_get_db_connection):
-        # Mock DB-Verbindung und .fetch-Methode
-        mock_conn = AsyncMock()
-        mock_conn.fetch.return_value = [('AAPL',), ('TSLA',)]
-        mock_get_db_connection.return_value = mock_conn
+    @patch('api.data_filler.fetch_user_preferences', new_callable=AsyncMock)
+    async def test_fill_missing_values_fetch_from_database_and_defaults(self, mock_fetch_user_preferences):
+        # Eine einzige Abfrage liefert alle Präferenzen des Users
+        mock_fetch_user_preferences.return_value = {
+            'username': 'user123',
+            'city': 'Berlin',
+            'cafeteria': 'Mensa Central',
+            'preferred_transport_medium': 'driving-car',
+            'stocks': ['AAPL', 'TSLA'],
+            'news': ['business'],
+        }
 
         # Input-Daten mit gemischten Fällen
         data = {
@@ -26,8 +31,8 @@ class TestDataFiller(unittest.IsolatedAsyncioTestCase):
 
         expected_data = {
             'Stock-Name': ['AAPL', 'TSLA'],
-            'News-Topic': ['AAPL', 'TSLA'],  # gleicher Rückgabewert für den Test, weil fetch() gleich gemockt
-            'City': ['AAPL', 'TSLA'],
+            'News-Topic': ['business'],
+            'City': ['Berlin'],
             'Destination-Location': 'DHBW Stuttgart',
             'Destination-Airport': 'Maldives',
             'InvalidKey': None,
@@ -37,45 +42,64 @@ class TestDataFiller(unittest.IsolatedAsyncioTestCase):
         result = await df.fill_missing_values(data.copy(), user_id='user123')
 
         self.assertEqual(result, expected_data)
-        self.assertEqual(mock_conn.fetch.call_count, 3)
-        mock_conn.close.assert_awaited()
+        mock_fetch_user_preferences.assert_awaited_once_with('user123')
 
-    async def test_fill_missing_values_no_fetch_or_default(self):
+    @patch('api.data_filler.fetch_user_preferences', new_callable=AsyncMock)
+    async def test_fill_missing_values_no_fetch_or_default(self, mock_fetch_user_preferences):
         df = DataFiller()
         data = {
             'CompletelyUnknownKey': '',
         }
         result = await df.fill_missing_values(data.copy(), user_id='user123')
         self.assertEqual(result, {'CompletelyUnknownKey': None})
+        mock_fetch_user_preferences.assert_not_awaited()
+
+    @patch('api.data_filler.fetch_user_preferences', new_callable=AsyncMock)
+    async def test_fill_missing_values_unknown_user(self, mock_fetch_user_preferences):
+        mock_fetch_user_preferences.return_value = None
+
+        result = await DataFiller().fill_missing_values({'City': '', 'Stock-Name': ''}, user_id='unknown')
+
+        self.assertEqual(result, {'City': None, 'Stock-Name': None})
+        mock_fetch_user_preferences.assert_awaited_once_with('unknown')
+
+    @patch('api.data_filler.fetch_user_preferences', new_callable=AsyncMock)
+    async def test_fill_missing_values_from_preloaded_preferences(self, mock_fetch_user_preferences):
+        preferences = {
+            'user123': {
+                'stocks': ['AAPL'],
+                'news': [],
+                'city': 'Berlin',
+                'cafeteria': 'Mensa Central',
+                'preferred_transport_medium': None,
+            }
+        }
+        data = {'Stock-Name': '', 'News-Topic': '', 'City': '', 'Canteen-Name': [''], 'Transport-Medium': '', 'Date': ''}
+
+        result = await DataFiller(preferences).fill_missing_values(data, user_id='user123')
+
+        self.assertEqual(result['Stock-Name'], ['AAPL'])
+        self.assertIsNone(result['News-Topic'])
+        self.assertEqual(result['City'], ['Berlin'])
+        self.assertEqual(result['Canteen-Name'], ['Mensa Central'])
+        self.assertIsNone(result['Transport-Medium'])
+        self.assertIsNotNone(result['Date'])
+        mock_fetch_user_preferences.assert_not_awaited()
+
+    @patch('api.data_filler.fetch_user_preferences', new_callable=AsyncMock)
+    async def test_fill_missing_values_returns_copies(self, mock_fetch_user_preferences):
+        cached = {'stocks': ['AAPL'], 'news': [], 'city': 'Berlin'}
+        mock_fetch_user_preferences.return_value = cached
+
+        result = await DataFiller().fill_missing_values({'Stock-Name': ''}, user_id='user123')
+        result['Stock-Name'].append('TSLA')
+
+        # Die Liste im Präferenz-Cache bleibt unverändert
+        self.assertEqual(cached['stocks'], ['AAPL'])
 
     def test_get_default_value(self):
         self.assertEqual(DataFiller._DataFiller__get_default_value('Destination-Location'), 'DHBW Stuttgart')
         self.assertIsNone(DataFiller._DataFiller__get_default_value('UnknownKey'))
 
-    @patch('api.data_filler.get_db_connection')
-    async def test_fetch_from_database_invalid_key(self, mock_get_db_connection):
-        result = await DataFiller._DataFiller__fetch_from_database('InvalidKey', 'user123')
-        self.assertIsNone(result)
-        mock_get_db_connection.assert_not_called()
-
-    @patch('api.data_filler.get_db_connection')
-    async def test_fetch_from_database_no_result(self, mock_get_db_connection):
-        mock_conn = AsyncMock()
-        mock_conn.fetch.return_value = []
-        mock_get_db_connection.return_value = mock_conn
-
-        result = await DataFiller._DataFiller__fetch_from_database('City', 'user123')
-        self.assertIsNone(result)
-        mock_conn.close.assert_awaited()
-
-    @patch('api.data_filler.get_db_connection')
-    async def test_fetch_from_database_single_result(self, mock_get_db_connection):
-        mock_conn = AsyncMock()
-        mock_conn.fetch.return_value = [ ["Berlin"]]
-        mock_get_db_connection.return_value = mock_conn
-
-        result = await DataFiller._DataFiller__fetch_from_database('City', 'user123')
-        self.assertEqual(result, ['Berlin'])
-
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,35 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api import database
+from api.database import get_db_pool, close_db_pool
+
+
+class TestDatabasePool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncTearDown(self):
+        database._pool = None
+
+    @patch("api.database.asyncpg.create_pool", new_callable=AsyncMock)
+    async def test_concurrent_requests_create_one_pool(self, mock_create_pool):
+        async def create_pool(*args, **kwargs):
+            # Der Verbindungsaufbau dauert, währenddessen kommen weitere Anfragen
+            await asyncio.sleep(0.01)
+            return MagicMock(close=AsyncMock())
+        mock_create_pool.side_effect = create_pool
+
+        pools = await asyncio.gather(*(get_db_pool() for _ in range(5)))
+
+        mock_create_pool.assert_awaited_once()
+        self.assertTrue(all(pool is pools[0] for pool in pools))
+
+        await close_db_pool()
+        pools[0].close.assert_awaited_once()
+        self.assertIsNone(database._pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+import json
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.job_queue import JobQueue
+
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_enqueue_is_idempotent_per_user_and_run(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_get_db_connection.return_value = mock_conn
+
+        await JobQueue().enqueue("proactivity", "run1", [("user1", {"a": 1}), ("user2", None)])
+
+        query, args = mock_conn.executemany.call_args[0]
+        self.assertIn("ON CONFLICT (kind, username, run_key) DO NOTHING", query)
+        self.assertEqual(args, [
+            ("proactivity", "user1", "run1", json.dumps({"a": 1})),
+            ("proactivity", "user2", "run1", None),
+        ])
+        mock_conn.close.assert_awaited()
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_claim_skips_locked_jobs_and_decodes_payload(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.fetch.return_value = [{
+            "job_id": 1, "kind": "proactivity", "username": "user1",
+            "run_key": "run1", "payload": '{"a": 1}', "attempts": 1
+        }]
+        mock_get_db_connection.return_value = mock_conn
+
+        jobs = await JobQueue().claim(1, ["proactivity"])
+
+        self.assertEqual(jobs[0]["payload"], {"a": 1})
+        self.assertIn("FOR UPDATE SKIP LOCKED", mock_conn.fetch.call_args[0][0])
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_claim_fails_jobs_whose_last_lease_expired(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.fetch.return_value = []
+        mock_get_db_connection.return_value = mock_conn
+
+        await JobQueue().claim(1, ["morning"])
+
+        query, kinds = mock_conn.execute.call_args[0]
+        self.assertIn("SET status = 'failed'", query)
+        self.assertIn("attempts >= max_attempts", query)
+        self.assertEqual(kinds, ["morning"])
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_complete_requires_the_lease(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_get_db_connection.return_value = mock_conn
+        queue = JobQueue()
+
+        mock_conn.execute.return_value = "UPDATE 1"
+        self.assertTrue(await queue.complete(1, 2, "Hey!"))
+        query, *args = mock_conn.execute.call_args[0]
+        self.assertIn("attempts = $2 AND status = 'running'", query)
+        self.assertEqual(args, [1, 2, "Hey!"])
+
+        # Ein anderer Worker hat den Job übernommen
+        mock_conn.execute.return_value = "UPDATE 0"
+        self.assertFalse(await queue.complete(1, 2, "Hey!"))
+        self.assertFalse(await queue.fail(1, 2, "LLM down"))
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_delete_old_jobs(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.execute.return_value = "DELETE 12"
+        mock_get_db_connection.return_value = mock_conn
+
+        deleted = await JobQueue().delete_old_jobs(retention_days=7)
+
+        self.assertEqual(deleted, 12)
+        query, seconds = mock_conn.execute.call_args[0]
+        self.assertIn("status IN ('done', 'failed')", query)
+        self.assertEqual(seconds, 7 * 86400)
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_get_batch_status(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.fetch.return_value = [{"status": "done", "count": 3}, {"status": "queued", "count": 1}]
+        mock_get_db_connection.return_value = mock_conn
+
+        status = await JobQueue().get_batch_status("morning", "2025-04-15")
+
+        self.assertEqual(status, {"queued": 1, "running": 0, "done": 3, "failed": 0})
+
+    async def test_wait_for_batch_returns_when_finished(self):
+        queue = JobQueue()
+        queue.get_batch_status = AsyncMock(side_effect=[
+            {"queued": 1, "running": 1, "done": 0, "failed": 0},
+            {"queued": 0, "running": 0, "done": 2, "failed": 0},
+        ])
+
+        status = await queue.wait_for_batch("proactivity", "run1", timeout=5, interval=0)
+
+        self.assertEqual(status["done"], 2)
+        self.assertEqual(queue.get_batch_status.await_count, 2)
+
+    @patch('api.job_queue.get_db_connection', new_callable=AsyncMock)
+    async def test_collect_results(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.fetch.return_value = [{"username": "user1", "result": "Hey!"}]
+        mock_get_db_connection.return_value = mock_conn
+
+        results = await JobQueue().collect_results("proactivity")
+
+        self.assertEqual(results, [{"user_id": "user1", "response": "Hey!"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from prometheus_client import REGISTRY
+from api.metrics import (
+    start_request,
+    set_use_case,
+    current_use_case,
+    observe_fetcher,
+    observe_openai,
+    count_cache_lookup,
+    render_metrics,
+)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_use_case_of_request(self):
+        labels = start_request()
+        set_use_case("NEWS,WEATHER")
+
+        self.assertEqual(current_use_case(), "NEWS,WEATHER")
+        self.assertEqual(labels, {"use_case": "NEWS,WEATHER"})
+
+    def test_observe_fetcher_counts_errors(self):
+        before = sample("service_fetcher_duration_seconds_count", use_case="STOCKS", status="error")
+
+        with self.assertRaises(ValueError):
+            with observe_fetcher("STOCKS"):
+                raise ValueError("Twelve Data nicht erreichbar")
+
+        after = sample("service_fetcher_duration_seconds_count", use_case="STOCKS", status="error")
+        self.assertEqual(after - before, 1)
+
+    def test_observe_openai_counts_tokens(self):
+        start_request()
+        set_use_case("WEATHER")
+        before = sample("openai_tokens_total", type="prompt", model="gpt-4o-mini", use_case="WEATHER")
+
+        with observe_openai("process_input", "gpt-4o-mini") as call:
+            call["response"] = MagicMock(usage=MagicMock(prompt_tokens=120, completion_tokens=30))
+
+        after = sample("openai_tokens_total", type="prompt", model="gpt-4o-mini", use_case="WEATHER")
+        self.assertEqual(after - before, 120)
+        self.assertGreater(
+            sample("openai_request_duration_seconds_count", operation="process_input", model="gpt-4o-mini", status="ok", use_case="WEATHER"),
+            0
+        )
+
+    def test_count_cache_lookup(self):
+        before = sample("cache_requests_total", cache="service_data", result="hit", use_case="NEWS")
+
+        count_cache_lookup("service_data", True, "NEWS")
+
+        after = sample("cache_requests_total", cache="service_data", result="hit", use_case="NEWS")
+        self.assertEqual(after - before, 1)
+
+    @patch("api.database._pool")
+    def test_preference_read_pool_usage_is_exposed(self, mock_pool):
+        mock_pool.get_size.return_value = 8
+        mock_pool.get_idle_size.return_value = 3
+        mock_pool.get_max_size.return_value = 10
+
+        content, content_type = render_metrics()
+
+        self.assertIn("text/plain", content_type)
+        self.assertIn(b'db_preference_read_pool_connections{state="in_use"} 5.0', content)
+        self.assertIn(b'db_preference_read_pool_connections{state="max"} 10.0', content)
+
+
+if __name__ == "__main__":
+    unittest.main()
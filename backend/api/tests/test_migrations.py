@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.migrations import load_migrations, apply_migrations
+
+
+class DummyTransaction:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+
+    def write_migrations(self, directory, files):
+        for filename, sql in files.items():
+            with open(os.path.join(directory, filename), "w", encoding="utf-8") as file:
+                file.write(sql)
+
+    def test_load_migrations_in_version_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_migrations(directory, {
+                "0002_second.sql": "SELECT 2;",
+                "0001_first.sql": "SELECT 1;",
+                "README.md": "not a migration",
+            })
+
+            migrations = load_migrations(directory)
+
+        self.assertEqual(migrations, [(1, "first", "SELECT 1;"), (2, "second", "SELECT 2;")])
+
+    def test_load_migrations_rejects_duplicate_versions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_migrations(directory, {"0001_first.sql": "", "0001_other.sql": ""})
+
+            with self.assertRaises(ValueError):
+                load_migrations(directory)
+
+    def test_shipped_migrations_load(self):
+        versions = [version for version, _, _ in load_migrations()]
+        self.assertEqual(versions, list(range(1, len(versions) + 1)))
+
+    async def test_apply_migrations_skips_applied_versions(self):
+        conn = AsyncMock()
+        conn.transaction = MagicMock(return_value=DummyTransaction())
+        conn.fetch.return_value = [{"version": 1}]
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_migrations(directory, {"0001_first.sql": "SELECT 1;", "0002_second.sql": "SELECT 2;"})
+            applied = await apply_migrations(conn, directory)
+
+        self.assertEqual(applied, [2])
+        conn.execute.assert_any_await("SELECT 2;")
+        conn.execute.assert_any_await("INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", 2, "second")
+        self.assertNotIn("SELECT 1;", [call.args[0] for call in conn.execute.await_args_list])
+        conn.close.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import datetime, date, timezone
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.morning_scheduler import MorningScheduler
+from UseCases import UseCases
+
+
+class TestMorningScheduler(unittest.IsolatedAsyncioTestCase):
+
+    @patch('api.morning_scheduler.DataFiller')
+    async def test_get_morning_data(self, MockDataFiller):
+        MockDataFiller.return_value.fill_missing_values = AsyncMock(return_value={
+            "Stock-Name": ["Apple"], "News-Topic": ["business"], "City": ["Berlin"]
+        })
+        fetched_at = datetime(2025, 4, 15, 6, 0, tzinfo=timezone.utc)
+        cache = MagicMock()
+        cache.get_many.side_effect = lambda use_case, items: ({items[0]: use_case.name}, fetched_at)
+
+        api_data, oldest = await MorningScheduler(cache).get_morning_data("user1")
+
+        self.assertEqual(api_data, {
+            UseCases.STOCKS.description: {"Apple": "STOCKS"},
+            UseCases.NEWS.description: {"business": "NEWS"},
+            UseCases.WEATHER.description: {"Berlin": "WEATHER"},
+        })
+        self.assertEqual(oldest, fetched_at)
+
+    @patch('api.morning_scheduler.store_morning_summary', new_callable=AsyncMock)
+    @patch('api.morning_scheduler.UserSummaryGenerator')
+    async def test_precompute_user_stores_summary(self, MockGenerator, mock_store):
+        MockGenerator.return_value.get_user_morning = AsyncMock(return_value={"response": "Guten Morgen!"})
+        fetched_at = datetime(2025, 4, 15, 6, 0, tzinfo=timezone.utc)
+        scheduler = MorningScheduler()
+        scheduler.get_morning_data = AsyncMock(return_value=({"data": 1}, fetched_at))
+
+        await scheduler.precompute_user("user1", date(2025, 4, 15))
+
+        MockGenerator.return_value.get_user_morning.assert_awaited_once_with("user1", {"data": 1})
+        mock_store.assert_awaited_once_with("user1", date(2025, 4, 15), "Guten Morgen!", fetched_at)
+
+    @patch('api.morning_scheduler.JobQueue')
+    @patch('api.morning_scheduler.iter_users')
+    async def test_enqueue_all(self, mock_iter_users, MockJobQueue):
+        async def users(shard_count, shard_index):
+            yield {"username": "user1"}
+            yield {"username": "user2"}
+        mock_iter_users.side_effect = users
+        MockJobQueue.return_value.enqueue = AsyncMock()
+
+        run_key = await MorningScheduler().enqueue_all()
+
+        self.assertEqual(run_key, datetime.now(timezone.utc).date().isoformat())
+        mock_iter_users.assert_called_once_with(1, 0)
+        MockJobQueue.return_value.enqueue.assert_awaited_once_with(
+            "morning", run_key, [("user1", None), ("user2", None)]
+        )
+
+    @patch('api.morning_scheduler.ENQUEUE_BATCH', 2)
+    @patch('api.morning_scheduler.JobQueue')
+    @patch('api.morning_scheduler.iter_users')
+    async def test_enqueue_all_in_batches_for_shard(self, mock_iter_users, MockJobQueue):
+        async def users(shard_count, shard_index):
+            for i in range(3):
+                yield {"username": f"user{i}"}
+        mock_iter_users.side_effect = users
+        MockJobQueue.return_value.enqueue = AsyncMock()
+
+        run_key = await MorningScheduler().enqueue_all(shard_count=4, shard_index=1)
+
+        mock_iter_users.assert_called_once_with(4, 1)
+        self.assertEqual(MockJobQueue.return_value.enqueue.await_args_list[0].args, ("morning", run_key, [("user0", None), ("user1", None)]))
+        self.assertEqual(MockJobQueue.return_value.enqueue.await_args_list[1].args, ("morning", run_key, [("user2", None)]))
+
+    def test_seconds_until_next_run(self):
+        before = datetime(2025, 4, 15, 6, 0, tzinfo=timezone.utc)
+        after = datetime(2025, 4, 15, 7, 0, tzinfo=timezone.utc)
+
+        self.assertEqual(MorningScheduler.seconds_until_next_run(before), 30 * 60)
+        self.assertEqual(MorningScheduler.seconds_until_next_run(after), 23.5 * 3600)
+
+
+if __name__ == '__main__':
+    unittest.main()
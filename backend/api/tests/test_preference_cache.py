@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.preference_cache import PreferenceCache, PREFERENCES_CHANNEL
+
+
+class TestPreferenceCache(unittest.IsolatedAsyncioTestCase):
+
+    def test_get_returns_stored_preferences(self):
+        cache = PreferenceCache()
+        cache.set("john_doe", {"city": "Stuttgart"})
+
+        self.assertEqual(cache.get("john_doe"), {"city": "Stuttgart"})
+        self.assertIsNone(cache.get("jane_doe"))
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = PreferenceCache(max_size=2)
+        cache.set("a", {})
+        cache.set("b", {})
+        cache.get("a")
+        cache.set("c", {})
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_expired_entries_are_not_returned(self):
+        cache = PreferenceCache(ttl=0)
+        cache.set("john_doe", {"city": "Stuttgart"})
+
+        self.assertIsNone(cache.get("john_doe"))
+
+    def test_notification_invalidates_user(self):
+        cache = PreferenceCache()
+        cache.set("john_doe", {})
+        cache.set("jane_doe", {})
+
+        cache.handle_notification(None, 1234, PREFERENCES_CHANNEL, "john_doe")
+
+        self.assertIsNone(cache.get("john_doe"))
+        self.assertIsNotNone(cache.get("jane_doe"))
+
+    def test_set_ignored_after_invalidation(self):
+        cache = PreferenceCache()
+        generation = cache.generation
+
+        # Die Änderung trifft ein, während die alten Präferenzen noch gelesen werden
+        cache.handle_notification(None, 1234, PREFERENCES_CHANNEL, "john_doe")
+        cache.set("john_doe", {"city": "Berlin"}, generation)
+        self.assertIsNone(cache.get("john_doe"))
+
+        cache.set("john_doe", {"city": "Stuttgart"}, cache.generation)
+        self.assertEqual(cache.get("john_doe"), {"city": "Stuttgart"})
+
+    @patch("api.preference_cache.get_db_connection", new_callable=AsyncMock)
+    async def test_lost_listener_bypasses_cache_until_reconnected(self, mock_get_db_connection):
+        lost_conn = AsyncMock()
+        lost_conn.add_termination_listener = MagicMock()
+        new_conn = AsyncMock()
+        new_conn.add_termination_listener = MagicMock()
+        mock_get_db_connection.side_effect = [lost_conn, OSError("connection refused"), new_conn]
+        cache = PreferenceCache(reconnect_delay=0.01)
+        await cache.start_listener()
+        cache.set("john_doe", {})
+
+        cache.handle_termination(lost_conn)
+
+        # Ohne Listener könnten Invalidierungen verpasst werden
+        self.assertIsNone(cache.get("john_doe"))
+        cache.set("john_doe", {})
+        self.assertIsNone(cache.get("john_doe"))
+
+        for _ in range(100):
+            if mock_get_db_connection.await_count == 3:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+
+        new_conn.add_listener.assert_awaited_once_with(PREFERENCES_CHANNEL, cache.handle_notification)
+        cache.set("john_doe", {})
+        self.assertIsNotNone(cache.get("john_doe"))
+        await cache.stop_listener()
+
+    @patch("api.preference_cache.get_db_connection", new_callable=AsyncMock)
+    async def test_start_and_stop_listener(self, mock_get_db_connection):
+        mock_conn = AsyncMock()
+        mock_conn.add_termination_listener = MagicMock()
+        mock_get_db_connection.return_value = mock_conn
+        cache = PreferenceCache()
+
+        await cache.start_listener()
+        mock_conn.add_listener.assert_awaited_once_with(PREFERENCES_CHANNEL, cache.handle_notification)
+
+        await cache.stop_listener()
+        mock_conn.close.assert_awaited_once()
+
+    @patch("api.preference_cache.get_db_connection", new_callable=AsyncMock)
+    async def test_start_listener_without_database(self, mock_get_db_connection):
+        mock_get_db_connection.side_effect = OSError("connection refused")
+        cache = PreferenceCache()
+
+        await cache.start_listener()
+        cache.set("john_doe", {})
+        self.assertIsNone(cache.get("john_doe"))
+
+        await cache.stop_listener()
+        self.assertEqual(mock_get_db_connection.await_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
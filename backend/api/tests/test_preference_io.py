@@ -0,0 +1,85 @@
+import unittest
+import os
+import sys
+from fastapi import HTTPException
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.preference_io import iter_lines, parse_ndjson, parse_csv, format_ndjson, format_csv, format_csv_header
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+class TestPreferenceIO(unittest.IsolatedAsyncioTestCase):
+
+    async def test_iter_lines_across_chunks(self):
+        lines = await collect(iter_lines(chunks(b'first\r\nsec', b'ond\n\n', b'third')))
+        self.assertEqual(lines, [(1, "first"), (2, "second"), (4, "third")])
+
+    async def test_parse_ndjson(self):
+        body = (
+            b'{"username": "john_doe", "course": "IN22", "cafeteria": "Mensa Central", "city": "Stuttgart", '
+            b'"preferred_transport_medium": "driving-car", "stocks": ["Apple"], "news": ["business"]}\n'
+        )
+        users = await collect(parse_ndjson(chunks(body)))
+
+        self.assertEqual(len(users), 1)
+        self.assertEqual(users[0].username, "john_doe")
+        self.assertEqual(users[0].stocks, ["Apple"])
+
+    async def test_parse_ndjson_invalid_line(self):
+        with self.assertRaises(HTTPException) as context:
+            await collect(parse_ndjson(chunks(b'{"username": "john_doe"}\n')))
+
+        self.assertEqual(context.exception.status_code, 422)
+        self.assertIn("line 1", context.exception.detail)
+
+    async def test_parse_csv(self):
+        body = (
+            b"username,course,cafeteria,city,preferred_transport_medium,stocks,news\n"
+            b"john_doe,IN22,Mensa Central,Stuttgart,driving-car,Apple;Tesla,\n"
+        )
+        users = await collect(parse_csv(chunks(body)))
+
+        self.assertEqual(users[0].stocks, ["Apple", "Tesla"])
+        self.assertEqual(users[0].news, [])
+
+    async def test_parse_csv_quoted_line_break(self):
+        record = {
+            "username": "john_doe", "course": "IN22\n\nWI22", "cafeteria": 'Mensa "Central", Ost', "city": "",
+            "preferred_transport_medium": "driving-car", "stocks": ["Apple", "Tesla"], "news": [],
+        }
+        body = (format_csv_header() + format_csv(record) + format_csv({**record, "username": "jane_doe"})).encode()
+
+        # Die Datensätze werden an beliebigen Stellen auf Chunks verteilt
+        users = await collect(parse_csv(chunks(*(body[i:i + 5] for i in range(0, len(body), 5)))))
+
+        self.assertEqual([user.model_dump() for user in users], [record, {**record, "username": "jane_doe"}])
+
+    async def test_parse_csv_unterminated_quote(self):
+        body = b"username,course,cafeteria,city,preferred_transport_medium,stocks,news\njohn_doe,\"IN22,a,b,c,d,,\n"
+
+        with self.assertRaises(HTTPException) as context:
+            await collect(parse_csv(chunks(body)))
+
+        self.assertEqual(context.exception.status_code, 422)
+        self.assertIn("line 2", context.exception.detail)
+
+    def test_format_round_trip(self):
+        record = {
+            "username": "john_doe", "course": "IN22", "cafeteria": "Mensa Central", "city": "Stuttgart",
+            "preferred_transport_medium": "driving-car", "stocks": ["Apple", "Tesla"], "news": ["business"],
+        }
+
+        self.assertEqual(format_csv_header(), "username,course,cafeteria,city,preferred_transport_medium,stocks,news\n")
+        self.assertEqual(format_csv(record), "john_doe,IN22,Mensa Central,Stuttgart,driving-car,Apple;Tesla,business\n")
+        self.assertTrue(format_ndjson(record).endswith("\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
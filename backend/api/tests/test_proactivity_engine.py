@@ -0,0 +1,103 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+from datetime import datetime, timezone
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.proactivity_engine import ProactivityEngine
+from UseCases import UseCases
+
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class TestProactivityEngine(unittest.IsolatedAsyncioTestCase):
+
+    def test_get_changed_stocks(self):
+        stock_data = {
+            "Apple": {"price": "110", "timestamp": "10:01", "changeFrom1hour": "2.5"},
+            "Tesla": {"price": "200", "timestamp": "10:01", "changeFrom1hour": "0.3"},
+            "Nvidia": {"price": "50", "timestamp": "10:00", "changeFrom1hour": "5"},
+            "Amazon": {"price": "100.5", "timestamp": "10:01", "changeFrom1hour": "3"},
+        }
+        stock_state = {
+            "Apple": {"quote_timestamp": "10:00", "price": 100.0, "notified_price": None},
+            # Same quote as in the last run
+            "Nvidia": {"quote_timestamp": "10:00", "price": 50.0, "notified_price": None},
+            # Already notified at almost the same price
+            "Amazon": {"quote_timestamp": "10:00", "price": 100.0, "notified_price": 100.0},
+        }
+
+        changed = ProactivityEngine().get_changed_stocks(stock_data, stock_state)
+
+        self.assertEqual(list(changed), ["Apple"])
+        self.assertEqual(stock_state["Apple"], {"quote_timestamp": "10:01", "price": 110.0, "notified_price": 110.0})
+        self.assertEqual(stock_state["Tesla"]["notified_price"], None)
+        self.assertEqual(stock_state["Amazon"]["notified_price"], 100.0)
+
+    def test_get_changed_news(self):
+        recent = now_iso()
+        news_data = {
+            "business": [{"title": "New", "source": "https://a", "publishedAt": recent}],
+            "sports": [{"title": "Seen", "source": "https://b", "publishedAt": recent}],
+            "health": [{"title": "Old", "source": "https://c", "publishedAt": "2000-01-01T00:00:00Z"}],
+        }
+        news_state = {"sports": ["https://b"]}
+
+        changed = ProactivityEngine().get_changed_news(news_data, news_state)
+
+        self.assertEqual(changed, {"business": news_data["business"]})
+        self.assertEqual(news_state, {"business": ["https://a"], "sports": ["https://b"], "health": ["https://c"]})
+
+    @patch('api.proactivity_engine.store_proactivity_state', new_callable=AsyncMock)
+    @patch('api.proactivity_engine.get_proactivity_state', new_callable=AsyncMock)
+    @patch('api.proactivity_engine.iter_preferences')
+    @patch('api.proactivity_engine.get_subscribed_items', new_callable=AsyncMock)
+    async def test_detect_changes_only_returns_affected_users(self, mock_get_subscribed_items, mock_iter_preferences, mock_get_state, mock_store_state):
+        async def preferences():
+            yield {"username": "user1", "stocks": ["Apple"], "news": []}
+            yield {"username": "user2", "stocks": ["Tesla"], "news": ["business"]}
+            yield {"username": "user3", "stocks": ["Apple", "Tesla"], "news": []}
+        mock_iter_preferences.side_effect = preferences
+        mock_get_subscribed_items.return_value = (["Apple", "Tesla"], ["business"])
+        mock_get_state.return_value = ({}, {})
+        stocks = {
+            "Apple": {"price": "110", "timestamp": "10:01", "changeFrom1hour": "2.5"},
+            "Tesla": {"price": "200", "timestamp": "10:01", "changeFrom1hour": "0.1"},
+        }
+
+        with patch.object(UseCases.STOCKS, "func", return_value=stocks) as mock_stocks, \
+                patch.object(UseCases.NEWS, "func", return_value={"business": []}) as mock_news:
+            engine = ProactivityEngine()
+            changes = await engine.detect_changes()
+
+        mock_stocks.assert_called_once_with(["Apple", "Tesla"])
+        mock_news.assert_called_once_with(["business"])
+        expected_data = {
+            UseCases.STOCKS.description: {"Apple": stocks["Apple"]},
+            UseCases.NEWS.description: {},
+        }
+        self.assertEqual(changes, [("user1", expected_data), ("user3", expected_data)])
+        # Der Zustand wird erst nach dem Einreihen der Nachrichten gespeichert
+        mock_store_state.assert_not_awaited()
+
+        await engine.store_state()
+        mock_store_state.assert_awaited_once_with(engine.stock_state, {"business": []})
+        self.assertEqual(engine.stock_state["Apple"]["notified_price"], 110.0)
+
+    @patch('api.proactivity_engine.store_proactivity_state', new_callable=AsyncMock)
+    @patch('api.proactivity_engine.get_proactivity_state', new_callable=AsyncMock)
+    @patch('api.proactivity_engine.iter_preferences')
+    @patch('api.proactivity_engine.get_subscribed_items', new_callable=AsyncMock)
+    async def test_detect_changes_skips_users_without_changes(self, mock_get_subscribed_items, mock_iter_preferences, mock_get_state, mock_store_state):
+        mock_get_subscribed_items.return_value = ([], [])
+        mock_get_state.return_value = ({}, {})
+
+        changes = await ProactivityEngine().detect_changes()
+
+        self.assertEqual(changes, [])
+        mock_iter_preferences.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
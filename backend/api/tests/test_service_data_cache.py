@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.service_data_cache import ServiceDataCache
+from UseCases import UseCases
+
+
+class TestServiceDataCache(unittest.TestCase):
+
+    def test_get_fetches_each_item_only_once_while_fresh(self):
+        fetcher = MagicMock(side_effect=lambda items: {items[0]: {"price": "1"}})
+        use_case = MagicMock(func=fetcher)
+        cache = ServiceDataCache({use_case: timedelta(minutes=5)})
+
+        first, _ = cache.get(use_case, "Apple")
+        second, _ = cache.get(use_case, "Apple")
+
+        self.assertEqual(first, {"Apple": {"price": "1"}})
+        self.assertEqual(second, first)
+        fetcher.assert_called_once_with(["Apple"])
+
+    def test_get_refetches_stale_items(self):
+        fetcher = MagicMock(return_value={"Berlin": {}})
+        use_case = MagicMock(func=fetcher)
+        cache = ServiceDataCache({use_case: timedelta(0)})
+
+        cache.get(use_case, "Berlin")
+        cache.get(use_case, "Berlin")
+
+        self.assertEqual(fetcher.call_count, 2)
+
+    def test_get_many_merges_items_and_returns_oldest_fetch_time(self):
+        cache = ServiceDataCache()
+        old = datetime.now(timezone.utc) - timedelta(minutes=10)
+        cache._entries[(UseCases.WEATHER, "Berlin")] = ({"Berlin": {"temperature": 10}}, old)
+
+        with patch.object(UseCases.WEATHER, "func", return_value={"Paris": {"temperature": 15}}):
+            data, oldest = cache.get_many(UseCases.WEATHER, ["Berlin", "Paris"])
+
+        self.assertEqual(data, {"Berlin": {"temperature": 10}, "Paris": {"temperature": 15}})
+        self.assertEqual(oldest, old)
+
+    def test_get_many_without_items(self):
+        data, _ = ServiceDataCache().get_many(UseCases.STOCKS, None)
+        self.assertEqual(data, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
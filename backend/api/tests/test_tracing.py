@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api import tracing
+from api.tracing import span, server_timing, otlp_request, STATUS_ERROR, SPAN_KIND_SERVER
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+
+    def test_nested_spans_share_the_trace(self):
+        with span("GET /answer", kind=SPAN_KIND_SERVER) as root:
+            with span("llm.classify") as classify:
+                with span("openai.chat") as chat:
+                    pass
+            with span("api.weather", use_case="WEATHER") as weather:
+                pass
+
+        self.assertEqual([s.name for s in root.spans], ["GET /answer", "llm.classify", "openai.chat", "api.weather"])
+        self.assertEqual({s.trace_id for s in root.spans}, {root.trace_id})
+        self.assertIs(chat.parent, classify)
+        self.assertIs(weather.parent, root)
+        self.assertEqual(weather.attributes, {"use_case": "WEATHER"})
+
+    def test_server_timing_lists_direct_stages(self):
+        with span("GET /answer") as root:
+            with span("llm.classify"):
+                with span("openai.chat"):
+                    pass
+            with span("llm.generate"):
+                pass
+
+        entries = server_timing(root).split(", ")
+        # Nur die Stufen direkt unter dem Request, plus die Gesamtdauer
+        self.assertEqual([entry.split(";")[0] for entry in entries], ["llm.classify", "llm.generate", "total"])
+        self.assertTrue(all(";dur=" in entry for entry in entries))
+
+    def test_failed_span_is_marked_as_error(self):
+        with self.assertRaises(KeyError):
+            with span("GET /answer") as root:
+                with span("api.stocks"):
+                    raise KeyError("Stock-Name")
+
+        failed = root.spans[1]
+        self.assertEqual(failed.status, STATUS_ERROR)
+        self.assertIn("KeyError", failed.status_message)
+        self.assertIsNotNone(root.end_ns)
+
+    def test_otlp_request_format(self):
+        with span("GET /answer", kind=SPAN_KIND_SERVER) as root:
+            with span("api.weather", use_case="WEATHER", items=2):
+                pass
+
+        request = otlp_request(root)
+        spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(len(spans), 2)
+        self.assertEqual(len(spans[0]["traceId"]), 32)
+        self.assertEqual(spans[0]["parentSpanId"], "")
+        self.assertEqual(spans[1]["parentSpanId"], spans[0]["spanId"])
+        self.assertEqual(spans[0]["kind"], SPAN_KIND_SERVER)
+        self.assertIn({"key": "use_case", "value": {"stringValue": "WEATHER"}}, spans[1]["attributes"])
+        self.assertIn({"key": "items", "value": {"intValue": "2"}}, spans[1]["attributes"])
+
+    def test_finished_trace_is_written_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace_file = os.path.join(directory, "traces.jsonl")
+            with patch("api.tracing.TRACE_FILE", trace_file):
+                with span("GET /answer"):
+                    with span("llm.classify"):
+                        pass
+
+            with open(trace_file, encoding="utf-8") as file:
+                lines = file.readlines()
+
+        self.assertEqual(len(lines), 1)
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual([s["name"] for s in spans], ["GET /answer", "llm.classify"])
+
+    async def test_export_does_not_block_the_event_loop(self):
+        with patch("api.tracing.OTLP_ENDPOINT", "http://collector:4318"), \
+                patch("api.tracing.write_trace") as mock_write_trace:
+            with span("GET /answer"):
+                pass
+            mock_write_trace.assert_not_called()
+
+            # Der Export läuft im Hintergrund
+            for task in list(tracing._export_tasks):
+                await task
+        mock_write_trace.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+from datetime import date
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from api.worker import Worker
+
+
+class TestWorker(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.worker = Worker()
+        self.worker.queue = AsyncMock()
+
+    async def test_morning_job_precomputes_summary(self):
+        self.worker.morning_scheduler.precompute_user = AsyncMock()
+        job = {"job_id": 1, "kind": "morning", "username": "user1", "run_key": "2025-04-15", "payload": None, "attempts": 1}
+
+        await self.worker.process(job)
+
+        self.worker.morning_scheduler.precompute_user.assert_awaited_once_with("user1", date(2025, 4, 15), None)
+        self.worker.queue.complete.assert_awaited_once_with(1, 1, None)
+
+    @patch('api.worker.UserSummaryGenerator')
+    async def test_proactivity_job_stores_message(self, MockGenerator):
+        MockGenerator.return_value.get_user_proactivity = AsyncMock(return_value={"response": "Hey!"})
+        job = {"job_id": 2, "kind": "proactivity", "username": "user1", "run_key": "run1", "payload": {"x": 1}, "attempts": 1}
+
+        await self.worker.process(job)
+
+        MockGenerator.return_value.get_user_proactivity.assert_awaited_once_with("user1", {"x": 1})
+        self.worker.queue.complete.assert_awaited_once_with(2, 1, "Hey!")
+
+    @patch('api.worker.UserSummaryGenerator')
+    async def test_failed_job_is_marked_for_retry(self, MockGenerator):
+        MockGenerator.return_value.get_user_proactivity = AsyncMock(side_effect=Exception("LLM down"))
+        job = {"job_id": 3, "kind": "proactivity", "username": "user1", "run_key": "run1", "payload": {}, "attempts": 1}
+
+        await self.worker.process(job)
+
+        self.worker.queue.fail.assert_awaited_once_with(3, 1, "LLM down")
+        self.worker.queue.complete.assert_not_awaited()
+
+    @patch('api.worker.UserSummaryGenerator')
+    async def test_lost_lease_is_logged(self, MockGenerator):
+        MockGenerator.return_value.get_user_proactivity = AsyncMock(return_value={"response": "Hey!"})
+        self.worker.queue.complete.return_value = False
+        job = {"job_id": 4, "kind": "proactivity", "username": "user1", "run_key": "run1", "payload": {}, "attempts": 1}
+
+        with self.assertLogs("api.worker", level="WARNING") as logs:
+            await self.worker.process(job)
+
+        self.assertIn("taken over by another worker", logs.output[0])
+
+    async def test_run_once_with_empty_queue(self):
+        self.worker.queue.claim.return_value = []
+
+        processed = await self.worker.run_once()
+
+        self.assertEqual(processed, 0)
+        self.worker.queue.claim.assert_awaited_once_with(10, ["morning", "proactivity"])
+
+    @patch('api.worker.load_all_preferences', new_callable=AsyncMock)
+    async def test_run_once_preloads_preferences_of_claimed_users(self, mock_load_preferences):
+        jobs = [
+            {"job_id": 1, "kind": "morning", "username": "user1", "run_key": "2025-04-15", "payload": None, "attempts": 1},
+            {"job_id": 2, "kind": "morning", "username": "user2", "run_key": "2025-04-15", "payload": None, "attempts": 1},
+        ]
+        self.worker.queue.claim.return_value = jobs
+        self.worker.process = AsyncMock()
+
+        processed = await self.worker.run_once()
+
+        self.assertEqual(processed, 2)
+        mock_load_preferences.assert_awaited_once_with(["user1", "user2"])
+        self.worker.process.assert_any_await(jobs[1], mock_load_preferences.return_value)
+
+
+if __name__ == '__main__':
+    unittest.main()
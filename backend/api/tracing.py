@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Where finished traces go: an OTLP/HTTP collector (e.g., "http://otel-collector:4318") and/or a file with one
+# OTLP JSON export request per line, the format of the collector's file exporter. Without either, spans are only
+# used for the Server-Timing header.
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+TRACE_FILE = os.getenv("TRACE_FILE")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "everydaypda-api")
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_export_tasks = set()
+
+class Span:
+    """
+    A timed stage of a request. Spans started while another span is active become its children,
+    all spans of a request share the trace of the outermost span.
+    """
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[dict] = None):
+        self.name = name
+        self.parent = parent
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.spans = parent.spans if parent else []
+        self.spans.append(self)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_OK
+        self.status_message = ""
+
+    # Span Duration
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - float: The duration of the span in milliseconds, up to now if it has not ended yet
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    # Convert to OTLP
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - dict: The span in the OTLP JSON encoding
+    def to_otlp(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+# Convert Attribute Value
+#
+# Parameters:
+#   - value: An attribute value, e.g., "WEATHER" or 3
+#
+# Returns:
+#   - dict: The value in the OTLP JSON encoding, e.g., {"stringValue": "WEATHER"}
+def otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+# Trace a Stage
+#
+# Parameters:
+#   - name (str): Name of the stage, e.g., "llm.classify"
+#   - kind (int): OTLP span kind, SPAN_KIND_SERVER for the span of a whole request
+#   - attributes: Attributes of the span, e.g., use_case="WEATHER"
+#
+# Returns:
+#   - Span: The span, ended and (if it is the outermost span) exported when the block is left
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """
+    Time a block as a span of the current trace, or as a new trace if no span is active.
+    """
+    current = Span(name, _current_span.get(), kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = STATUS_ERROR
+        current.status_message = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if current.parent is None:
+            export_trace(current)
+
+# Server-Timing Header
+#
+# Parameters:
+#   - root (Span): The span of the whole request
+#
+# Returns:
+#   - str: The durations of the stages below the request, e.g., "llm.classify;dur=812.4, api.weather;dur=95.0, total;dur=1320.7"
+def server_timing(root: Span) -> str:
+    stages = [
+        f"{stage.name};dur={stage.duration_ms:.1f}"
+        for stage in root.spans if stage.parent is root
+    ]
+    stages.append(f"total;dur={root.duration_ms:.1f}")
+    return ", ".join(stages)
+
+# Build OTLP Export Request
+#
+# Parameters:
+#   - root (Span): The outermost span of the trace
+#
+# Returns:
+#   - dict: An OTLP ExportTraceServiceRequest with all spans of the trace
+def otlp_request(root: Span) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": otlp_value(SERVICE_NAME)}]},
+            "scopeSpans": [{
+                "scope": {"name": "api.tracing"},
+                "spans": [span.to_otlp() for span in root.spans],
+            }],
+        }]
+    }
+
+# Write Trace
+#
+# Parameters:
+#   - request (dict): The OTLP export request of a trace
+#
+# Returns:
+#   - None
+def write_trace(request: dict):
+    """
+    Send a trace to the collector and/or append it to the trace file. Failures are only logged.
+    """
+    try:
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a", encoding="utf-8") as file:
+                file.write(json.dumps(request) + "\n")
+        if OTLP_ENDPOINT:
+            httpx.post(f"{OTLP_ENDPOINT.rstrip('/')}/v1/traces", json=request, timeout=5).raise_for_status()
+    except (OSError, httpx.HTTPError) as e:
+        logger.warning(f"Exporting trace failed: {e}")
+
+# Export Trace
+#
+# Parameters:
+#   - root (Span): The outermost span of a finished trace
+#
+# Returns:
+#   - None
+def export_trace(root: Span):
+    """
+    Export a finished trace in the background when called from the event loop, so requests do not wait for it.
+    """
+    if not (TRACE_FILE or OTLP_ENDPOINT):
+        return
+    request = otlp_request(root)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        write_trace(request)
+        return
+    task = loop.create_task(asyncio.to_thread(write_trace, request))
+    _export_tasks.add(task)
+    task.add_done_callback(_export_tasks.discard)
@@ -5,9 +5,15 @@ import asyncio
 # Append parent directory to sys.path for module imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from llm_fetchers.UseCaseProcessor import UseCaseProcessor
+from llm_fetchers.ChatGPTProcessor import set_observer
 from UseCases import UseCases
 from Informations import Informations
 from api.data_filler import DataFiller
+from api.tracing import span
+from api.metrics import set_use_case, observe_fetcher, observe_openai
+
+# Record the latency and token usage of every OpenAI call in the metrics
+set_observer(observe_openai)
 
 class UseCaseHandler:
     """
@@ -26,8 +32,11 @@ class UseCaseHandler:
     async def get_use_cases_and_info(self, message: str, user_id: str):
         processor = UseCaseProcessor()
         
+        # The OpenAI calls block, so they run in worker threads to keep the event loop free
         # Determine the use cases based on the user's message
-        use_cases = processor.declare_usecase(message)
+        with span("llm.classify"):
+            use_cases = await asyncio.to_thread(processor.declare_usecase, message)
+        set_use_case(",".join(sorted(use_case.name for use_case in UseCases if use_case.value in use_cases)))
         
         # Collect all required information fields for the selected use cases
         needed_info = ", ".join([
@@ -36,22 +45,24 @@ class UseCaseHandler:
         ])
         
         # Extract the required information from the user's message
-        info = processor.get_information(message, needed_info)
+        with span("llm.extract"):
+            info = await asyncio.to_thread(processor.get_information, message, needed_info)
 
-        # Handle specific use cases (e.g., news topics or travel mediums)
-        if 2 in use_cases:  # News use case
-            news_topic_options = ", ".join(Informations.NEWS_CATEGORY.value)
-            news_topic = processor.extract_specific_information(message, news_topic_options)
-            if news_topic:
-                info["News-Topic"] = [news_topic]
-        if 6 in use_cases:  # Travel use case
-            travel_medium_options = ", ".join(Informations.TRAVEL_MEDIUM.value)
-            travel_medium = processor.extract_specific_information(message, travel_medium_options)
-            if travel_medium:
-                info["Transport-Medium"] = [travel_medium]
+            # Handle specific use cases (e.g., news topics or travel mediums)
+            if 2 in use_cases:  # News use case
+                news_topic_options = ", ".join(Informations.NEWS_CATEGORY.value)
+                news_topic = await asyncio.to_thread(processor.extract_specific_information, message, news_topic_options)
+                if news_topic:
+                    info["News-Topic"] = [news_topic]
+            if 6 in use_cases:  # Travel use case
+                travel_medium_options = ", ".join(Informations.TRAVEL_MEDIUM.value)
+                travel_medium = await asyncio.to_thread(processor.extract_specific_information, message, travel_medium_options)
+                if travel_medium:
+                    info["Transport-Medium"] = [travel_medium]
         
         # Fill in any missing values using the DataFiller
-        info = await DataFiller().fill_missing_values(info, user_id)
+        with span("db.fill"):
+            info = await DataFiller().fill_missing_values(info, user_id)
         return use_cases, info
 
     # Call APIs for Use Cases
@@ -79,7 +90,8 @@ class UseCaseHandler:
             args = [info[key] for key in use_case.information_needed]
             
             # Call the use case function and store the result
-            results[use_case.description] = use_case.func(*args)
+            with span(f"api.{use_case.name.lower()}", use_case=use_case.name), observe_fetcher(use_case.name):
+                results[use_case.description] = use_case.func(*args)
         return results
 
     # Generate Response
@@ -91,7 +103,8 @@ class UseCaseHandler:
     # Returns:
     #   - str: A plain-text response in the same language as the user's input
     def get_response(self, message, api_data):
-        return UseCaseProcessor().response(message, api_data)
+        with span("llm.generate"):
+            return UseCaseProcessor().response(message, api_data)
     
 if __name__ == "__main__":
     # Main function for testing the UseCaseHandler
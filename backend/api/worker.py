@@ -0,0 +1,147 @@
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database_utils import load_all_preferences
+from api.job_queue import JobQueue
+from api.morning_scheduler import MorningScheduler, MORNING_JOB
+from api.proactivity_engine import PROACTIVITY_JOB
+from api.summary_generator import UserSummaryGenerator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Time in seconds a worker waits before polling again when the queue is empty
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+
+# Number of jobs a worker claims at once
+BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "10"))
+
+class Worker:
+    """
+    Processes morning and proactivity jobs from the job queue. Several workers
+    (processes and containers) can run next to each other.
+    """
+
+    def __init__(self, concurrency: int = 1, batch_size: int = BATCH_SIZE):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.queue = JobQueue()
+        self.morning_scheduler = MorningScheduler()
+        self.handlers = {
+            MORNING_JOB: self.handle_morning,
+            PROACTIVITY_JOB: self.handle_proactivity,
+        }
+
+    # Handle Morning Job
+    #
+    # Parameters:
+    #   - job (dict): The claimed job, with the day of the summary as run key, e.g., {"username": "user123", "run_key": "2025-04-15"}
+    #   - preferences (dict, optional): Preferences of the claimed users, preloaded with load_all_preferences
+    #
+    # Returns:
+    #   - None (the summary is stored in morning_summaries)
+    async def handle_morning(self, job, preferences=None):
+        await self.morning_scheduler.precompute_user(job["username"], date.fromisoformat(job["run_key"]), preferences)
+
+    # Handle Proactivity Job
+    #
+    # Parameters:
+    #   - job (dict): The claimed job, with the changed stock and news data as payload
+    #   - preferences (dict, optional): Unused, the payload already contains all data
+    #
+    # Returns:
+    #   - str: The generated proactive message
+    async def handle_proactivity(self, job, preferences=None):
+        result = await UserSummaryGenerator().get_user_proactivity(job["username"], job["payload"])
+        return result["response"]
+
+    # Process Job
+    #
+    # Parameters:
+    #   - job (dict): The claimed job
+    #   - preferences (dict, optional): Preferences of the claimed users, preloaded with load_all_preferences
+    #
+    # Returns:
+    #   - None (the job is marked as done, or as failed and retried later)
+    async def process(self, job, preferences=None):
+        try:
+            result = await self.handlers[job["kind"]](job, preferences)
+            owned = await self.queue.complete(job["job_id"], job["attempts"], result)
+        except Exception as e:
+            logger.warning(f"Job {job['job_id']} ({job['kind']} for {job['username']}) failed in attempt {job['attempts']}: {e}")
+            owned = await self.queue.fail(job["job_id"], job["attempts"], str(e))
+        if not owned:
+            logger.warning(f"Job {job['job_id']} was taken over by another worker after its lease expired, result discarded")
+
+    # Run Once
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - int: Number of processed jobs (0 if the queue was empty)
+    async def run_once(self):
+        jobs = await self.queue.claim(self.batch_size, list(self.handlers))
+        if not jobs:
+            return 0
+
+        # One query for the preferences of all claimed users instead of several per user
+        morning_users = [job["username"] for job in jobs if job["kind"] == MORNING_JOB]
+        preferences = await load_all_preferences(morning_users) if morning_users else None
+        for job in jobs:
+            await self.process(job, preferences)
+        return len(jobs)
+
+    # Run Worker
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None (runs until cancelled)
+    async def run(self):
+        async def loop():
+            while True:
+                try:
+                    processed = await self.run_once()
+                except Exception as e:
+                    logger.error(f"Claiming jobs failed: {e}")
+                    processed = 0
+                if not processed:
+                    await asyncio.sleep(POLL_INTERVAL)
+
+        await asyncio.gather(*(loop() for _ in range(self.concurrency)))
+
+
+def run_worker_process(concurrency: int):
+    asyncio.run(Worker(concurrency).run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process morning and proactivity jobs from the job queue.")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")), help="Number of worker processes")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")), help="Number of jobs processed at once per process")
+    args = parser.parse_args(argv)
+
+    if args.processes == 1:
+        run_worker_process(args.concurrency)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker_process, args=(args.concurrency,))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
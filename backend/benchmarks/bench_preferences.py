@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+import asyncpg
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database import DATABASE_URL
+from api.database_utils import USER_PREFERENCES_QUERY, SELECTED_PREFERENCES_QUERY
+from api.migrations import apply_migrations, MIGRATIONS_DIR
+
+INIT_SQL = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'init.sql'))
+
+# Schema the benchmark creates its tables in, so that it never touches the real tables
+BENCH_SCHEMA = "preferences_bench"
+
+# The migration whose indexes are measured; all other migrations are part of the baseline
+INDEX_MIGRATION = "0001_preference_indexes.sql"
+
+# Seed Benchmark Data
+#
+# Parameters:
+#   - conn: Database connection with the benchmark schema on its search path
+#   - users (int): Number of users to create, e.g., 100000
+#
+# Returns:
+#   - None
+async def seed(conn, users: int):
+    """
+    Create the baseline schema from init.sql and all migrations except the index migration, and fill
+    it with users, stocks and news subscriptions.
+    """
+    with open(INIT_SQL, encoding="utf-8") as file:
+        await conn.execute(file.read())
+    baseline_dir = tempfile.mkdtemp()
+    try:
+        for filename in os.listdir(MIGRATIONS_DIR):
+            if filename != INDEX_MIGRATION:
+                shutil.copy(os.path.join(MIGRATIONS_DIR, filename), baseline_dir)
+        await apply_migrations(conn, baseline_dir)
+    finally:
+        shutil.rmtree(baseline_dir)
+    await conn.execute("INSERT INTO stocks (stock_name) SELECT 'Stock ' || i FROM generate_series(1, 500) i")
+    await conn.execute("INSERT INTO news (news_name) SELECT 'topic-' || i FROM generate_series(1, 20) i")
+    await conn.execute(
+        """
+        INSERT INTO users (username, course, cafeteria, city, preferred_transport_medium)
+        SELECT 'user' || i, 'IN22', 'Mensa Central', 'Stuttgart', 'driving-car'
+        FROM generate_series(1, $1) i
+        """,
+        users
+    )
+    await conn.execute(
+        """
+        INSERT INTO user_stocks (u_id, s_id)
+        SELECT u.u_id, (u.u_id * 7 + k * 131) % 500 + 1 FROM users u, generate_series(0, 2) k
+        """
+    )
+    await conn.execute(
+        """
+        INSERT INTO user_news (u_id, n_id)
+        SELECT u.u_id, (u.u_id + k * 7) % 20 + 1 FROM users u, generate_series(0, 1) k
+        """
+    )
+    await conn.execute("ANALYZE")
+
+# Measure Query Latency
+#
+# Parameters:
+#   - conn: Database connection with the benchmark schema on its search path
+#   - query (str): The query to measure
+#   - args (callable): Returns the query arguments for one iteration
+#   - iterations (int): Number of executions, e.g., 200
+#
+# Returns:
+#   - dict: Latency percentiles in milliseconds, e.g., {"p50": 0.4, "p95": 0.9, "mean": 0.5}
+async def measure(conn, query: str, args, iterations: int):
+    """
+    Execute a query repeatedly and return its latency distribution.
+    """
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await conn.fetch(query, *args())
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "mean": statistics.mean(latencies),
+    }
+
+# Run All Queries
+#
+# Parameters:
+#   - conn: Database connection with the benchmark schema on its search path
+#   - users (int): Number of seeded users
+#   - iterations (int): Number of executions per query
+#
+# Returns:
+#   - dict: Latency percentiles per query name
+async def run_queries(conn, users: int, iterations: int):
+    def username():
+        return (f"user{random.randint(1, users)}",)
+
+    def usernames():
+        return ([f"user{random.randint(1, users)}" for _ in range(100)],)
+
+    return {
+        "lookup by username": await measure(conn, "SELECT u_id FROM users WHERE username = $1", username, iterations),
+        "user preferences": await measure(conn, USER_PREFERENCES_QUERY, username, iterations),
+        "preferences of 100 users": await measure(conn, SELECTED_PREFERENCES_QUERY, usernames, max(1, iterations // 10)),
+    }
+
+def print_results(before, after):
+    print(f"{'query':<28}{'before p50':>12}{'before p95':>12}{'after p50':>12}{'after p95':>12}  (ms)")
+    for name in before:
+        print(f"{name:<28}{before[name]['p50']:>12.2f}{before[name]['p95']:>12.2f}{after[name]['p50']:>12.2f}{after[name]['p95']:>12.2f}")
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure preference query latency before and after the schema migrations.")
+    parser.add_argument("--users", type=int, default=100000, help="Number of seeded users")
+    parser.add_argument("--iterations", type=int, default=200, help="Executions per query")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema afterwards")
+    args = parser.parse_args(argv)
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        await conn.execute(f"SET search_path TO {BENCH_SCHEMA}")
+
+        print(f"Seeding {args.users} users ...")
+        await seed(conn, args.users)
+        before = await run_queries(conn, args.users, args.iterations)
+
+        await apply_migrations(conn)
+        await conn.execute("ANALYZE")
+        after = await run_queries(conn, args.users, args.iterations)
+
+        print_results(before, after)
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,321 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+from datetime import date, datetime, timezone, timedelta
+from unittest.mock import patch
+
+import httpx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.upstream_stand_ins import UpstreamStandIns, SERVICES, parse_profile
+
+# Credentials the backend is started with, so that real keys from .env are never used
+STAND_IN_CREDENTIALS = [
+    "OPENAI_API_KEY", "NEWS_API_KEY", "TWELVE_DATA_API_KEY", "WEATHER_API_KEY",
+    "OPENROUTE_API_KEY", "AMADEUS_CLIENT_ID", "AMADEUS_CLIENT_SECRET",
+]
+
+TODAY = date.today().strftime("%d.%m.%Y")
+NEXT_WEEK = (date.today() + timedelta(days=7)).strftime("%d.%m.%Y")
+
+# Messages sent to /answer in turn, one per use case
+ANSWER_MESSAGES = [
+    "Wie wird das Wetter heute?",
+    "Was gibt es Neues?",
+    "Wie stehen meine Aktien?",
+    "Was gibt es heute in der Mensa?",
+    f"Welche Vorlesungen habe ich am {TODAY}?",
+    "Wie lange fahre ich nach Hamburg?",
+    f"Finde mir ein Hotel in Berlin vom {TODAY} bis {NEXT_WEEK}",
+    f"Gibt es am {TODAY} einen Flug nach Hamburg und am {NEXT_WEEK} zurück?",
+]
+
+SCENARIOS = ["answer", "morning", "proactivity"]
+
+STOCK_NAMES = ["Apple", "Tesla", "NVIDIA", "Microsoft", "Amazon", "Alphabet", "Meta", "Netflix", "Intel", "AMD"]
+NEWS_TOPICS = ["business", "entertainment", "general", "health", "science", "sports", "technology"]
+CITIES = ["Stuttgart", "Berlin", "Hamburg", "München", "Köln"]
+
+# Generate Preferences
+#
+# Parameters:
+#   - users (int): Number of users, e.g., 1000
+#   - seed (int): Seed of the random choices, so every run uses the same users
+#
+# Returns:
+#   - dict: Preferences keyed by username, shaped like the rows of fetch_user_preferences
+def generate_preferences(users: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    return {
+        f"user{i}": {
+            "u_id": i,
+            "version": 1,
+            "username": f"user{i}",
+            "course": "IN22",
+            "cafeteria": "Mensa Central",
+            "city": rng.choice(CITIES),
+            "preferred_transport_medium": "driving-car",
+            "stocks": rng.sample(STOCK_NAMES, 2),
+            "news": rng.sample(NEWS_TOPICS, rng.randint(1, 2)),
+        }
+        for i in range(users)
+    }
+
+class InMemoryDatabase:
+    """
+    Replaces the database queries of the proactivity engine and the storage of the morning summaries,
+    so that the scenarios only measure the backend and its upstream calls.
+    """
+
+    def __init__(self, preferences: dict):
+        self.preferences = preferences
+        self.stock_state = {}
+        self.news_state = {}
+        self.morning_summaries = {}
+
+    async def get_subscribed_items(self):
+        stocks = sorted({stock for user in self.preferences.values() for stock in user["stocks"]})
+        news = sorted({topic for user in self.preferences.values() for topic in user["news"]})
+        return stocks, news
+
+    async def iter_preferences(self, *args, **kwargs):
+        for user in self.preferences.values():
+            yield user
+
+    async def get_proactivity_state(self):
+        return dict(self.stock_state), dict(self.news_state)
+
+    async def store_proactivity_state(self, stocks, news):
+        self.stock_state, self.news_state = stocks, news
+
+    async def store_morning_summary(self, username, summary_date, response, data_fetched_at):
+        self.morning_summaries[username] = response
+
+# Get Percentile
+#
+# Parameters:
+#   - values (list[float]): Sorted values, e.g., latencies in milliseconds
+#   - fraction (float): The percentile as a fraction, e.g., 0.95
+#
+# Returns:
+#   - float: The value below which the given fraction of the values lies, 0 for no values
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+# Summarize Scenario
+#
+# Parameters:
+#   - latencies (list[float]): Latency of every operation in seconds
+#   - errors (int): Number of failed operations
+#   - duration (float): Wall-clock duration of the scenario in seconds
+#   - upstream_calls (dict): Calls per upstream service during the scenario, e.g., {"openai": 300}
+#
+# Returns:
+#   - dict: Throughput in operations per second and latency percentiles in milliseconds
+def summarize(latencies, errors: int, duration: float, upstream_calls: dict) -> dict:
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "operations": len(values),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(len(values) / duration, 2) if duration else 0.0,
+        "p50_ms": round(percentile(values, 0.5), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(values[-1], 1) if values else 0.0,
+        "upstream_calls": {service: calls for service, calls in upstream_calls.items() if calls},
+    }
+
+# Run Operations Concurrently
+#
+# Parameters:
+#   - operations (list): Coroutine functions without arguments, one per operation
+#   - concurrency (int): Number of operations running at once, e.g., 20
+#
+# Returns:
+#   - tuple: Latency of every operation in seconds, the number of failed operations and the total duration
+async def run_concurrently(operations, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def timed(operation):
+        nonlocal errors
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                if await operation() is False:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(timed(operation) for operation in operations))
+    return latencies, errors, time.perf_counter() - started_at
+
+# Single Answer Scenario
+#
+# Parameters:
+#   - preferences (dict): Preferences of the simulated users
+#   - requests (int): Number of /answer requests, e.g., 200
+#   - concurrency (int): Number of requests in flight at once, e.g., 20
+#
+# Returns:
+#   - tuple: Latencies, errors and duration, see run_concurrently
+async def answer_scenario(preferences: dict, requests: int, concurrency: int):
+    """
+    Send /answer requests through the whole FastAPI app, the preferences are served from the preference cache.
+    """
+    from api.main import app
+    from api.preference_cache import preference_cache
+
+    preference_cache.max_size = max(preference_cache.max_size, len(preferences))
+    for username, user in preferences.items():
+        preference_cache.set(username, user)
+    usernames = list(preferences)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=None) as client:
+        def request(i):
+            async def send():
+                params = {"message": ANSWER_MESSAGES[i % len(ANSWER_MESSAGES)], "user_id": usernames[i % len(usernames)]}
+                response = await client.get("/answer", params=params)
+                return response.status_code == 200
+            return send
+
+        return await run_concurrently([request(i) for i in range(requests)], concurrency)
+
+# Morning Run Scenario
+#
+# Parameters:
+#   - preferences (dict): Preferences of the simulated users
+#   - database (InMemoryDatabase): Stores the generated summaries
+#   - concurrency (int): Number of summaries generated at once, e.g., 20
+#
+# Returns:
+#   - tuple: Latencies, errors and duration, see run_concurrently
+async def morning_scenario(preferences: dict, database: InMemoryDatabase, concurrency: int):
+    """
+    Precompute the morning summary of every user the way the workers do, sharing one service data cache.
+    """
+    from api.worker import Worker
+
+    worker = Worker()
+    run_key = datetime.now(timezone.utc).date().isoformat()
+
+    def job(username):
+        return lambda: worker.handle_morning({"username": username, "run_key": run_key}, preferences)
+
+    with patch("api.morning_scheduler.store_morning_summary", database.store_morning_summary):
+        return await run_concurrently([job(username) for username in preferences], concurrency)
+
+# Proactivity Tick Scenario
+#
+# Parameters:
+#   - database (InMemoryDatabase): Serves the subscriptions and keeps the state between ticks
+#   - concurrency (int): Number of messages generated at once, e.g., 20
+#
+# Returns:
+#   - tuple: Latencies, errors and duration, see run_concurrently, the first operation is the change detection
+async def proactivity_scenario(database: InMemoryDatabase, concurrency: int):
+    """
+    Detect the changed stocks and news and generate the message of every affected user the way the workers do.
+    """
+    from api.proactivity_engine import ProactivityEngine
+    from api.worker import Worker
+
+    worker = Worker()
+    with patch.multiple(
+        "api.proactivity_engine",
+        get_subscribed_items=database.get_subscribed_items,
+        iter_preferences=database.iter_preferences,
+        get_proactivity_state=database.get_proactivity_state,
+        store_proactivity_state=database.store_proactivity_state,
+    ):
+        started_at = time.perf_counter()
+        engine = ProactivityEngine()
+        changes = await engine.detect_changes()
+        await engine.store_state()
+        detection = time.perf_counter() - started_at
+
+    def job(username, payload):
+        return lambda: worker.handle_proactivity({"username": username, "payload": payload})
+
+    latencies, errors, duration = await run_concurrently([job(*change) for change in changes], concurrency)
+    return [detection] + latencies, errors, detection + duration
+
+def print_results(results: dict):
+    print(f"{'scenario':<14}{'ops':>7}{'errors':>8}{'ops/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, result in results.items():
+        print(
+            f"{name:<14}{result['operations']:>7}{result['errors']:>8}{result['throughput_per_s']:>9.2f}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}"
+        )
+        calls = ", ".join(f"{service} {count}" for service, count in result["upstream_calls"].items())
+        print(f"{'':<14}upstream calls: {calls or 'none'}")
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the backend scenarios against local stand-ins of all upstream APIs.")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"Scenarios to run, all by default ({', '.join(SCENARIOS)})")
+    parser.add_argument("--requests", type=int, default=100, help="Number of /answer requests")
+    parser.add_argument("--users", type=int, default=200, help="Number of simulated users")
+    parser.add_argument("--concurrency", type=int, default=10, help="Operations in flight at once")
+    parser.add_argument("--ticks", type=int, default=1, help="Number of proactivity ticks")
+    parser.add_argument("--profile", action="append", default=[], metavar="SERVICE=LATENCY[:ERROR_RATE]",
+                        help=f"Latency in seconds and error rate of a service, e.g., openai=1.5:0.02 (services: {', '.join(SERVICES)})")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the simulated users and upstream answers")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [scenario for scenario in args.scenarios if scenario not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    try:
+        profiles = dict(parse_profile(spec) for spec in args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stand_ins = UpstreamStandIns(profiles, seed=args.seed)
+    stand_ins.start_in_thread()
+    # The upstream registry reads the base URLs when it is imported, so the backend is only imported below
+    os.environ.update(stand_ins.base_urls)
+    os.environ.update({credential: "stand-in" for credential in STAND_IN_CREDENTIALS})
+    # Per-request info logs of the backend would dominate the measurements
+    logging.disable(logging.INFO)
+
+    preferences = generate_preferences(args.users, args.seed)
+    database = InMemoryDatabase(preferences)
+    results = {}
+    try:
+        for scenario in args.scenarios or SCENARIOS:
+            for tick in range(args.ticks if scenario == "proactivity" else 1):
+                calls_before = dict(stand_ins.calls)
+                if scenario == "answer":
+                    outcome = await answer_scenario(preferences, args.requests, args.concurrency)
+                elif scenario == "morning":
+                    outcome = await morning_scenario(preferences, database, args.concurrency)
+                else:
+                    outcome = await proactivity_scenario(database, args.concurrency)
+                calls = {service: stand_ins.calls[service] - calls_before[service] for service in SERVICES}
+                name = f"{scenario} {tick + 1}" if args.ticks > 1 and scenario == "proactivity" else scenario
+                results[name] = summarize(*outcome, calls)
+    finally:
+        stand_ins.stop_thread()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,409 @@
+import re
+import json
+import time
+import random
+import asyncio
+import itertools
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qs
+
+# Services the stand-in serves, each below its own path prefix, with the environment variable of its base URL
+SERVICES = {
+    "newsapi": "NEWS_API_URL",
+    "twelvedata": "TWELVE_DATA_URL",
+    "weatherapi": "WEATHER_API_URL",
+    "openmensa": "OPENMENSA_URL",
+    "rapla": "RAPLA_URL",
+    "openroute": "OPENROUTE_URL",
+    "nominatim": "NOMINATIM_URL",
+    "hotellook": "HOTELLOOK_URL",
+    "amadeus": "AMADEUS_URL",
+    "openai": "OPENAI_BASE_URL",
+}
+
+# Typical latency of the real services in seconds, used unless a profile is given
+DEFAULT_LATENCY = {
+    "newsapi": 0.15,
+    "twelvedata": 0.1,
+    "weatherapi": 0.08,
+    "openmensa": 0.2,
+    "rapla": 0.3,
+    "openroute": 0.15,
+    "nominatim": 0.1,
+    "hotellook": 0.25,
+    "amadeus": 0.4,
+    "openai": 0.8,
+}
+
+# Keywords the OpenAI stand-in uses to classify a message, by use case id
+USE_CASE_KEYWORDS = {
+    1: ("aktie", "stock", "börse"),
+    2: ("news", "neues", "nachrichten"),
+    3: ("wetter", "weather"),
+    4: ("mensa", "essen", "kantine"),
+    5: ("vorlesung", "stundenplan", "rapla"),
+    6: ("fahr", "weg", "route"),
+    7: ("hotel",),
+    8: ("flug", "flight"),
+}
+
+# Values the OpenAI stand-in extracts for the required fields, fields it does not know stay empty
+EXTRACTED_VALUES = {
+    "Stock-Name": ["Apple"],
+    "City": ["Stuttgart"],
+    "Canteen-Name": ["Mensa Central"],
+    "Start-Location": ["Stuttgart"],
+    "Destination-Location": ["Hamburg"],
+    "Hotel-Destination": ["Berlin"],
+    "Start-Airport": ["Stuttgart"],
+    "Destination-Airport": ["Hamburg"],
+}
+
+# Profile Upstream Service
+#
+# Parameters:
+#   - latency (float): Mean latency of a call in seconds, e.g., 0.1
+#   - jitter (float): Latency varies uniformly by up to this fraction of the mean, e.g., 0.5
+#   - error_rate (float): Fraction of calls answered with an HTTP 500, e.g., 0.01
+#
+# Returns:
+#   - dict: The profile of the service
+def profile(latency: float, jitter: float = 0.5, error_rate: float = 0.0) -> dict:
+    return {"latency": latency, "jitter": jitter, "error_rate": error_rate}
+
+# Parse Profile
+#
+# Parameters:
+#   - spec (str): Service, latency in seconds and optionally the error rate, e.g., "openai=1.5:0.02"
+#
+# Returns:
+#   - tuple: The service name and its profile, e.g., ("openai", {"latency": 1.5, "jitter": 0.5, "error_rate": 0.02})
+#
+# Raises:
+#   - ValueError: If the service is unknown or the numbers cannot be parsed
+def parse_profile(spec: str):
+    service, _, values = spec.partition("=")
+    if service not in SERVICES:
+        raise ValueError(f"Unknown service {service!r}, expected one of {', '.join(SERVICES)}")
+    latency, _, error_rate = values.partition(":")
+    return service, profile(float(latency), error_rate=float(error_rate or 0))
+
+class UpstreamStandIns:
+    """
+    A local HTTP server answering like NewsAPI, Twelve Data, WeatherAPI, OpenMensa, Rapla, OpenRouteService,
+    Nominatim, Hotellook, Amadeus and OpenAI, with a configurable latency and error rate per service.
+    Every service is served below its own path prefix, see base_urls.
+    """
+
+    def __init__(self, profiles=None, seed: int = 0):
+        self.profiles = {service: profile(latency) for service, latency in DEFAULT_LATENCY.items()}
+        self.profiles.update(profiles or {})
+        self.random = random.Random(seed)
+        self.calls = {service: 0 for service in SERVICES}
+        self.errors = {service: 0 for service in SERVICES}
+        self.server = None
+        self.port = None
+        self._ids = itertools.count(1)
+        self._loop = None
+        self._thread = None
+        self._connections = set()
+
+    # Base URLs
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - dict: The base URL of every service keyed by the environment variable the backend reads it from,
+    #           e.g., {"NEWS_API_URL": "http://127.0.0.1:8123/newsapi", ...}
+    @property
+    def base_urls(self) -> dict:
+        base = f"http://127.0.0.1:{self.port}"
+        urls = {variable: f"{base}/{service}" for service, variable in SERVICES.items()}
+        urls["OPENAI_BASE_URL"] += "/v1"
+        return urls
+
+    # Start Server
+    #
+    # Parameters:
+    #   - host (str): Address to listen on, e.g., "127.0.0.1"
+    #   - port (int): Port to listen on, 0 for a free port
+    #
+    # Returns:
+    #   - None
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = await asyncio.start_server(self._handle_connection, host, port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    # Stop Server
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            # Clients keep idle connections open, which would otherwise outlive the server
+            for connection in list(self._connections):
+                connection.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    # Start Server in a Thread
+    #
+    # Parameters:
+    #   - host (str): Address to listen on, e.g., "127.0.0.1"
+    #   - port (int): Port to listen on, 0 for a free port
+    #
+    # Returns:
+    #   - None
+    #
+    # Notes:
+    #   - The fetchers and the OpenAI calls block the event loop of the code under test, so the stand-ins
+    #     need their own event loop to keep answering.
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="upstream-stand-ins", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(host, port), self._loop).result()
+
+    # Stop Server Thread
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None
+    def stop_thread(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+
+    # Serve Connection
+    #
+    # Parameters:
+    #   - reader (asyncio.StreamReader): Reads the requests of the connection
+    #   - writer (asyncio.StreamWriter): Writes the responses
+    #
+    # Returns:
+    #   - None
+    async def _handle_connection(self, reader, writer):
+        """
+        Serve the HTTP/1.1 requests of one connection until the client closes it.
+        """
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, content_type, content = await self._route(method, target, body)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+
+    # Route Request
+    #
+    # Parameters:
+    #   - method (str): HTTP method, e.g., "GET"
+    #   - target (str): Path and query of the request, e.g., "/weatherapi/v1/forecast.json?q=Stuttgart"
+    #   - body (bytes): Body of the request
+    #
+    # Returns:
+    #   - tuple: Status line, content type and body of the response
+    async def _route(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        service, _, path = url.path.lstrip("/").partition("/")
+        if service not in SERVICES:
+            return "404 Not Found", "application/json", b'{"error": "unknown service"}'
+
+        self.calls[service] += 1
+        settings = self.profiles[service]
+        latency = settings["latency"] * (1 + self.random.uniform(-settings["jitter"], settings["jitter"]))
+        if latency > 0:
+            await asyncio.sleep(latency)
+        if self.random.random() < settings["error_rate"]:
+            self.errors[service] += 1
+            return "500 Internal Server Error", "application/json", b'{"error": {"message": "stand-in error"}}'
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        result = getattr(self, f"_{service}")(f"/{path}", params, body)
+        if isinstance(result, str):
+            return "200 OK", "text/calendar", result.encode()
+        return "200 OK", "application/json", json.dumps(result).encode()
+
+    def _newsapi(self, path: str, params: dict, body: bytes):
+        article_id = next(self._ids)
+        return {
+            "status": "ok",
+            "totalResults": 1,
+            "articles": [{
+                "title": f"{params.get('category', 'general').capitalize()} headline {article_id}",
+                "url": f"https://news.example/{article_id}",
+                "publishedAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }],
+        }
+
+    def _twelvedata(self, path: str, params: dict, body: bytes):
+        symbol = params.get("symbol", "AAPL")
+        if path == "/symbol_search":
+            return {"data": [{"symbol": symbol[:4].upper(), "exchange": "NASDAQ"}]}
+        if path == "/time_series":
+            minute = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:00")
+            return {"values": [{"datetime": minute, "close": f"{self.random.uniform(50, 500):.2f}"}]}
+        return {"symbol": symbol, "change": f"{self.random.uniform(-3, 3):.2f}"}
+
+    def _weatherapi(self, path: str, params: dict, body: bytes):
+        temperature = round(self.random.uniform(-5, 30), 1)
+        return {
+            "location": {"name": params.get("q", "")},
+            "current": {"temp_c": temperature, "feelslike_c": temperature - 1},
+            "forecast": {"forecastday": [{"day": {"maxtemp_c": temperature + 4, "mintemp_c": temperature - 6}}]},
+        }
+
+    def _openmensa(self, path: str, params: dict, body: bytes):
+        if path == "/api/v2/canteens":
+            if params.get("page", "1") != "1":
+                return []
+            return [
+                {"id": 1, "name": "Mensa Central", "city": "Stuttgart"},
+                {"id": 2, "name": "Mensa Hohenheim", "city": "Stuttgart"},
+            ]
+        return [
+            {"name": "Linsen mit Spätzle", "category": "Hauptgericht", "prices": {"students": 3.2}},
+            {"name": "Gemüsecurry", "category": "Vegetarisch", "prices": {"students": 2.9}},
+            {"name": "Salatbuffet", "category": "Beilage", "prices": {"students": 1.5}},
+        ]
+
+    def _rapla(self, path: str, params: dict, body: bytes):
+        today = datetime.now(timezone.utc).strftime("%Y%m%d")
+        events = [("Mathematik", "0830", "1000", "A 1.01"), ("Programmieren", "1015", "1145", "B 2.03")]
+        lines = ["BEGIN:VCALENDAR"]
+        for summary, start, end, location in events:
+            lines += [
+                "BEGIN:VEVENT",
+                f"DTSTAMP:{today}T060000Z",
+                f"SUMMARY:{summary}",
+                f"DTSTART;TZID=Europe/Berlin:{today}T{start}00",
+                f"DTEND;TZID=Europe/Berlin:{today}T{end}00",
+                f"LOCATION:{location}",
+                "END:VEVENT",
+            ]
+        lines.append("END:VCALENDAR")
+        return "\r\n".join(lines)
+
+    def _openroute(self, path: str, params: dict, body: bytes):
+        distance = self.random.uniform(5000, 600000)
+        return {"features": [{"properties": {"segments": [{"distance": distance, "duration": distance / 25}]}}]}
+
+    def _nominatim(self, path: str, params: dict, body: bytes):
+        return [{
+            "lat": f"{self.random.uniform(47, 55):.5f}",
+            "lon": f"{self.random.uniform(6, 15):.5f}",
+            "display_name": params.get("q", ""),
+        }]
+
+    def _hotellook(self, path: str, params: dict, body: bytes):
+        return [
+            {"hotelName": f"Hotel {params.get('location', '')} {i}", "priceFrom": round(self.random.uniform(60, 250), 2), "stars": i + 2}
+            for i in range(3)
+        ]
+
+    def _amadeus(self, path: str, params: dict, body: bytes):
+        if path == "/v1/security/oauth2/token":
+            return {"access_token": f"token-{next(self._ids)}", "expires_in": 1799}
+        if path == "/v1/reference-data/locations":
+            return {"data": [{"iataCode": params.get("keyword", "XXX")[:3].upper()}]}
+        date = params.get("departureDate", "2025-01-01")
+        return {"data": [
+            {
+                "itineraries": [{"segments": [{
+                    "carrierCode": "LH",
+                    "departure": {"at": f"{date}T{7 + i * 3:02d}:00:00"},
+                    "arrival": {"at": f"{date}T{8 + i * 3:02d}:10:00"},
+                }]}],
+                "price": {"grandTotal": f"{self.random.uniform(80, 400):.2f}"},
+            }
+            for i in range(3)
+        ]}
+
+    def _openai(self, path: str, params: dict, body: bytes):
+        request = json.loads(body or b"{}")
+        messages = request.get("messages", [])
+        user_input = messages[-1]["content"] if messages else ""
+        schema = request.get("response_format", {}).get("json_schema", {}).get("name")
+        if schema is None:
+            content = "Hier ist deine Zusammenfassung: alles im grünen Bereich."
+        else:
+            content = json.dumps(self._openai_structured(schema, user_input, messages[0]["content"]))
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{next(self._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    # Answer Structured Completion
+    #
+    # Parameters:
+    #   - schema (str): Name of the requested schema, e.g., "UseCaseSelection"
+    #   - user_input (str): The message of the user, e.g., "Wie wird das Wetter?"
+    #   - context (str): The system prompt, which lists the required fields for extractions
+    #
+    # Returns:
+    #   - dict: An answer matching the schema of UseCaseProcessor
+    def _openai_structured(self, schema: str, user_input: str, context: str) -> dict:
+        text = user_input.lower()
+        if schema == "UseCaseSelection":
+            return {"use_case_ids": [
+                use_case for use_case, keywords in USE_CASE_KEYWORDS.items()
+                if any(keyword in text for keyword in keywords)
+            ]}
+        if schema == "ExtractedInformation":
+            match = re.search(r"required fields: (.*?)\. Here's", context)
+            fields = [field.strip() for field in match.group(1).split(",")] if match else []
+            # Dates are taken from the message in order, e.g., check-in before check-out
+            dates = iter(re.findall(r"\d{1,2}\.\d{1,2}\.\d{4}", user_input))
+            return {"info": {
+                field: [next(dates, "")] if field.endswith("Date") else EXTRACTED_VALUES.get(field, [""])
+                for field in fields if field
+            }}
+        # UseCaseInformation: one of the listed news categories or transport media
+        return {"info": "foot-walking" if "foot-walking" in context else "Business"}
@@ -0,0 +1,63 @@
+-- Relink users from duplicate stocks to the oldest stock with the same name, then remove the duplicates
+UPDATE user_stocks us
+SET s_id = d.keep_id
+FROM (SELECT s_id, MIN(s_id) OVER (PARTITION BY stock_name) AS keep_id FROM stocks) d
+WHERE us.s_id = d.s_id AND d.s_id <> d.keep_id;
+
+DELETE FROM stocks s USING stocks k
+WHERE s.stock_name = k.stock_name AND s.s_id > k.s_id;
+
+-- Relink users from duplicate news categories the same way
+UPDATE user_news un
+SET n_id = d.keep_id
+FROM (SELECT n_id, MIN(n_id) OVER (PARTITION BY news_name) AS keep_id FROM news) d
+WHERE un.n_id = d.n_id AND d.n_id <> d.keep_id;
+
+DELETE FROM news n USING news k
+WHERE n.news_name = k.news_name AND n.n_id > k.n_id;
+
+-- Duplicate usernames belong to different accounts and cannot be merged automatically:
+-- stop the migration and report them so that they are resolved by hand
+DO $$
+DECLARE
+    duplicates TEXT;
+BEGIN
+    SELECT string_agg(format('%s (%s users)', username, users), ', ' ORDER BY username)
+    INTO duplicates
+    FROM (SELECT username, COUNT(*) AS users FROM users GROUP BY username HAVING COUNT(*) > 1) d;
+
+    IF duplicates IS NOT NULL THEN
+        RAISE EXCEPTION 'Duplicate usernames, resolve them before migrating: %', duplicates;
+    END IF;
+END
+$$;
+
+-- Unique names, covering the id so that lookups by name are index-only scans
+CREATE UNIQUE INDEX users_username_key ON users (username) INCLUDE (u_id);
+CREATE UNIQUE INDEX stocks_stock_name_key ON stocks (stock_name) INCLUDE (s_id);
+CREATE UNIQUE INDEX news_news_name_key ON news (news_name) INCLUDE (n_id);
+
+-- Covering indexes for resolving the names of a user's stocks and news in the aggregation queries
+CREATE INDEX stocks_s_id_name_idx ON stocks (s_id) INCLUDE (stock_name);
+CREATE INDEX news_n_id_name_idx ON news (n_id) INCLUDE (news_name);
+
+-- Link tables: drop incomplete and duplicate links and replace the surrogate key with (user, item)
+DELETE FROM user_stocks WHERE u_id IS NULL OR s_id IS NULL;
+DELETE FROM user_stocks a USING user_stocks b
+WHERE a.u_id = b.u_id AND a.s_id = b.s_id AND a.id > b.id;
+ALTER TABLE user_stocks DROP CONSTRAINT user_stocks_pkey;
+ALTER TABLE user_stocks DROP COLUMN id;
+ALTER TABLE user_stocks ADD PRIMARY KEY (u_id, s_id);
+
+DELETE FROM user_news WHERE u_id IS NULL OR n_id IS NULL
+    OR u_id NOT IN (SELECT u_id FROM users);
+DELETE FROM user_news a USING user_news b
+WHERE a.u_id = b.u_id AND a.n_id = b.n_id AND a.id > b.id;
+ALTER TABLE user_news DROP CONSTRAINT user_news_pkey;
+ALTER TABLE user_news DROP COLUMN id;
+ALTER TABLE user_news ADD PRIMARY KEY (u_id, n_id);
+ALTER TABLE user_news ADD FOREIGN KEY (u_id) REFERENCES users(u_id) ON DELETE CASCADE;
+
+-- Reverse lookups from a stock or category to its subscribers
+CREATE INDEX user_stocks_s_id_idx ON user_stocks (s_id, u_id);
+CREATE INDEX user_news_n_id_idx ON user_news (n_id, u_id);
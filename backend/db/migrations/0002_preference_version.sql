@@ -0,0 +1,2 @@
+-- Version of a user's preferences, bumped on every update and used as ETag of GET /preferences/{username}
+ALTER TABLE users ADD COLUMN version BIGINT NOT NULL DEFAULT 1;
@@ -0,0 +1,9 @@
+-- Precomputed morning summaries (one per user, replaced every day)
+CREATE TABLE IF NOT EXISTS morning_summaries (
+    u_id INT PRIMARY KEY,
+    summary_date DATE NOT NULL,
+    response TEXT NOT NULL,
+    data_fetched_at TIMESTAMPTZ NOT NULL,
+    generated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    FOREIGN KEY (u_id) REFERENCES users(u_id) ON DELETE CASCADE
+);
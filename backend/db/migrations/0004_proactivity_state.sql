@@ -0,0 +1,15 @@
+-- Last seen quote per stock, used to detect changes between proactivity runs
+CREATE TABLE IF NOT EXISTS proactivity_stock_state (
+    stock_name VARCHAR(100) PRIMARY KEY,
+    quote_timestamp VARCHAR(50),
+    price DOUBLE PRECISION,
+    notified_price DOUBLE PRECISION,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Already seen article ids per news category
+CREATE TABLE IF NOT EXISTS proactivity_news_state (
+    news_name VARCHAR(255) PRIMARY KEY,
+    article_ids TEXT[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,21 @@
+-- Job queue for morning and proactivity generation (one job per kind, user and run)
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    username VARCHAR(100) NOT NULL,
+    run_key VARCHAR(100) NOT NULL,
+    payload JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 5,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_until TIMESTAMPTZ,
+    result TEXT,
+    last_error TEXT,
+    delivered_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (kind, username, run_key)
+);
+
+CREATE INDEX IF NOT EXISTS jobs_claim_idx ON jobs (status, run_after);
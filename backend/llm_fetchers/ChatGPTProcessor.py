@@ -1,10 +1,42 @@
 import openai
 import os
-from dotenv import load_dotenv
+import sys
+import httpx
+from contextlib import nullcontext
 from pydantic import BaseModel
-from typing import Type
+from typing import Callable, Optional, Type
 from openai import OpenAI
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from service_fetchers.upstreams import upstreams
+
+# Model used for all completions
+MODEL = "gpt-4o-mini"
+
+# Observer every API call runs in, see set_observer
+_observer = None
+
+
+def set_observer(observer: Optional[Callable]):
+    """
+    Register an observer for the API calls, e.g. to record their latency and token usage.
+
+    :param observer: Called with the method name and the model for every call, e.g. ("process_input", "gpt-4o-mini"),
+                     it returns a context manager the call runs in that yields a dict the response is stored
+                     in under "response". None removes the observer.
+    """
+    global _observer
+    _observer = observer
+
+
+def _observe(operation: str):
+    """
+    Context manager for one API call, using the registered observer if there is one.
+    """
+    if _observer is None:
+        return nullcontext({"response": None})
+    return _observer(operation, MODEL)
+
 
 class ChatGPTProcessor:
     """
@@ -22,23 +54,29 @@ class ChatGPTProcessor:
 
     def __init__(self):
         """
-        Initialize the ChatGPTProcessor by loading the OpenAI API key.
+        Initialize the ChatGPTProcessor with the OpenAI settings of the upstream registry.
         Prevent reinitialization if the instance is already initialized.
         """
         if hasattr(self, "_initialized") and self._initialized:
             # Already initialized, so skip reinit.
             return
-        # Define the base directory relative to current file location.
-        BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        # Build path to the .env file.
-        env_path = os.path.join(BASE_DIR, ".env")
-        load_dotenv(env_path)
-        # Retrieve OpenAI API key from environment variables.
-        api_key = os.getenv("OPENAI_API_KEY")
+        self.upstream = upstreams["openai"]
+        # Retrieve OpenAI API key from the upstream registry.
+        api_key = self.upstream.credentials["api_key"]
         if not api_key:
             raise Exception("OpenAI API key not found. Please set in .env file.")
         # Set the global OpenAI API key.
         openai.api_key = api_key
+        # One client for all calls, so connections to the API are reused.
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=self.upstream.base_url,
+            timeout=self.upstream.timeout,
+            http_client=httpx.Client(limits=httpx.Limits(
+                max_connections=self.upstream.pool_size,
+                max_keepalive_connections=self.upstream.pool_size
+            ))
+        )
         self._initialized = True
 
     def process_input(self, user_input: str) -> str:
@@ -48,13 +86,14 @@ class ChatGPTProcessor:
         :param user_input: The input string from the user.
         :return: The response content from the model as a string.
         """
-        client = OpenAI()
         try:
-            response = client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": user_input}],
-                max_tokens=400
-            )
+            self.upstream.limiter.wait()
+            with _observe("process_input") as call:
+                response = call["response"] = self.client.beta.chat.completions.parse(
+                    model=MODEL,
+                    messages=[{"role": "user", "content": user_input}],
+                    max_tokens=400
+                )
             # Return the content of the first message in the response.
             return response.choices[0].message.content
         except Exception as e:
@@ -71,22 +110,23 @@ class ChatGPTProcessor:
         :param schema: Pydantic BaseModel schema to validate the response.
         :return: Instance of the schema with parsed data from the response.
         """
-        client = OpenAI()
         try:
-            response = client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": context},
-                    {"role": "user", "content": user_input}
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": schema.__name__,
-                        "schema": schema.model_json_schema()
+            self.upstream.limiter.wait()
+            with _observe("process_input_with_context") as call:
+                response = call["response"] = self.client.beta.chat.completions.parse(
+                    model=MODEL,
+                    messages=[
+                        {"role": "system", "content": context},
+                        {"role": "user", "content": user_input}
+                    ],
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": schema.__name__,
+                            "schema": schema.model_json_schema()
+                        }
                     }
-                }
-            )
+                )
             parsed_response = response.choices[0].message.parsed
             if not parsed_response:
                 # Fallback: use manual parsing if parsed response is empty.
@@ -1,6 +1,7 @@
 import unittest
+from contextlib import contextmanager
 from unittest.mock import patch, MagicMock
-from ChatGPTProcessor import ChatGPTProcessor
+from ChatGPTProcessor import ChatGPTProcessor, set_observer
 
 class TestChatGPTProcessor(unittest.TestCase):
 
@@ -45,5 +46,26 @@ class TestChatGPTProcessor(unittest.TestCase):
             processor.process_input("Test message")
         self.assertIn("Error processing input", str(context.exception))
 
+    @patch("ChatGPTProcessor.OpenAI")
+    def test_process_input_runs_in_observer(self, mock_openai):
+        dummy_response = MagicMock()
+        dummy_response.choices = [MagicMock(message=MagicMock(content="Test response"))]
+        mock_openai.return_value.beta.chat.completions.parse.return_value = dummy_response
+        observed = []
+
+        @contextmanager
+        def observer(operation, model):
+            call = {"response": None}
+            yield call
+            observed.append((operation, model, call["response"]))
+
+        set_observer(observer)
+        try:
+            ChatGPTProcessor().process_input("Test message")
+        finally:
+            set_observer(None)
+
+        self.assertEqual(observed, [("process_input", "gpt-4o-mini", dummy_response)])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -30,6 +30,8 @@ class TestUseCaseProcessor(unittest.TestCase):
     def setUp(self):
         # Reset the singleton instance in ChatGPTProcessor used by UseCaseProcessor
         ChatGPTProcessor._instance = None
+        # The singleton of the subclass holds the OpenAI client created with the mock of its test
+        UseCaseProcessor._instance = None
 
     def test_parse_response_failure(self):
         processor = UseCaseProcessor()
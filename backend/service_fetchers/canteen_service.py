@@ -1,6 +1,8 @@
-import requests
 import time
 import difflib
+from .upstreams import upstreams
+
+OPENMENSA = upstreams["openmensa"]
 
 # Canteen Info (OpenMensa API)
 #
@@ -42,12 +44,11 @@ def get_canteen_info(canteen_names):
 
         return best_match
 
-    url = "https://openmensa.org/api/v2/canteens"
     page = 1
     candidates = {}
 
     while True:
-        response = requests.get(url, params={"page": page})
+        response = OPENMENSA.get("/api/v2/canteens", params={"page": page})
         if response.status_code != 200:
             return {"error": f"Fehler beim Laden der Kantinen: {response.status_code}"}
 
@@ -77,8 +78,7 @@ def get_canteen_info(canteen_names):
 
         date = time.strftime("%Y-%m-%d")  # Todays date with format YYYY-MM-DD
 
-        url = f"https://openmensa.org/api/v2/canteens/{canteen_id}/days/{date}/meals"
-        response = requests.get(url)
+        response = OPENMENSA.get(f"/api/v2/canteens/{canteen_id}/days/{date}/meals")
 
         if response.status_code != 200:
             all_menus[canteen_name] = {"error": f"Fehler beim Abrufen: {response.status_code}"}
@@ -1,14 +1,7 @@
-import requests
-import os
-from dotenv import load_dotenv
 from .helpers import is_valid_date
+from .upstreams import upstreams
 
-# Load path to .env file and retrieve API keys
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-env_path = os.path.join(BASE_DIR, ".env")
-load_dotenv(env_path)
-AMADEUS_CLIENT_ID = os.getenv("AMADEUS_CLIENT_ID")
-AMADEUS_CLIENT_SECRET = os.getenv("AMADEUS_CLIENT_SECRET")
+AMADEUS = upstreams["amadeus"]
 
 # Flight Search (Amadeus API)
 #
@@ -22,21 +15,19 @@ AMADEUS_CLIENT_SECRET = os.getenv("AMADEUS_CLIENT_SECRET")
 #   - dict: Contains flight details (max. 3 flights) or error message
 def get_flights(origin_city, destination_city, departure_date, return_date=None):
     def get_access_token(): # Obtain OAuth2 token from Amadeus API.
-        url = "https://test.api.amadeus.com/v1/security/oauth2/token"
         payload = {
             "grant_type": "client_credentials",
-            "client_id": AMADEUS_CLIENT_ID,
-            "client_secret": AMADEUS_CLIENT_SECRET
+            "client_id": AMADEUS.credentials["client_id"],
+            "client_secret": AMADEUS.credentials["client_secret"]
         }
-        response = requests.post(url, data=payload)
+        response = AMADEUS.post("/v1/security/oauth2/token", data=payload)
         response.raise_for_status()
         return response.json().get("access_token")
 
     def city_to_iata(city_name, token): # Resolve city name to IATA code via Amadeus location API.
-        url = "https://test.api.amadeus.com/v1/reference-data/locations"
         params = {"keyword": city_name, "subType": "AIRPORT"}
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(url, headers=headers, params=params)
+        response = AMADEUS.get("/v1/reference-data/locations", headers=headers, params=params)
 
         response.raise_for_status()
         data = response.json()
@@ -58,7 +49,6 @@ def get_flights(origin_city, destination_city, departure_date, return_date=None)
     if return_date:
         return_date = is_valid_date(return_date[0])
 
-    url = "https://test.api.amadeus.com/v2/shopping/flight-offers"
     params = {
         "originLocationCode": origin_iata,
         "destinationLocationCode": destination_iata,
@@ -72,7 +62,7 @@ def get_flights(origin_city, destination_city, departure_date, return_date=None)
         params["returnDate"] = return_date
 
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers, params=params)
+    response = AMADEUS.get("/v2/shopping/flight-offers", headers=headers, params=params)
 
     if response.status_code != 200:
         return {
@@ -1,5 +1,7 @@
-import requests
 from .helpers import is_valid_date
+from .upstreams import upstreams
+
+HOTELLOOK = upstreams["hotellook"]
 
 # Hotel Search (Hotellook)
 #
@@ -19,7 +21,6 @@ def get_hotels(city_list, checkin_list, checkout_list):
     check_in = is_valid_date(checkin_list[0])
     check_out = is_valid_date(checkout_list[0])
 
-    url = "https://engine.hotellook.com/api/v2/cache.json"
     params = {
         "location": city,
         "currency": "eur",
@@ -28,7 +29,7 @@ def get_hotels(city_list, checkin_list, checkout_list):
         "limit": 3
     }
 
-    response = requests.get(url, params=params)
+    response = HOTELLOOK.get("/api/v2/cache.json", params=params)
     hotel_data = response.json()
 
     if isinstance(hotel_data, dict) and hotel_data.get("errorCode") == 2:
@@ -1,12 +1,6 @@
-import requests
-import os
-from dotenv import load_dotenv
+from .upstreams import upstreams
 
-# Load path to .env file and retrieve API keys
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-env_path = os.path.join(BASE_DIR, ".env")
-load_dotenv(env_path)
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+NEWS_API = upstreams["newsapi"]
 
 # News (NewsAPI)
 #
@@ -23,11 +17,8 @@ def get_news(news_topics):
     news = {}
 
     for news_topic in news_topics:
-        url = (
-            f"https://newsapi.org/v2/top-headlines"
-            f"?category={news_topic}&pageSize=1&apiKey={NEWS_API_KEY}"
-        )
-        response = requests.get(url)
+        params = {"category": news_topic, "pageSize": 1, "apiKey": NEWS_API.credentials["api_key"]}
+        response = NEWS_API.get("/v2/top-headlines", params=params)
         articles = response.json().get("articles", [])
 
         if response.json().get("totalResults") == 0:
@@ -45,9 +36,3 @@ def get_news(news_topics):
             })
 
     return news
-
-if __name__ == "__main__":
-    # Example usage
-    news_topics = ["Business", "Technology"]
-    news_data = get_news(news_topics)
-    print(news_data)
\ No newline at end of file
@@ -1,5 +1,7 @@
-import requests
 from .helpers import is_valid_date
+from .upstreams import upstreams
+
+RAPLA = upstreams["rapla"]
 
 # Schedule (Rapla API)
 #
@@ -12,12 +14,8 @@ from .helpers import is_valid_date
 #     - "end" (str): Event end time in "HH:MM" format
 #     - "location" (str): Event location
 def get_rapla_schedule(dates):
-    url = (
-        "http://rapla.satoqz.net/rapla/internal_calendar?"
-        "key=6Q0QSbNtpyeYPKQhnGFTaEN6AggaPdGgCFyhd5ANmjydX8WyDjUfLBh4YjDgat2dJd8as6Az5GGmQilBwJydDTQpeHfV6bTghpX2dlRU6RU5QsAKr6ARjgRj_BxZmmhVA3Tk_bSK4acN3oO7a7PkNAHTfszb0OA4_JMp8zdoYDY"
-        "&salt=648736798"
-    )
-    response = requests.get(url)
+    params = {"key": RAPLA.credentials["key"], "salt": RAPLA.credentials["salt"]}
+    response = RAPLA.get("/rapla/internal_calendar", params=params)
     ics_file = response.text
 
     current_event = {}
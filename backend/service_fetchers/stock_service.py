@@ -1,12 +1,6 @@
-import requests
-import os
-from dotenv import load_dotenv
+from .upstreams import upstreams
 
-# Load path to .env file
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-env_path = os.path.join(BASE_DIR, ".env")
-load_dotenv(env_path)
-TWELVE_DATA_API_KEY = os.getenv("TWELVE_DATA_API_KEY")        
+TWELVE_DATA = upstreams["twelvedata"]
 
 # Stocks (Twelve Data)
 #
@@ -20,13 +14,11 @@ TWELVE_DATA_API_KEY = os.getenv("TWELVE_DATA_API_KEY")
 #     - "changeFrom1hour" (str): Price change from one hour ago
 def get_stock_price(stock_names):
     stocks = {}
+    api_key = TWELVE_DATA.credentials["api_key"]
 
     for stock_name in stock_names:
         # Lookup ticker symbol by company name
-        search_url = (
-            f"https://api.twelvedata.com/symbol_search?symbol={stock_name}&apikey={TWELVE_DATA_API_KEY}"
-        )
-        response = requests.get(search_url)
+        response = TWELVE_DATA.get("/symbol_search", params={"symbol": stock_name, "apikey": api_key})
         datas = response.json()
 
         if not datas.get("data"):
@@ -40,19 +32,11 @@ def get_stock_price(stock_names):
                 break
 
         # Get latest 1min time series
-        url = (
-            f"https://api.twelvedata.com/time_series"
-            f"?symbol={symbol}&interval=1min&apikey={TWELVE_DATA_API_KEY}"
-        )
-        response = requests.get(url)
+        response = TWELVE_DATA.get("/time_series", params={"symbol": symbol, "interval": "1min", "apikey": api_key})
         stock = response.json()
 
         # Get quote with hourly change
-        url = (
-            f"https://api.twelvedata.com/quote"
-            f"?symbol={symbol}&interval=1h&apikey={TWELVE_DATA_API_KEY}"
-        )
-        response = requests.get(url)
+        response = TWELVE_DATA.get("/quote", params={"symbol": symbol, "interval": "1h", "apikey": api_key})
         stock.update(response.json())
 
         if response.json().get("code") == 400:
@@ -66,9 +50,3 @@ def get_stock_price(stock_names):
             }
 
     return stocks
-
-if __name__ == "__main__":
-    # Example usage
-    stock_names = ["NVIDIA"]
-    stock_data = get_stock_price(stock_names)
-    print(stock_data)
\ No newline at end of file
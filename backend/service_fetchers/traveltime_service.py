@@ -1,14 +1,9 @@
-import requests
-import os
-from dotenv import load_dotenv
 from geopy.geocoders import Nominatim
-import time
+from urllib.parse import urlsplit
+from .upstreams import upstreams
 
-# Load path to .env file and retrieve API keys
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-env_path = os.path.join(BASE_DIR, ".env")
-load_dotenv(env_path)
-OPENROUTE_API_KEY = os.getenv("OPENROUTE_API_KEY")
+OPENROUTE = upstreams["openroute"]
+NOMINATIM = upstreams["nominatim"]
 
 # Travel Time (OpenRouteService)
 #
@@ -26,9 +21,16 @@ OPENROUTE_API_KEY = os.getenv("OPENROUTE_API_KEY")
 #     - "error" (str): Error message
 def get_travel_info(transport_medium, start_location, end_location):
     def geocode_location(place):
-        geolocator = Nominatim(user_agent="route_planner")
+        nominatim_url = urlsplit(NOMINATIM.base_url)
+        geolocator = Nominatim(
+            user_agent="route_planner",
+            domain=nominatim_url.netloc + nominatim_url.path,
+            scheme=nominatim_url.scheme,
+            timeout=NOMINATIM.timeout
+        )
+        # geopy sends the request itself, so only the rate limit of the registry applies
+        NOMINATIM.limiter.wait()
         location = geolocator.geocode(place)
-        time.sleep(1)
         if location:
             return [location.longitude, location.latitude]
         return None
@@ -41,9 +43,8 @@ def get_travel_info(transport_medium, start_location, end_location):
     if not start_coords or not end_coords:
         return {"error": "Ungültiger Start- oder Zielort"}
 
-    url = f"https://api.openrouteservice.org/v2/directions/{transport}/geojson"
     headers = {
-        "Authorization": OPENROUTE_API_KEY,
+        "Authorization": OPENROUTE.credentials["api_key"],
         "Content-Type": "application/json"
     }
 
@@ -51,7 +52,7 @@ def get_travel_info(transport_medium, start_location, end_location):
         "coordinates": [start_coords, end_coords]
     }
 
-    response = requests.post(url, json=body, headers=headers)
+    response = OPENROUTE.post(f"/v2/directions/{transport}/geojson", json=body, headers=headers)
     data = response.json()
 
     if "features" not in data:
@@ -0,0 +1,239 @@
+import os
+import time
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Load path to .env file once for all upstream services
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+env_path = os.path.join(BASE_DIR, ".env")
+load_dotenv(env_path)
+
+# Upstream services with their defaults. Every setting can be overridden through the environment,
+# e.g., NEWS_API_URL, NEWS_API_TIMEOUT, NEWS_API_POOL_SIZE and NEWS_API_RATE_LIMIT (requests per second),
+# so traffic can be routed through a caching proxy or a local mirror without code changes.
+#   - env_prefix (str): Prefix of the environment variables of the service
+#   - base_url (str): Base URL the request paths are appended to
+#   - credentials (dict): Environment variable of each credential, e.g., {"api_key": "NEWS_API_KEY"}
+#   - timeout (float): Seconds to wait for a response
+#   - rate_limit (float or None): Maximum requests per second, None for no limit
+UPSTREAM_DEFAULTS = {
+    "newsapi": {
+        "env_prefix": "NEWS_API",
+        "base_url": "https://newsapi.org",
+        "credentials": {"api_key": "NEWS_API_KEY"},
+        "timeout": 10,
+        "rate_limit": None,
+    },
+    "twelvedata": {
+        "env_prefix": "TWELVE_DATA",
+        "base_url": "https://api.twelvedata.com",
+        "credentials": {"api_key": "TWELVE_DATA_API_KEY"},
+        "timeout": 10,
+        "rate_limit": None,
+    },
+    "weatherapi": {
+        "env_prefix": "WEATHER_API",
+        "base_url": "http://api.weatherapi.com",
+        "credentials": {"api_key": "WEATHER_API_KEY"},
+        "timeout": 10,
+        "rate_limit": None,
+    },
+    "openmensa": {
+        "env_prefix": "OPENMENSA",
+        "base_url": "https://openmensa.org",
+        "credentials": {},
+        "timeout": 10,
+        "rate_limit": None,
+    },
+    "rapla": {
+        "env_prefix": "RAPLA",
+        "base_url": "http://rapla.satoqz.net",
+        "credentials": {"key": "RAPLA_KEY", "salt": "RAPLA_SALT"},
+        "timeout": 20,
+        "rate_limit": None,
+    },
+    "openroute": {
+        "env_prefix": "OPENROUTE",
+        "base_url": "https://api.openrouteservice.org",
+        "credentials": {"api_key": "OPENROUTE_API_KEY"},
+        "timeout": 10,
+        "rate_limit": None,
+    },
+    "nominatim": {
+        "env_prefix": "NOMINATIM",
+        "base_url": "https://nominatim.openstreetmap.org",
+        "credentials": {},
+        "timeout": 10,
+        # The usage policy of the public instance allows one request per second
+        "rate_limit": 1,
+    },
+    "hotellook": {
+        "env_prefix": "HOTELLOOK",
+        "base_url": "https://engine.hotellook.com",
+        "credentials": {},
+        "timeout": 10,
+        "rate_limit": None,
+    },
+    "amadeus": {
+        "env_prefix": "AMADEUS",
+        "base_url": "https://test.api.amadeus.com",
+        "credentials": {"client_id": "AMADEUS_CLIENT_ID", "client_secret": "AMADEUS_CLIENT_SECRET"},
+        "timeout": 15,
+        "rate_limit": None,
+    },
+    "openai": {
+        "env_prefix": "OPENAI",
+        "base_url": "https://api.openai.com/v1",
+        "credentials": {"api_key": "OPENAI_API_KEY"},
+        "timeout": 60,
+        "rate_limit": None,
+    },
+}
+
+# Credentials that are not secret and are used unless the environment sets them
+CREDENTIAL_DEFAULTS = {
+    "RAPLA_KEY": "6Q0QSbNtpyeYPKQhnGFTaEN6AggaPdGgCFyhd5ANmjydX8WyDjUfLBh4YjDgat2dJd8as6Az5GGmQilBwJydDTQpeHfV6bTghpX2dlRU6RU5QsAKr6ARjgRj_BxZmmhVA3Tk_bSK4acN3oO7a7PkNAHTfszb0OA4_JMp8zdoYDY",
+    "RAPLA_SALT": "648736798",
+}
+
+# Connections kept open per service, e.g., for the morning run fetching for many users at once
+DEFAULT_POOL_SIZE = 10
+
+class RateLimiter:
+    """
+    Spaces out the requests to a service, shared by all threads calling it.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1 / rate if rate else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    # Wait for Slot
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - None (blocks until the next request may be sent)
+    #
+    # Notes:
+    #   - Waiting sleeps the calling thread. This is only safe because the fetchers run in worker threads
+    #     (asyncio.to_thread); calling it on the event loop would stall every other request meanwhile.
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class Upstream:
+    """
+    Settings and the connection pool of one upstream service.
+    """
+
+    def __init__(self, name: str, base_url: str, credentials: dict, timeout: float, pool_size: int, rate_limit: Optional[float]):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.credentials = credentials
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.rate_limit = rate_limit
+        self.limiter = RateLimiter(rate_limit)
+        self._session = None
+
+    # Get Session
+    #
+    # Parameters:
+    #   - None
+    #
+    # Returns:
+    #   - requests.Session: Session keeping up to pool_size connections to the service open, created on first use
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    # Build URL
+    #
+    # Parameters:
+    #   - path (str): Path below the base URL, e.g., "/v2/top-headlines"
+    #
+    # Returns:
+    #   - str: The full URL, e.g., "https://newsapi.org/v2/top-headlines"
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    # Send GET Request
+    #
+    # Parameters:
+    #   - path (str): Path below the base URL, e.g., "/v1/forecast.json"
+    #   - kwargs: Further arguments of requests, e.g., params={"q": "Stuttgart"}
+    #
+    # Returns:
+    #   - requests.Response: The response of the service
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the pooled session, respecting the rate limit and timeout of the service.
+        """
+        self.limiter.wait()
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(self.url(path), **kwargs)
+
+    # Send POST Request
+    #
+    # Parameters:
+    #   - path (str): Path below the base URL, e.g., "/v1/security/oauth2/token"
+    #   - kwargs: Further arguments of requests, e.g., data={"grant_type": "client_credentials"}
+    #
+    # Returns:
+    #   - requests.Response: The response of the service
+    def post(self, path: str, **kwargs) -> requests.Response:
+        """
+        Send a POST request through the pooled session, respecting the rate limit and timeout of the service.
+        """
+        self.limiter.wait()
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(self.url(path), **kwargs)
+
+# Load Upstream Registry
+#
+# Parameters:
+#   - environ (dict): Environment to read the settings from, e.g., os.environ
+#
+# Returns:
+#   - dict: Upstream per service name, e.g., {"newsapi": Upstream(...), ...}
+def load_upstreams(environ=os.environ) -> dict:
+    upstreams = {}
+    for name, defaults in UPSTREAM_DEFAULTS.items():
+        prefix = defaults["env_prefix"]
+        # OPENAI_BASE_URL is the variable the OpenAI client itself reads
+        url_variable = "OPENAI_BASE_URL" if name == "openai" else f"{prefix}_URL"
+        rate_limit = environ.get(f"{prefix}_RATE_LIMIT")
+        upstreams[name] = Upstream(
+            name,
+            base_url=environ.get(url_variable) or defaults["base_url"],
+            credentials={
+                credential: environ.get(variable, CREDENTIAL_DEFAULTS.get(variable))
+                for credential, variable in defaults["credentials"].items()
+            },
+            timeout=float(environ.get(f"{prefix}_TIMEOUT", defaults["timeout"])),
+            pool_size=int(environ.get(f"{prefix}_POOL_SIZE", DEFAULT_POOL_SIZE)),
+            rate_limit=float(rate_limit) if rate_limit else defaults["rate_limit"],
+        )
+    return upstreams
+
+
+upstreams = load_upstreams()
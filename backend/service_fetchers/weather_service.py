@@ -1,12 +1,6 @@
-import requests
-import os
-from dotenv import load_dotenv
+from .upstreams import upstreams
 
-# Load path to .env file and retrieve API keys
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-env_path = os.path.join(BASE_DIR, ".env")
-load_dotenv(env_path)
-WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+WEATHER_API = upstreams["weatherapi"]
 
 # Weather (WeatherAPI)
 #
@@ -23,11 +17,8 @@ def get_weather(cities):
     weather_cities = {}
 
     for city in cities:
-        url = (
-            f"http://api.weatherapi.com/v1/forecast.json"
-            f"?key={WEATHER_API_KEY}&q={city}"
-        )
-        response = requests.get(url)
+        params = {"key": WEATHER_API.credentials["api_key"], "q": city}
+        response = WEATHER_API.get("/v1/forecast.json", params=params)
         condition = response.json()
 
         if condition.get("error", {}).get("message") == "No matching location found.":
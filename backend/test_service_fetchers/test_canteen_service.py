@@ -7,7 +7,7 @@ from backend.service_fetchers.canteen_service import get_canteen_info
 
 class TestGetCanteenInfo(unittest.TestCase):
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_canteen_info_success(self, mock_get):
         mock_get.side_effect = [
             # Canteen list page 1
@@ -35,7 +35,7 @@ class TestGetCanteenInfo(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_canteen_info_not_found(self, mock_get):
         mock_get.side_effect = [
             MagicMock(status_code=200, json=MagicMock(return_value=[
@@ -48,14 +48,14 @@ class TestGetCanteenInfo(unittest.TestCase):
         expected = {"Nicht Existente Mensa": {"error": "Kantine nicht gefunden."}}
         self.assertEqual(result, expected)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_canteen_info_api_failure(self, mock_get):
         mock_get.return_value = MagicMock(status_code=404)
         result = get_canteen_info(["Mensa Central"])
         expected = {"error": "Fehler beim Laden der Kantinen: 404"}
         self.assertEqual(result, expected)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_canteen_info_meal_api_failure(self, mock_get):
         mock_get.side_effect = [
             # Canteen list page 1
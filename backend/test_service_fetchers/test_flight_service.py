@@ -7,8 +7,8 @@ from backend.service_fetchers.flight_service import get_flights
 
 class TestGetFlights(unittest.TestCase):
 
-    @patch('backend.service_fetchers.flight_service.requests.get')
-    @patch('backend.service_fetchers.flight_service.requests.post')
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
     @patch('backend.service_fetchers.flight_service.is_valid_date', side_effect=lambda x: "2025-04-20")
     def test_get_flights_success(self, mock_date, mock_post, mock_get):
         # Mock OAuth token
@@ -16,7 +16,7 @@ class TestGetFlights(unittest.TestCase):
         mock_post.return_value.json.return_value = {"access_token": "fake_token"}
 
         # Mock IATA code lookup and flight offers
-        def side_effect_get(url, headers=None, params=None):
+        def side_effect_get(url, headers=None, params=None, timeout=None):
             if "locations" in url:
                 return MagicMock(
                     status_code=200,
@@ -54,15 +54,15 @@ class TestGetFlights(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('backend.service_fetchers.flight_service.requests.post')
+    @patch('requests.Session.post')
     def test_get_flights_token_failure(self, mock_post):
         mock_post.side_effect = Exception("Token request failed")
         result = get_flights(["Berlin"], ["Hamburg"], ["20.04.2025"])
         self.assertIn("error", result)
         self.assertEqual(result["error"], "Token request failed")
 
-    @patch('backend.service_fetchers.flight_service.requests.post')
-    @patch('backend.service_fetchers.flight_service.requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_get_flights_no_iata_code(self, mock_get, mock_post):
         mock_post.return_value = MagicMock(status_code=200)
         mock_post.return_value.json.return_value = {"access_token": "fake_token"}
@@ -72,13 +72,13 @@ class TestGetFlights(unittest.TestCase):
         self.assertIn("error", result)
         self.assertIn("No IATA code found", result["error"])
 
-    @patch('backend.service_fetchers.flight_service.requests.post')
-    @patch('backend.service_fetchers.flight_service.requests.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
     def test_get_flights_no_data(self, mock_get, mock_post):
         mock_post.return_value = MagicMock(status_code=200)
         mock_post.return_value.json.return_value = {"access_token": "fake_token"}
         
-        def side_effect_get(url, headers=None, params=None):
+        def side_effect_get(url, headers=None, params=None, timeout=None):
             if "locations" in url:
                 return MagicMock(status_code=200, json=lambda: {"data": [{"iataCode": "BER"}]})
             elif "flight-offers" in url:
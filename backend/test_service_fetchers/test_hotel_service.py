@@ -7,7 +7,7 @@ from backend.service_fetchers.hotel_service import get_hotels
 
 class TestGetHotels(unittest.TestCase):
 
-    @patch('backend.service_fetchers.hotel_service.requests.get')
+    @patch('requests.Session.get')
     @patch('backend.service_fetchers.hotel_service.is_valid_date')
     def test_get_hotels_success(self, mock_date, mock_get):
         mock_date.side_effect = ["2025-05-10", "2025-05-12"]
@@ -35,7 +35,7 @@ class TestGetHotels(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('backend.service_fetchers.hotel_service.requests.get')
+    @patch('requests.Session.get')
     @patch('backend.service_fetchers.hotel_service.is_valid_date')
     def test_get_hotels_error_response(self, mock_date, mock_get):
         mock_date.side_effect = ["2025-05-10", "2025-05-12"]
@@ -47,7 +47,7 @@ class TestGetHotels(unittest.TestCase):
 
         self.assertEqual(result, {})
 
-    @patch('backend.service_fetchers.hotel_service.requests.get')
+    @patch('requests.Session.get')
     @patch('backend.service_fetchers.hotel_service.is_valid_date')
     def test_get_hotels_missing_fields(self, mock_date, mock_get):
         mock_date.side_effect = ["2025-05-10", "2025-05-12"]
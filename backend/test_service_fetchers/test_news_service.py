@@ -7,7 +7,7 @@ from backend.service_fetchers.news_service import get_news
 
 class TestGetNews(unittest.TestCase):
 
-    @patch('backend.service_fetchers.news_service.requests.get')
+    @patch('requests.Session.get')
     def test_get_news_success(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -32,7 +32,7 @@ class TestGetNews(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('backend.service_fetchers.news_service.requests.get')
+    @patch('requests.Session.get')
     def test_get_news_no_articles(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {
@@ -44,7 +44,7 @@ class TestGetNews(unittest.TestCase):
         result = get_news(["sports"])
         self.assertEqual(result, {})
 
-    @patch('backend.service_fetchers.news_service.requests.get')
+    @patch('requests.Session.get')
     def test_get_news_missing_fields(self, mock_get):
         mock_response = MagicMock()
         mock_response.json.return_value = {
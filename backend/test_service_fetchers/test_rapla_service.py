@@ -7,7 +7,7 @@ from backend.service_fetchers.rapla_service import get_rapla_schedule
 
 class TestGetRaplaSchedule(unittest.TestCase):
 
-    @patch('backend.service_fetchers.rapla_service.requests.get')
+    @patch('requests.Session.get')
     @patch('backend.service_fetchers.rapla_service.is_valid_date')
     def test_get_rapla_schedule_success(self, mock_is_valid_date, mock_get):
         mock_is_valid_date.return_value = "2024-04-11"
@@ -38,7 +38,7 @@ class TestGetRaplaSchedule(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('backend.service_fetchers.rapla_service.requests.get')
+    @patch('requests.Session.get')
     @patch('backend.service_fetchers.rapla_service.is_valid_date')
     def test_get_rapla_schedule_no_match(self, mock_is_valid_date, mock_get):
         mock_is_valid_date.return_value = "2024-04-11"
@@ -7,7 +7,7 @@ from backend.service_fetchers.stock_service import get_stock_price
 
 class TestGetStockPrice(unittest.TestCase):
 
-    @patch('backend.service_fetchers.stock_service.requests.get')
+    @patch('requests.Session.get')
     def test_get_stock_price_success(self, mock_get):
         # Reihenfolge der Aufrufe: symbol_search, time_series, quote
         mock_get.side_effect = [
@@ -33,7 +33,7 @@ class TestGetStockPrice(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('backend.service_fetchers.stock_service.requests.get')
+    @patch('requests.Session.get')
     def test_get_stock_price_no_data(self, mock_get):
         # Keine Daten bei symbol_search
         mock_get.return_value = MagicMock(json=lambda: {})
@@ -41,7 +41,7 @@ class TestGetStockPrice(unittest.TestCase):
         result = get_stock_price(["InvalidCompany"])
         self.assertEqual(result, {})
 
-    @patch('backend.service_fetchers.stock_service.requests.get')
+    @patch('requests.Session.get')
     def test_get_stock_price_api_error(self, mock_get):
         # symbol_search → erfolgreich
         # time_series → erfolgreich
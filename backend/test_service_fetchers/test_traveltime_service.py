@@ -7,7 +7,7 @@ from backend.service_fetchers.traveltime_service import get_travel_info
 
 class TestGetTravelInfo(unittest.TestCase):
 
-    @patch('backend.service_fetchers.traveltime_service.requests.post')
+    @patch('requests.Session.post')
     @patch('backend.service_fetchers.traveltime_service.Nominatim.geocode')
     def test_get_travel_info_success(self, mock_geocode, mock_post):
         # Mock geocode return values
@@ -46,7 +46,7 @@ class TestGetTravelInfo(unittest.TestCase):
         result = get_travel_info(["driving-car"], ["InvalidCity"], ["Hamburg"])
         self.assertEqual(result, {"error": "Ungültiger Start- oder Zielort"})
 
-    @patch('backend.service_fetchers.traveltime_service.requests.post')
+    @patch('requests.Session.post')
     @patch('backend.service_fetchers.traveltime_service.Nominatim.geocode')
     def test_get_travel_info_api_error(self, mock_geocode, mock_post):
         mock_geocode.side_effect = [
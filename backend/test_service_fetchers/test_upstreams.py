@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.service_fetchers.upstreams import load_upstreams, RateLimiter, Upstream
+
+class TestLoadUpstreams(unittest.TestCase):
+
+    def test_defaults(self):
+        upstreams = load_upstreams({})
+
+        self.assertEqual(upstreams["twelvedata"].base_url, "https://api.twelvedata.com")
+        self.assertIsNone(upstreams["twelvedata"].credentials["api_key"])
+        self.assertEqual(upstreams["nominatim"].rate_limit, 1)
+        self.assertEqual(upstreams["openai"].timeout, 60)
+        # Rapla Schlüssel ist kein Geheimnis und hat einen Standardwert
+        self.assertEqual(upstreams["rapla"].credentials["salt"], "648736798")
+
+    def test_environment_overrides(self):
+        upstreams = load_upstreams({
+            "NEWS_API_URL": "http://cache.local/newsapi/",
+            "NEWS_API_KEY": "secret",
+            "NEWS_API_TIMEOUT": "2.5",
+            "NEWS_API_POOL_SIZE": "32",
+            "NEWS_API_RATE_LIMIT": "5",
+            "OPENAI_BASE_URL": "http://cache.local/openai/v1",
+        })
+
+        news = upstreams["newsapi"]
+        self.assertEqual(news.url("/v2/top-headlines"), "http://cache.local/newsapi/v2/top-headlines")
+        self.assertEqual(news.credentials, {"api_key": "secret"})
+        self.assertEqual(news.timeout, 2.5)
+        self.assertEqual(news.pool_size, 32)
+        self.assertEqual(news.rate_limit, 5)
+        self.assertEqual(upstreams["openai"].base_url, "http://cache.local/openai/v1")
+
+class TestUpstream(unittest.TestCase):
+
+    @patch('requests.Session.get')
+    def test_get_uses_base_url_and_timeout(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        upstream = Upstream("weatherapi", "http://mirror.local", {}, timeout=3, pool_size=4, rate_limit=None)
+
+        upstream.get("/v1/forecast.json", params={"q": "Stuttgart"})
+
+        mock_get.assert_called_once_with("http://mirror.local/v1/forecast.json", params={"q": "Stuttgart"}, timeout=3)
+
+    def test_session_is_reused(self):
+        upstream = Upstream("openmensa", "https://openmensa.org", {}, timeout=10, pool_size=4, rate_limit=None)
+
+        self.assertIs(upstream.session, upstream.session)
+        self.assertEqual(upstream.session.get_adapter("https://openmensa.org")._pool_maxsize, 4)
+
+class TestRateLimiter(unittest.TestCase):
+
+    @patch('backend.service_fetchers.upstreams.time.sleep')
+    @patch('backend.service_fetchers.upstreams.time.monotonic', return_value=100.0)
+    def test_requests_are_spaced_out(self, mock_monotonic, mock_sleep):
+        limiter = RateLimiter(2)
+
+        limiter.wait()
+        limiter.wait()
+        limiter.wait()
+
+        # Erste Anfrage sofort, danach jeweils eine halbe Sekunde Abstand
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [0.5, 1.0])
+
+    @patch('backend.service_fetchers.upstreams.time.sleep')
+    def test_no_limit(self, mock_sleep):
+        limiter = RateLimiter(None)
+
+        for _ in range(10):
+            limiter.wait()
+
+        mock_sleep.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
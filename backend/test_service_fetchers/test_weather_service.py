@@ -7,7 +7,7 @@ from backend.service_fetchers.weather_service import get_weather
 
 class TestGetWeather(unittest.TestCase):
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_weather_success(self, mock_get):
         # Mocking the API response for a valid city (e.g., Berlin)
         mock_response = MagicMock()
@@ -35,7 +35,7 @@ class TestGetWeather(unittest.TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_weather_no_matching_location(self, mock_get):
         # Mocking the API response for an invalid city (e.g., city not found)
         mock_response = MagicMock()
@@ -49,7 +49,7 @@ class TestGetWeather(unittest.TestCase):
 
         self.assertEqual(result, {})
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_weather_partial_data(self, mock_get):
         # Mocking the API response for a city with missing data
         mock_response = MagicMock()
@@ -1,7 +1,113 @@
-import requests
+import os
+import time
+import random
+import asyncio
+import logging
 
+import httpx
 
-def get_answer(message: str, user_id: int) -> str:
+logger = logging.getLogger(__name__)
+
+# Address of the API, e.g. a local stub for load tests
+API_BASE_URL = os.getenv("API_BASE_URL", "http://api:8000")
+
+# Timeouts per endpoint in seconds, /answer may need several LLM round trips
+TIMEOUTS = {
+    "answer": 120.0,
+    "morning": 300.0,
+    "proactivity": 180.0,
+    "preferences": 10.0,
+}
+
+# Retries after connection errors and 502/503/504 responses, waiting RETRY_BASE_DELAY * 2^attempt with jitter
+MAX_RETRIES = 2
+RETRY_BASE_DELAY = 0.5
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# Answers taking longer are logged with the Server-Timing header, which lists the duration of every stage
+SLOW_ANSWER_SECONDS = float(os.getenv("SLOW_ANSWER_SECONDS", "5"))
+
+# Maximum number of requests the bot sends to the API at the same time
+MAX_CONCURRENT_REQUESTS = int(os.getenv("API_MAX_CONCURRENT_REQUESTS", "20"))
+
+# Last preferences per user with their ETag, revalidated with If-None-Match instead of re-downloaded
+MAX_CACHED_PREFERENCES = 256
+_preference_cache = {}
+
+_client = None
+_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared HTTP client, creating it on first use.
+
+    :return: An httpx.AsyncClient that keeps its connections to the API open.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_BASE_URL,
+            limits=httpx.Limits(
+                max_connections=MAX_CONCURRENT_REQUESTS,
+                max_keepalive_connections=MAX_CONCURRENT_REQUESTS
+            )
+        )
+    return _client
+
+
+async def close_client():
+    """
+    Closes the shared HTTP client and its connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _request(method: str, path: str, timeout: float, retry: bool = True, **kwargs) -> httpx.Response:
+    """
+    Sends a request to the API, retrying connection errors and temporary server errors.
+
+    :param method: HTTP method, e.g. "GET".
+    :param path: Path of the endpoint, e.g. "/answer".
+    :param timeout: Timeout of the request in seconds.
+    :param retry: Whether server errors may be retried (requests that are not idempotent only retry
+        errors that occur before the request reached the API).
+    :return: The response of the API.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        # Each attempt takes its own slot, so that waiting for a retry does not hold back other requests
+        async with _semaphore:
+            try:
+                response = await get_client().request(method, path, timeout=timeout, **kwargs)
+                if not retry or last_attempt or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if last_attempt:
+                    raise
+        await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def _cache_preferences(user_id: int, etag: str, preferences: dict):
+    """
+    Stores the preferences of a user, dropping the oldest entry when the cache is full.
+
+    :param user_id: Telegram user ID.
+    :param etag: ETag the API returned for the preferences.
+    :param preferences: The preferences of the user.
+    """
+    if not etag:
+        return
+    _preference_cache.pop(user_id, None)
+    _preference_cache[user_id] = (etag, preferences)
+    if len(_preference_cache) > MAX_CACHED_PREFERENCES:
+        del _preference_cache[next(iter(_preference_cache))]
+
+
+async def get_answer(message: str, user_id: int) -> str:
     """
     Sends a GET request to retrieve an answer from the API.
 
@@ -9,76 +115,85 @@ def get_answer(message: str, user_id: int) -> str:
     :param user_id: Telegram user ID for context.
     :return: A string containing the API's response or an error message.
     """
-    url = "http://api:8000/answer"
     params = {
         "message": message,
         "user_id": str(user_id)
     }  # Query parameters
 
     try:
-        response = requests.get(url, params=params)
+        started_at = time.monotonic()
+        response = await _request("GET", "/answer", TIMEOUTS["answer"], params=params)
+        elapsed = time.monotonic() - started_at
+        if elapsed > SLOW_ANSWER_SECONDS:
+            logger.warning(
+                f"Langsame Antwort der API ({elapsed:.1f}s), "
+                f"Server-Timing: {response.headers.get('Server-Timing', 'nicht vorhanden')}"
+            )
         if response.status_code == 200:
             return response.json()["response"]
         return f"{response.status_code}: Fehler bei der Anfrage an die API."
-    except:
+    except httpx.HTTPError:
         return "Ich kann mich gerade nicht mit der API verbinden."
 
 
-def get_all_morning_messages() -> str:
+async def get_all_morning_messages() -> str:
     """
     Retrieves all morning messages from the API.
 
     :return: A list of morning messages or an error message.
     """
-    url = "http://api:8000/morning"
     try:
-        response = requests.get(url)
+        response = await _request("GET", "/morning", TIMEOUTS["morning"])
         if response.status_code == 200:
             results = response.json().get("results", [])
             return results
         return f"{response.status_code}: Fehler bei der Anfrage an die API."
-    except requests.RequestException:
+    except httpx.HTTPError:
         return "Ich kann mich gerade nicht mit der API verbinden."
 
 
-def get_all_proactivity_messages() -> str:
+async def get_all_proactivity_messages() -> str:
     """
     Retrieves all proactivity messages from the API.
 
     :return: A list of proactivity messages or an error message.
     """
-    url = "http://api:8000/proactivity"
     try:
-        response = requests.get(url)
+        response = await _request("GET", "/proactivity", TIMEOUTS["proactivity"])
         if response.status_code == 200:
             results = response.json().get("results", [])
             return results
         return f"{response.status_code}: Fehler bei der Anfrage an die API."
-    except requests.RequestException:
+    except httpx.HTTPError:
         return "Ich kann mich gerade nicht mit der API verbinden."
 
 
-def get_preferences(user_id: int) -> tuple:
+async def get_preferences(user_id: int) -> tuple:
     """
     Retrieves user preferences from the API.
 
     :param user_id: Telegram user ID.
     :return: A tuple containing preferences or an error message, and a status string.
     """
-    url = f"http://api:8000/preferences/{user_id}"
+    cached = _preference_cache.get(user_id)
+    headers = {"If-None-Match": cached[0]} if cached else {}
     try:
-        response = requests.get(url)
+        response = await _request("GET", f"/preferences/{user_id}", TIMEOUTS["preferences"], headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1], "success"
         if response.status_code == 200:
-            return response.json(), "success"
+            preferences = response.json()
+            _cache_preferences(user_id, response.headers.get("ETag"), preferences)
+            return preferences, "success"
         return (
             f"{response.status_code}: Fehler bei der Anzeige der Präferenzen.",
             "error"
         )
-    except:
+    except httpx.HTTPError:
         return "Ich kann gerade deine Präferenzen nicht abrufen.", "error"
 
 
-def post_preferences(user_id: int, preferences: dict) -> str:
+async def post_preferences(user_id: int, preferences: dict) -> str:
     """
     Submits initial user preferences to the API.
 
@@ -86,7 +201,6 @@ def post_preferences(user_id: int, preferences: dict) -> str:
     :param preferences: Dict containing user preferences collected from the user.
     :return: A confirmation message or an error message in German.
     """
-    url = "http://api:8000/preferences/init"
     data = {
         "username": str(user_id),
         "course": "IN22",
@@ -98,48 +212,46 @@ def post_preferences(user_id: int, preferences: dict) -> str:
     }
 
     try:
-        response = requests.post(url, json=data)
+        # Not retried after it reached the API, a second attempt would fail as the user already exists
+        response = await _request("POST", "/preferences/init", TIMEOUTS["preferences"], retry=False, json=data)
         if response.status_code == 200:
             return "Deine Präferenzen wurden erfolgreich gespeichert."
         return f"{response.status_code}: Fehler bei der Anfrage an die API."
-    except:
+    except httpx.HTTPError:
         return "Du hast deine Präferenzen anscheinend schon initialisiert."
 
 
-def put_preference(user_id: int, key: str, new_value):
+# Preferences that can be changed with a single PATCH request
+UPDATABLE_PREFERENCES = [
+    "course",
+    "cafeteria",
+    "city",
+    "preferred_transport_medium",
+    "delete_stocks",
+    "add_stocks",
+    "delete_news",
+    "add_news"
+]
+
+
+async def put_preference(user_id: int, key: str, new_value):
     """
-    Updates a particular user preference in the API.
+    Updates a particular user preference in the API with a single PATCH request.
 
     :param user_id: Telegram user ID.
     :param key: Preference name being updated.
     :param new_value: New value for the preference.
     :return: A confirmation message or an error message in German.
     """
-    url = f"http://api:8000/preferences/{user_id}"
-    try:
-        response = requests.get(url)
-        if response.status_code != 200:
-            return (
-                f"Fehler beim Abrufen der aktuellen Präferenzen: "
-                f"{response.status_code}"
-            )
-
-        current_data = response.json()
-        extra_keys = [
-            "delete_stocks",
-            "add_stocks",
-            "delete_news",
-            "add_news"
-        ]
-
-        if key not in current_data and key not in extra_keys:
-            return f"Ungültige Präferenz: {key}"
+    if key not in UPDATABLE_PREFERENCES:
+        return f"Ungültige Präferenz: {key}"
 
-        current_data[key] = new_value
-        put_response = requests.put(url, json=current_data)
+    try:
+        response = await _request("PATCH", f"/preferences/{user_id}", TIMEOUTS["preferences"], json={key: new_value})
 
-        if put_response.status_code == 200:
+        if response.status_code == 200:
+            _cache_preferences(user_id, response.headers.get("ETag"), response.json())
             return "Deine Präferenz wurde erfolgreich aktualisiert."
-        return f"Fehler bei der Aktualisierung: {put_response.status_code}"
-    except requests.RequestException:
-        return "Ich kann gerade deine Präferenz nicht ändern."
\ No newline at end of file
+        return f"Fehler bei der Aktualisierung: {response.status_code}"
+    except httpx.HTTPError:
+        return "Ich kann gerade deine Präferenz nicht ändern."
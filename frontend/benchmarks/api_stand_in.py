@@ -0,0 +1,154 @@
+"""Module with a local stand-in for the backend API, for load tests of the bot without the backend."""
+
+import json
+import asyncio
+import logging
+import itertools
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+
+# Status lines of the responses the stand-in sends
+STATUS_LINES = {200: "200 OK", 304: "304 Not Modified", 404: "404 Not Found", 422: "422 Unprocessable Entity"}
+
+
+class ApiStandIn:
+    """
+    Minimal HTTP server answering the endpoints the bot calls (/answer, /preferences, /morning and
+    /proactivity) after a configurable latency, keeping the preferences in memory.
+    """
+
+    def __init__(self, answer_latency: float = 1.0, preference_latency: float = 0.02):
+        """
+        Initialize the stand-in.
+
+        :param answer_latency: Seconds an /answer request takes, e.g. 3.0 for several LLM round trips.
+        :param preference_latency: Seconds a request to /preferences takes.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.answer_latency = answer_latency
+        self.preference_latency = preference_latency
+        self.preferences = {}
+        self.versions = {}
+        self.calls = Counter()
+        self.server = None
+        self.port = None
+        self._answers = itertools.count(1)
+
+    @property
+    def base_url(self) -> str:
+        """
+        Base URL to pass to the bot as API_BASE_URL, e.g. "http://127.0.0.1:8000".
+        """
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Starts the server, on a free port unless one is given.
+
+        :param host: Address to listen on.
+        :param port: Port to listen on, 0 for a free port.
+        """
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops the server.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def seed_preferences(self, user_id: int, preferences: dict):
+        """
+        Stores the preferences of a user as if they had finished the onboarding.
+
+        :param user_id: Telegram user ID.
+        :param preferences: The preferences, e.g. {"city": "Stuttgart", "stocks": ["Apple"], ...}.
+        """
+        self.preferences[str(user_id)] = {"username": str(user_id), **preferences}
+        self.versions[str(user_id)] = self.versions.get(str(user_id), 0) + 1
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves the HTTP/1.1 requests of one connection.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                http_method, target, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, extra_headers, payload = await self._route(http_method, target, headers, body)
+                content = json.dumps(payload).encode() if payload is not None else b""
+                head = f"HTTP/1.1 {STATUS_LINES[status]}\r\nContent-Type: application/json\r\n"
+                head += "".join(f"{name}: {value}\r\n" for name, value in extra_headers.items())
+                writer.write(f"{head}Content-Length: {len(content)}\r\n\r\n".encode() + content)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, http_method: str, target: str, headers: dict, body: bytes) -> tuple:
+        """
+        Answers a request to one of the endpoints of the API.
+
+        :return: Status code, additional headers and JSON payload of the response.
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if path == "/answer":
+            self.calls["answer"] += 1
+            await asyncio.sleep(self.answer_latency)
+            message = query.get("message", "")
+            return 200, {}, {"response": f"Antwort {next(self._answers)} auf: {message}"}
+        if path in ("/morning", "/proactivity"):
+            self.calls[path.lstrip("/")] += 1
+            return 200, {}, {"results": []}
+
+        self.calls["preferences"] += 1
+        await asyncio.sleep(self.preference_latency)
+        data = json.loads(body) if body else {}
+        if http_method == "POST" and path == "/preferences/init":
+            self.seed_preferences(data.get("username", ""), data)
+            return 200, {}, {"message": "Preferences initialized"}
+
+        user_id = path.rsplit("/", 1)[-1]
+        if user_id not in self.preferences:
+            return 404, {}, {"detail": "User not found"}
+        if http_method == "PATCH":
+            self._apply_update(self.preferences[user_id], data)
+            self.versions[user_id] += 1
+        etag = f'"{user_id}-{self.versions[user_id]}"'
+        if http_method == "GET" and headers.get("if-none-match") == etag:
+            return 304, {"ETag": etag}, None
+        return 200, {"ETag": etag}, self.preferences[user_id]
+
+    @staticmethod
+    def _apply_update(preferences: dict, update: dict):
+        """
+        Applies a PATCH request the way the API does, e.g. {"add_stocks": ["Apple"]} or {"city": "Berlin"}.
+
+        :param preferences: The stored preferences of the user, changed in place.
+        :param update: The body of the request.
+        """
+        for key, value in update.items():
+            if key.startswith(("add_", "delete_")):
+                action, field = key.split("_", 1)
+                items = preferences.setdefault(field, [])
+                if action == "add":
+                    items.extend(item for item in value if item not in items)
+                else:
+                    preferences[field] = [item for item in items if item not in value]
+            else:
+                preferences[key] = value
@@ -0,0 +1,426 @@
+"""
+Module with a load generator that simulates many Telegram users chatting with the bot at the same time.
+
+The real bot runs against the Telegram stand-in and the API stand-in, the speech conversion is replaced
+by a stand-in with a fixed duration. Every simulated user sends text and voice messages, walks through
+the /start onboarding or changes a preference with /changepref, waiting for the bot's replies like a
+person would. The end-to-end latency from the moment Telegram receives an update until the bot's reply
+reaches Telegram is reported per step, e.g.:
+
+    python benchmarks/load_generator.py --users 2000 --ramp-up 60 --mix text=6,voice=2,onboarding=1,preferences=1
+
+The limits of the bot are read from its usual environment variables, so the concurrency ceiling can be
+searched with e.g. BOT_MAX_CONCURRENT_UPDATES=64 API_MAX_CONCURRENT_REQUESTS=50 SPEECH_MAX_CONCURRENT=8.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from collections import Counter, namedtuple
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.telegram_stand_in import TelegramStandIn
+from benchmarks.api_stand_in import ApiStandIn
+
+# Flows a simulated user can go through, each round one of them is picked by its weight
+FLOWS = ["text", "voice", "onboarding", "preferences"]
+DEFAULT_MIX = {"text": 6, "voice": 2, "onboarding": 1, "preferences": 1}
+
+# Chat ID of the first simulated user, the others follow consecutively
+FIRST_CHAT_ID = 100001
+
+# Messages the users type, or say in their voice messages
+MESSAGES = [
+    "Wie wird das Wetter heute?",
+    "Was gibt es Neues?",
+    "Wie stehen meine Aktien?",
+    "Was gibt es heute in der Mensa?",
+    "Welche Vorlesungen habe ich morgen?",
+    "Wie lange brauche ich zur Uni?",
+]
+CANTEENS = ["Mensa Central", "Mensa Stadtmitte", "Mensa Vaihingen"]
+CITIES = ["Stuttgart", "Berlin", "Hamburg", "München", "Köln"]
+STOCKS = ["Apple", "Tesla", "NVIDIA", "Microsoft", "Amazon", "SAP"]
+NEWS = ["business", "general", "science", "sports", "technology"]
+TRANSPORTS = ["driving-car", "cycling-regular", "foot-walking"]
+
+# One update of a user and the replies it waits for before going on
+#   - label (str): Row of the report the update is counted in, e.g. "/start"
+#   - update (dict): The update as sent by Telegram
+#   - replies (list): (row, Bot API method, count) per expected reply, e.g. [("text", "sendMessage", 1)]
+Step = namedtuple("Step", ["label", "update", "replies"])
+
+
+def parse_mix(spec: str) -> dict:
+    """
+    Parses the weights of the flows.
+
+    :param spec: Weight per flow, e.g. "text=6,voice=2,onboarding=1".
+    :return: The weights, e.g. {"text": 6, "voice": 2, "onboarding": 1}.
+    :raises ValueError: If a flow is unknown or a weight is not a non-negative number.
+    """
+    mix = {}
+    for part in spec.split(","):
+        flow, _, weight = part.partition("=")
+        flow = flow.strip()
+        if flow not in FLOWS:
+            raise ValueError(f"Unknown flow: {flow} (flows: {', '.join(FLOWS)})")
+        try:
+            mix[flow] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {flow}: {weight!r}") from None
+        if mix[flow] < 0:
+            raise ValueError(f"Invalid weight for {flow}: {weight!r}")
+    if not any(mix.values()):
+        raise ValueError("At least one flow needs a positive weight.")
+    return mix
+
+
+def build_flow(flow: str, telegram: TelegramStandIn, chat_id: int, rng: random.Random) -> list:
+    """
+    Builds the steps of one flow of a user.
+
+    :param flow: The flow, e.g. "onboarding".
+    :param telegram: The stand-in building the updates.
+    :param chat_id: ID of the private chat, which is also the user ID.
+    :param rng: Random generator choosing the answers of the user.
+    :return: The steps, see Step.
+    """
+    text = lambda message: telegram.text_update(chat_id, message)
+    click = lambda data: telegram.callback_update(chat_id, data)
+
+    # Every answer is followed by its voice version, synthesized in the background
+    if flow == "text":
+        return [Step("text", text(rng.choice(MESSAGES)), [("text", "sendMessage", 1), ("text voice reply", "sendVoice", 1)])]
+    if flow == "voice":
+        return [Step("voice", telegram.voice_update(chat_id), [("voice", "sendMessage", 1), ("voice voice reply", "sendVoice", 1)])]
+    if flow == "onboarding":
+        stocks = ", ".join(rng.sample(STOCKS, 2))
+        return [
+            Step("/start", text("/start"), [("/start", "sendMessage", 2)]),
+            Step("onboarding text", text(rng.choice(CANTEENS)), [("onboarding text", "sendMessage", 1)]),
+            Step("onboarding text", text(rng.choice(CITIES)), [("onboarding text", "sendMessage", 2)]),
+            Step("onboarding button", click(f"transport:{rng.choice(TRANSPORTS)}"), [("onboarding button", "sendMessage", 1)]),
+            Step("onboarding text", text(stocks), [("onboarding text", "sendMessage", 2)]),
+            Step("onboarding button", click(f"news:{rng.choice(NEWS)}"), [("onboarding button", "editMessageReplyMarkup", 1)]),
+            # Sends the preferences to the API
+            Step("onboarding done", click("news:submit"), [("onboarding done", "sendMessage", 3)]),
+        ]
+
+    choice = rng.choice([
+        (["canteen"], rng.choice(CANTEENS)),
+        (["city"], rng.choice(CITIES)),
+        (["transport"], rng.choice(TRANSPORTS)),
+        (["stocks", "stocks_add"], rng.choice(STOCKS)),
+        (["news", "news_add"], rng.choice(NEWS)),
+    ])
+    buttons, value = choice
+    return [
+        # Loads the preferences from the API
+        Step("/changepref", text("/changepref"), [("/changepref", "sendMessage", 2)]),
+        *(Step("preference button", click(data), [("preference button", "sendMessage", 1)]) for data in buttons),
+        Step("preference update", text(value), [("preference update", "sendMessage", 1)]),
+    ]
+
+
+class SimulatedUser:
+    """
+    A user chatting with the bot, keeps the time of every reply the bot sent to the chat.
+    """
+
+    def __init__(self, chat_id: int):
+        """
+        Initialize the user.
+
+        :param chat_id: ID of the private chat, which is also the user ID.
+        """
+        self.chat_id = chat_id
+        self.replies = {}
+        self.arrived = asyncio.Event()
+
+    def receive(self, call: dict):
+        """
+        Records a Bot API call the bot made for the chat.
+
+        :param call: The call recorded by the Telegram stand-in.
+        """
+        self.replies.setdefault(call["method"], []).append(call["time"])
+        self.arrived.set()
+
+    async def send(self, telegram: TelegramStandIn, step: Step, timeout: float) -> dict:
+        """
+        Hands the update of a step to Telegram and waits for the replies it expects.
+
+        :param telegram: The stand-in the bot polls.
+        :param step: The step, see Step.
+        :param timeout: Seconds to wait for all replies.
+        :return: Latency in seconds per row of the replies that arrived, the rest timed out.
+        """
+        expected = {
+            row: (method, len(self.replies.get(method, [])) + count - 1)
+            for row, method, count in step.replies
+        }
+        received_at = time.monotonic()
+        telegram.updates.put_nowait(step.update)
+        deadline = received_at + timeout
+
+        latencies = {}
+        while len(latencies) < len(expected):
+            self.arrived.clear()
+            for row, (method, index) in expected.items():
+                times = self.replies.get(method, [])
+                if row not in latencies and len(times) > index:
+                    latencies[row] = times[index] - received_at
+            if len(latencies) == len(expected):
+                break
+            try:
+                await asyncio.wait_for(self.arrived.wait(), timeout=deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+        return latencies
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Returns the value below which the given fraction of the sorted values lies.
+
+    :param values: Sorted values.
+    :param fraction: The fraction, e.g. 0.95.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies: list, timeouts: int) -> dict:
+    """
+    Summarizes the latencies of one row of the report.
+
+    :param latencies: End-to-end latency of every reply in seconds.
+    :param timeouts: Number of replies that did not arrive in time.
+    :return: Number of replies, timeouts and latency percentiles in milliseconds.
+    """
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "replies": len(values),
+        "timeouts": timeouts,
+        "p50_ms": round(percentile(values, 0.5), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(values[-1], 1) if values else 0.0,
+    }
+
+
+async def simulate_users(telegram: TelegramStandIn, args: argparse.Namespace, mix: dict) -> dict:
+    """
+    Lets all users go through their flows, starting them evenly spread over the ramp-up.
+
+    :param telegram: The stand-in the bot polls.
+    :param args: The options of the load test.
+    :param mix: Weight per flow, see parse_mix.
+    :return: The report, see print_results.
+    """
+    users = {str(chat_id): SimulatedUser(chat_id) for chat_id in range(FIRST_CHAT_ID, FIRST_CHAT_ID + args.users)}
+
+    def route_reply(call: dict):
+        user = users.get(str(call["params"].get("chat_id")))
+        if user is not None:
+            user.receive(call)
+
+    telegram.listeners.append(route_reply)
+    flows, weights = zip(*mix.items())
+    latencies = {}
+    timeouts = Counter()
+    updates = 0
+    aborted = 0
+
+    async def run_user(index: int, user: SimulatedUser):
+        nonlocal updates, aborted
+        rng = random.Random(f"{args.seed}-{user.chat_id}")
+        await asyncio.sleep(args.ramp_up * index / args.users)
+        for _ in range(args.rounds):
+            flow = rng.choices(flows, weights)[0]
+            for step in build_flow(flow, telegram, user.chat_id, rng):
+                await asyncio.sleep(rng.uniform(0, args.think_time))
+                received = await user.send(telegram, step, args.timeout)
+                updates += 1
+                for row, _, _ in step.replies:
+                    if row in received:
+                        latencies.setdefault(row, []).append(received[row])
+                    else:
+                        timeouts[row] += 1
+                # The conversation state of the user is unknown after a lost reply
+                if len(received) < len(step.replies):
+                    aborted += 1
+                    return
+
+    started_at = time.monotonic()
+    await asyncio.gather(*(run_user(index, user) for index, user in enumerate(users.values())))
+    duration = time.monotonic() - started_at
+    return {
+        "users": args.users,
+        "aborted_users": aborted,
+        "updates": updates,
+        "duration_s": round(duration, 3),
+        "updates_per_s": round(updates / duration, 2) if duration else 0.0,
+        "bot_api_calls": Counter(call["method"] for call in telegram.calls),
+        "steps": {row: summarize(latencies.get(row, []), timeouts[row]) for row in dict.fromkeys([*latencies, *timeouts])},
+    }
+
+
+def speech_stand_ins(latency: float) -> dict:
+    """
+    Builds stand-ins for the speech conversion, which needs ffmpeg and Google's speech services.
+    They take `latency` seconds and share the semaphore of the real conversion, so its limit still applies.
+
+    :param latency: Seconds a conversion takes.
+    :return: Replacement per function of speech_utils.
+    """
+    import speech_utils
+
+    async def convert_voice_to_text(voice: io.BytesIO) -> str:
+        async with speech_utils._semaphore:
+            await asyncio.sleep(latency)
+        return random.choice(MESSAGES)
+
+    async def generate_voice_message(text: str) -> io.BytesIO:
+        async with speech_utils._semaphore:
+            await asyncio.sleep(latency)
+        voice = io.BytesIO(b"OggS")
+        voice.name = "voice.ogg"
+        return voice
+
+    return {"convert_voice_to_text": convert_voice_to_text, "generate_voice_message": generate_voice_message}
+
+
+def print_results(results: dict):
+    """
+    Prints the report as a table.
+
+    :param results: The report, see simulate_users.
+    """
+    print(
+        f"{results['users']} users ({results['aborted_users']} aborted), {results['updates']} updates "
+        f"in {results['duration_s']:.1f}s ({results['updates_per_s']:.2f} updates/s)"
+    )
+    print(f"{'step':<20}{'replies':>9}{'timeouts':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for row, result in results["steps"].items():
+        print(
+            f"{row:<20}{result['replies']:>9}{result['timeouts']:>10}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}"
+        )
+    calls = ", ".join(f"{method} {count}" for method, count in results["bot_api_calls"].most_common())
+    print(f"Bot API calls: {calls}")
+    print(f"API calls: {', '.join(f'{endpoint} {count}' for endpoint, count in results['api_calls'].items()) or 'none'}")
+
+
+async def main(argv=None) -> dict:
+    """
+    Runs the load test with the options of the command line.
+
+    :param argv: The options, e.g. ["--users", "500"], sys.argv by default.
+    :return: The report, see simulate_users.
+    """
+    parser = argparse.ArgumentParser(description="Simulate Telegram users chatting with the bot against local stand-ins.")
+    parser.add_argument("--users", type=int, default=200, help="Number of simulated users")
+    parser.add_argument("--rounds", type=int, default=3, help="Flows every user goes through")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which the users start")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Maximum seconds a user waits before the next update")
+    parser.add_argument("--mix", type=str, default=None, metavar="FLOW=WEIGHT,...",
+                        help=f"Weights of the flows, e.g. text=6,voice=2,onboarding=1,preferences=1 (flows: {', '.join(FLOWS)})")
+    parser.add_argument("--answer-latency", type=float, default=1.0, help="Seconds the API takes for /answer")
+    parser.add_argument("--preference-latency", type=float, default=0.02, help="Seconds the API takes for /preferences")
+    parser.add_argument("--speech-latency", type=float, default=0.5, help="Seconds a speech conversion takes")
+    parser.add_argument("--telegram-latency", type=float, default=0.02, help="Seconds every Bot API call takes")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds a user waits for a reply before giving up")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the choices of the users")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    except ValueError as e:
+        parser.error(str(e))
+
+    # The users and stand-ins get their own event loop, so their work does not delay the bot
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="stand-ins", daemon=True)
+    thread.start()
+
+    def on_stand_ins(coroutine):
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    async def create_stand_ins():
+        telegram = TelegramStandIn(latency=args.telegram_latency)
+        api = ApiStandIn(answer_latency=args.answer_latency, preference_latency=args.preference_latency)
+        await telegram.start()
+        await api.start()
+        return telegram, api
+
+    async def close_connections():
+        # Connections the bot kept open still wait for their next request
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    telegram, api = await on_stand_ins(create_stand_ins())
+    # Users changing their preferences already went through the onboarding
+    for chat_id in range(FIRST_CHAT_ID, FIRST_CHAT_ID + args.users):
+        api.seed_preferences(chat_id, {
+            "course": "IN22", "cafeteria": CANTEENS[0], "city": CITIES[0],
+            "preferred_transport_medium": TRANSPORTS[0], "stocks": STOCKS[:2], "news": NEWS[:2],
+        })
+    # Per-request info logs of the bot would dominate the measurements
+    logging.disable(logging.INFO)
+
+    environment = {"TELEGRAM_BASE_URL": telegram.base_url, "API_BASE_URL": api.base_url, "BOT_MODE": "polling"}
+    try:
+        # The bot reads its settings when it is imported, so it is only imported here
+        with patch.dict(os.environ, environment):
+            import api_client
+            import speech_utils
+            from bot import BotApp
+
+            with patch.object(api_client, "API_BASE_URL", api.base_url), \
+                    patch.multiple(speech_utils, **speech_stand_ins(args.speech_latency)):
+                await api_client.close_client()
+                application = BotApp("123456:LOAD-TEST").application
+                await application.initialize()
+                await application.start()
+                await application.updater.start_polling(poll_interval=0)
+                try:
+                    results = await on_stand_ins(simulate_users(telegram, args, mix))
+                finally:
+                    await application.updater.stop()
+                    await application.stop()
+                    await application.shutdown()
+                    # post_shutdown only runs with run_polling, so the client of the API is closed here
+                    await api_client.close_client()
+        results["api_calls"] = dict(api.calls)
+    finally:
+        await on_stand_ins(telegram.stop())
+        await on_stand_ins(api.stop())
+        await on_stand_ins(close_connections())
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        logging.disable(logging.NOTSET)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,229 @@
+"""Module with a local stand-in for the Telegram Bot API, for tests and load tests without Telegram."""
+
+import json
+import time
+import asyncio
+import logging
+import itertools
+from email.parser import BytesParser
+from urllib.parse import parse_qs
+
+# Bot the stand-in pretends to be
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "StandIn", "username": "stand_in_bot"}
+
+
+class TelegramStandIn:
+    """
+    Minimal HTTP server speaking enough of the Bot API for the bot to run against it.
+    It records every call, answers sendMessage/sendVoice with plausible messages, hands queued
+    updates to getUpdates and serves the audio of incoming voice messages.
+    """
+
+    def __init__(self, latency: float = 0.0, voice_audio: bytes = b"OggS"):
+        """
+        Initialize the stand-in.
+
+        :param latency: Seconds every API call takes, e.g. 0.05 to mimic the real API.
+        :param voice_audio: Audio returned for downloaded voice messages.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.latency = latency
+        self.voice_audio = voice_audio
+        self.calls = []
+        self.listeners = []
+        self.updates = asyncio.Queue()
+        self.server = None
+        self.port = None
+        self._ids = itertools.count(1)
+
+    @property
+    def base_url(self) -> str:
+        """
+        Base URL to pass to the bot, e.g. "http://127.0.0.1:8081".
+        """
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Starts the server, on a free port unless one is given.
+
+        :param host: Address to listen on.
+        :param port: Port to listen on, 0 for a free port.
+        """
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops the server.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def text_update(self, chat_id: int, text: str) -> dict:
+        """
+        Builds an update with a text message of a user.
+
+        :param chat_id: ID of the private chat, which is also the user ID.
+        :param text: The text, e.g. "/start".
+        :return: The update as sent by Telegram.
+        """
+        message = self._message(chat_id, text=text, sender=self._user(chat_id))
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._ids), "message": message}
+
+    def voice_update(self, chat_id: int) -> dict:
+        """
+        Builds an update with a voice message of a user.
+
+        :param chat_id: ID of the private chat, which is also the user ID.
+        :return: The update as sent by Telegram.
+        """
+        voice = {"file_id": f"voice-{chat_id}", "file_unique_id": f"voice-{chat_id}", "duration": 2}
+        return {"update_id": next(self._ids), "message": self._message(chat_id, voice=voice, sender=self._user(chat_id))}
+
+    def callback_update(self, chat_id: int, data: str) -> dict:
+        """
+        Builds an update for a click on an inline button.
+
+        :param chat_id: ID of the private chat, which is also the user ID.
+        :param data: Callback data of the button, e.g. "canteen".
+        :return: The update as sent by Telegram.
+        """
+        query = {
+            "id": str(next(self._ids)),
+            "from": self._user(chat_id),
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": self._message(chat_id, text="Wähle eine Option aus:", sender=BOT_USER),
+        }
+        return {"update_id": next(self._ids), "callback_query": query}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves the HTTP/1.1 requests of one connection.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                http_method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, content_type, content = await self._route(http_method, path, headers, body)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(content)}\r\n\r\n".encode() + content
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, http_method: str, path: str, headers: dict, body: bytes) -> tuple:
+        """
+        Answers a Bot API call ("/bot<token>/<method>") or a file download ("/file/bot<token>/<path>").
+
+        :return: Status line, content type and body of the response.
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if path.startswith("/file/"):
+            return "200 OK", "application/octet-stream", self.voice_audio
+
+        api_method = path.rsplit("/", 1)[-1]
+        params = self._parse_params(headers.get("content-type", ""), body)
+        call = {"method": api_method, "params": params, "time": time.monotonic()}
+        self.calls.append(call)
+        for listener in self.listeners:
+            listener(call)
+
+        result = await self._result(api_method, params)
+        return "200 OK", "application/json", json.dumps({"ok": True, "result": result}).encode()
+
+    async def _result(self, api_method: str, params: dict):
+        """
+        Returns the result of a Bot API method.
+
+        :param api_method: The method, e.g. "sendMessage".
+        :param params: The parameters of the call.
+        :return: The result Telegram would return.
+        """
+        if api_method == "getMe":
+            return BOT_USER
+        if api_method == "getUpdates":
+            return await self._get_updates(float(params.get("timeout", 0)))
+        if api_method == "getFile":
+            file_id = params["file_id"]
+            return {"file_id": file_id, "file_unique_id": file_id, "file_path": f"voice/{file_id}.ogg"}
+
+        chat_id = int(params.get("chat_id", 0))
+        if api_method == "sendMessage":
+            return self._message(chat_id, text=params.get("text", ""), sender=BOT_USER)
+        if api_method == "sendVoice":
+            file_id = f"sent-{next(self._ids)}"
+            voice = {"file_id": file_id, "file_unique_id": file_id, "duration": 2}
+            return self._message(chat_id, voice=voice, sender=BOT_USER)
+
+        # setWebhook, deleteWebhook, sendChatAction, answerCallbackQuery, ...
+        return True
+
+    async def _get_updates(self, timeout: float) -> list:
+        """
+        Hands out the queued updates, waiting up to `timeout` seconds for the first one (long polling).
+        """
+        try:
+            updates = [await asyncio.wait_for(self.updates.get(), timeout=max(timeout, 0.01))]
+        except asyncio.TimeoutError:
+            return []
+        while not self.updates.empty():
+            updates.append(self.updates.get_nowait())
+        return updates
+
+    @staticmethod
+    def _parse_params(content_type: str, body: bytes) -> dict:
+        """
+        Parses the parameters of a call sent as JSON, form data or multipart form data.
+        """
+        if not body:
+            return {}
+        if content_type.startswith("application/json"):
+            return json.loads(body)
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            params = {}
+            for part in message.get_payload():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename() is None:
+                    params[name] = part.get_payload(decode=True).decode()
+            return params
+        return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        """
+        Returns the user of a private chat.
+        """
+        return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+
+    def _message(self, chat_id: int, sender: dict, **content) -> dict:
+        """
+        Returns a message in a private chat.
+        """
+        return {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": sender,
+            **content,
+        }
@@ -1,13 +1,18 @@
 """Module for building and running the Telegram bot application."""
 
+import os
+
 from telegram.ext import (
     Application,
+    CommandHandler,
     MessageHandler,
     filters,
 )
 
+import api_client
 from command_handlers import CommandHandlers
 from message_handlers import MessageHandlers
+from update_processor import ChatOrderedUpdateProcessor
 
 
 class BotApp:
@@ -16,8 +21,31 @@ class BotApp:
     def __init__(self, token: str):
         """
         Initialize the bot application with the given token.
+
+        The environment selects how updates arrive and where the Bot API is:
+        BOT_MODE ("polling" or "webhook"), BOT_MAX_CONCURRENT_UPDATES, TELEGRAM_BASE_URL
+        (e.g. a local stand-in server) and for webhooks WEBHOOK_URL, WEBHOOK_LISTEN,
+        WEBHOOK_PORT, WEBHOOK_PATH and WEBHOOK_SECRET.
         """
-        self.application = Application.builder().token(token).build()
+        self.mode = os.getenv("BOT_MODE", "polling")
+        self.webhook_url = os.getenv("WEBHOOK_URL", "")
+        self.webhook_listen = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+        self.webhook_port = int(os.getenv("WEBHOOK_PORT", "3000"))
+        self.webhook_path = os.getenv("WEBHOOK_PATH", "telegram")
+        self.webhook_secret = os.getenv("WEBHOOK_SECRET")
+        max_concurrent_updates = int(os.getenv("BOT_MAX_CONCURRENT_UPDATES", "32"))
+        base_url = os.getenv("TELEGRAM_BASE_URL")
+
+        builder = (
+            Application.builder()
+            .token(token)
+            # Updates of different chats run side by side, the updates of one chat stay in order
+            .concurrent_updates(ChatOrderedUpdateProcessor(max_concurrent_updates))
+            .post_shutdown(self._close_api_client)
+        )
+        if base_url:
+            builder = builder.base_url(f"{base_url}/bot").base_file_url(f"{base_url}/file/bot")
+        self.application = builder.build()
         self.msg_handlers = MessageHandlers()
         self.cmd_handlers = CommandHandlers()
         self._configure_handlers()
@@ -29,6 +57,7 @@ class BotApp:
         that listens for text or voice messages.
         """
         self.cmd_handlers.configure_conversation_handlers(self.application)
+        self.application.add_handler(CommandHandler("voice", self.msg_handlers.toggle_voice))
         message_filter = (filters.TEXT & ~filters.COMMAND) | filters.VOICE
         self.application.add_handler(
             MessageHandler(message_filter, self.msg_handlers.handle_incoming_message)
@@ -40,11 +69,26 @@ class BotApp:
         """
         self.msg_handlers.configure_proactivity_jobs(self.application)
 
+    async def _close_api_client(self, application: Application):
+        """
+        Close the pooled connections to the API when the bot shuts down.
+        """
+        await api_client.close_client()
+
     def run(self):
         """
-        Start the bot's polling loop.
+        Start receiving updates, by long polling or as a webhook server.
         """
-        self.application.run_polling()
+        if self.mode == "webhook":
+            self.application.run_webhook(
+                listen=self.webhook_listen,
+                port=self.webhook_port,
+                url_path=self.webhook_path,
+                webhook_url=f"{self.webhook_url}/{self.webhook_path}",
+                secret_token=self.webhook_secret
+            )
+        else:
+            self.application.run_polling()
 
 
 
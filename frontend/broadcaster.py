@@ -0,0 +1,166 @@
+"""Module for delivering messages to many chats within Telegram's rate limits."""
+
+import os
+import time
+import asyncio
+import logging
+import datetime
+import functools
+
+from telegram.error import RetryAfter, TelegramError
+
+from voice_cache import voice_cache as shared_voice_cache
+
+# Telegram allows about 30 messages per second overall and about one message per second per chat
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+PER_CHAT_RATE = float(os.getenv("TELEGRAM_PER_CHAT_RATE", "1"))
+
+# A text and its voice message may go to a chat right after each other
+PER_CHAT_BURST = 2
+
+# Number of chats served at the same time
+SENDER_COUNT = int(os.getenv("BROADCAST_SENDERS", "8"))
+
+# Number of times a message is retried after Telegram answered with RetryAfter
+MAX_RETRIES = 3
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average and bursts of up to `capacity` operations.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Initialize a full bucket.
+
+        :param rate: Tokens added per second.
+        :param capacity: Maximum number of tokens the bucket holds.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Waits until a token is available and takes it.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Returns the given percentile of a list of values (nearest rank).
+
+    :param values: The values, e.g. delivery latencies in seconds.
+    :param fraction: The percentile as a fraction, e.g. 0.95.
+    :return: The percentile, or 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, int(round(fraction * len(ordered))) - 1)]
+
+
+class Broadcaster:
+    """
+    Sends a text and a voice message to many chats with a pool of concurrent senders,
+    a global and a per-chat token bucket and retries after RetryAfter.
+    """
+
+    def __init__(self, bot, senders: int = SENDER_COUNT, global_rate: float = GLOBAL_RATE,
+                 per_chat_rate: float = PER_CHAT_RATE, voice_cache=shared_voice_cache):
+        """
+        Initialize the broadcaster.
+
+        :param bot: The Telegram bot used for sending.
+        :param senders: Number of chats served at the same time.
+        :param global_rate: Messages per second over all chats.
+        :param per_chat_rate: Messages per second to a single chat.
+        :param voice_cache: Cache of the voice messages, identical texts are synthesized and uploaded once.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.bot = bot
+        self.senders = senders
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets = {}
+        self.voice_cache = voice_cache
+
+    async def _send(self, method, chat_id: int, **kwargs):
+        """
+        Sends a single message once both rate limits allow it, waiting and retrying after RetryAfter.
+
+        :param method: Bot method to call, e.g. bot.send_message.
+        :param chat_id: The chat to send to.
+        """
+        chat_bucket = self.chat_buckets.setdefault(chat_id, TokenBucket(self.per_chat_rate, capacity=PER_CHAT_BURST))
+        for attempt in range(MAX_RETRIES + 1):
+            await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await method(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = e.retry_after
+                if isinstance(delay, datetime.timedelta):
+                    delay = delay.total_seconds()
+                self.logger.info(f"Flood control für Chat {chat_id}, neuer Versuch in {delay} Sekunden.")
+                await asyncio.sleep(delay)
+
+    async def broadcast(self, messages: list, without_voice: set = frozenset(), started_at: float = None) -> dict:
+        """
+        Delivers a text and a voice message to every chat.
+
+        :param messages: Tuples of chat ID and text, e.g. [(111, "Guten Morgen!")].
+        :param without_voice: IDs of chats that turned voice messages off and only get the text.
+        :param started_at: time.monotonic() at the start of the job, so that the latencies include
+            fetching the messages from the API; defaults to the start of the broadcast.
+        :return: Delivery statistics with the number of sent and failed chats and the
+            p50/p95 time in seconds from the start of the job until a chat got its messages.
+        """
+        if started_at is None:
+            started_at = time.monotonic()
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        latencies = []
+        failed = []
+
+        async def sender():
+            while not queue.empty():
+                chat_id, text = queue.get_nowait()
+                try:
+                    await self._send(self.bot.send_message, chat_id, text=text)
+                    if chat_id not in without_voice:
+                        await self.voice_cache.send(functools.partial(self._send, self.bot.send_voice, chat_id), text)
+                    latencies.append(time.monotonic() - started_at)
+                except (TelegramError, OSError, ValueError, RuntimeError) as e:
+                    self.logger.warning(f"Nachricht an Chat {chat_id} konnte nicht gesendet werden: {e}")
+                    failed.append(chat_id)
+
+        await asyncio.gather(*(sender() for _ in range(max(1, min(self.senders, len(messages))))))
+
+        stats = {
+            "sent": len(latencies),
+            "failed": len(failed),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "duration": time.monotonic() - started_at,
+        }
+        self.logger.info(
+            f"Broadcast: {stats['sent']} gesendet, {stats['failed']} fehlgeschlagen, "
+            f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s, Dauer {stats['duration']:.2f}s"
+        )
+        return stats
@@ -1,7 +1,11 @@
-import os
+import io
+import time
+import asyncio
 import logging
 import datetime
 from telegram import Update
+from telegram.constants import ChatAction
+from telegram.error import TelegramError
 from telegram.ext import (
     ContextTypes,
     CallbackContext,
@@ -10,6 +14,11 @@ from telegram.ext import (
 
 import speech_utils
 import api_client
+from broadcaster import Broadcaster
+from voice_cache import voice_cache
+
+# Telegram shows a chat action for about five seconds, so it is repeated while the voice is generated
+CHAT_ACTION_INTERVAL = 4
 
 
 class MessageHandlers:
@@ -19,73 +28,140 @@ class MessageHandlers:
 
     def __init__(self):
         """
-        Initialize the logger and set BASE_DIR for file operations.
-        You can define BASE_DIR in the constructor as well.
+        Initialize the logger.
         """
         self.logger = logging.getLogger(__name__)
-        self.BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-    async def send_morning_message(self, context: ContextTypes.DEFAULT_TYPE):
+    @staticmethod
+    def voice_enabled(chat_data: dict) -> bool:
         """
-        Sends the daily morning message via the JobQueue.
+        Returns whether a chat gets voice messages, which is the default until it turns them off with /voice.
+
+        :param chat_data: The data the bot keeps for the chat.
         """
-        response = api_client.get_all_morning_messages()
+        return chat_data.get("voice", True)
 
-        if isinstance(response, str):
-            self.logger.warning(f"Fehler beim Abrufen der Morgenmeldungen: {response}")
-            return
+    async def toggle_voice(self, update: Update, context: CallbackContext):
+        """
+        Turns voice messages for the chat off or on again, without voice no speech is synthesized.
+        """
+        enabled = not self.voice_enabled(context.chat_data)
+        context.chat_data["voice"] = enabled
+        if enabled:
+            await update.message.reply_text("Du bekommst meine Antworten wieder auch als Sprachnachricht. 🔊")
+        else:
+            await update.message.reply_text(
+                "Du bekommst meine Antworten jetzt nur noch als Text. 🔇 Mit /voice schaltest du sie wieder ein."
+            )
+
+    async def broadcast(self, context: ContextTypes.DEFAULT_TYPE, response: list, kind: str, started_at: float = None):
+        """
+        Sends the text and voice message of every item to its user with the rate-limited broadcaster.
 
+        :param context: The context of the job, provides the bot.
+        :param response: Items with user ID and text, e.g. [{"user_id": 111, "response": "Guten Morgen!"}].
+        :param kind: Name of the messages for the log, e.g. "Morgenmeldung".
+        :param started_at: time.monotonic() at the start of the job, the delivery latencies are measured from it.
+        """
+        messages = []
         for item in response:
             text = item["response"]
             user_id = item["user_id"]
 
             if text is None:
-                self.logger.warning(f"Keine Morgenmeldung für Benutzer {user_id} gefunden.")
+                self.logger.warning(f"Keine {kind} für Benutzer {user_id} gefunden.")
+                continue
+            # The API returns the user ID as the username string, the chat data is keyed by the integer ID
+            try:
+                chat_id = int(user_id)
+            except (TypeError, ValueError):
+                # A username that is no chat ID must not stop the delivery to everyone else
+                self.logger.warning(f"Benutzer {user_id} hat keine gültige Chat-ID, {kind} wird übersprungen.")
                 continue
+            messages.append((chat_id, text))
+
+        without_voice = {
+            int(chat_id) for chat_id, chat_data in context.application.chat_data.items()
+            if not self.voice_enabled(chat_data)
+        }
+        await Broadcaster(context.bot).broadcast(messages, without_voice, started_at)
+
+    async def send_morning_message(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Sends the daily morning message via the JobQueue.
+        """
+        # The latencies of the broadcast include fetching the messages from the API
+        started_at = time.monotonic()
+        response = await api_client.get_all_morning_messages()
 
-            voice_output_path = speech_utils.generate_voice_message(text)
-            await context.bot.send_message(chat_id=user_id, text=text)
-            await context.bot.send_voice(chat_id=user_id, voice=open(voice_output_path, "rb"))
+        if isinstance(response, str):
+            self.logger.warning(f"Fehler beim Abrufen der Morgenmeldungen: {response}")
+            return
+
+        await self.broadcast(context, response, "Morgenmeldung", started_at)
 
     async def send_proactivity_message(self, context: ContextTypes.DEFAULT_TYPE):
         """
         Sends the daily proactivity message via the JobQueue.
         """
-        response = api_client.get_all_proactivity_messages()
+        started_at = time.monotonic()
+        response = await api_client.get_all_proactivity_messages()
 
         if isinstance(response, str):
             self.logger.warning(f"Fehler beim Abrufen der Proaktivitätsmeldungen: {response}")
             return
 
-        for item in response:
-            text = item["response"]
-            user_id = item["user_id"]
-
-            if text is None:
-                self.logger.warning(f"Keine Proaktivitätsmeldung für Benutzer {user_id} gefunden.")
-                continue
-
-            voice_output_path = speech_utils.generate_voice_message(text)
-            await context.bot.send_message(chat_id=user_id, text=text)
-            await context.bot.send_voice(chat_id=user_id, voice=open(voice_output_path, "rb"))
+        await self.broadcast(context, response, "Proaktivitätsmeldung", started_at)
 
     async def handle_incoming_message(self, update: Update, context: CallbackContext):
         """
         Processes voice and text messages and returns an answer.
         """
         if update.message.voice:
-            voice_path = os.path.join(self.BASE_DIR, "output.ogg")
+            # The voice message is kept in memory, so several voice messages can be processed at the same time
             voice_file = await update.message.voice.get_file()
-            await voice_file.download_to_drive(voice_path)
-
-            input_text = speech_utils.convert_voice_to_text(voice_path)
-            text = api_client.get_answer(input_text, update.effective_user.id)
+            voice = io.BytesIO()
+            await voice_file.download_to_memory(voice)
+
+            try:
+                input_text = await speech_utils.convert_voice_to_text(voice)
+            except (RuntimeError, ValueError) as e:
+                # An empty or broken voice message still gets a reply
+                self.logger.warning(f"Sprachnachricht von Chat {update.effective_chat.id} konnte nicht umgewandelt werden: {e}")
+                await update.message.reply_text(speech_utils.NOT_UNDERSTOOD)
+                return
+            text = await api_client.get_answer(input_text, update.effective_user.id)
         else:
-            text = api_client.get_answer(update.message.text, update.effective_user.id)
+            text = await api_client.get_answer(update.message.text, update.effective_user.id)
 
-        voice_output_path = speech_utils.generate_voice_message(text)
+        # The text goes out right away, the voice follows once it is synthesized
         await update.message.reply_text(text)
-        await update.message.reply_voice(voice=open(voice_output_path, "rb"))
+        if self.voice_enabled(context.chat_data):
+            context.application.create_task(self.send_voice_reply(update, context, text), update=update)
+
+    async def send_voice_reply(self, update: Update, context: CallbackContext, text: str):
+        """
+        Sends the voice version of a reply, showing "recording voice" in the chat until it is ready.
+
+        :param update: The update that is answered.
+        :param context: The context of the update, provides the bot.
+        :param text: The text of the reply.
+        """
+        async def show_recording():
+            while True:
+                try:
+                    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.RECORD_VOICE)
+                except TelegramError:
+                    pass
+                await asyncio.sleep(CHAT_ACTION_INTERVAL)
+
+        action_task = asyncio.create_task(show_recording())
+        try:
+            await voice_cache.send(update.message.reply_voice, text)
+        except (TelegramError, OSError, ValueError, RuntimeError) as e:
+            self.logger.warning(f"Sprachnachricht für Chat {update.effective_chat.id} konnte nicht gesendet werden: {e}")
+        finally:
+            action_task.cancel()
 
     def configure_proactivity_jobs(self, application: Application):
         """
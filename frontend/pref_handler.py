@@ -38,7 +38,7 @@ class PreferenceHandler:
         """
         Retrieves the user's preferences and returns a formatted summary in German.
         """
-        prefs, status = api_client.get_preferences(update.effective_user.id)
+        prefs, status = await api_client.get_preferences(update.effective_user.id)
         if status == "success":
             summary = (
                 "Hier ist deine Übersicht:\n\n"
@@ -88,7 +88,7 @@ class PreferenceHandler:
         Updates the user's cafeteria preference with the text they provide.
         """
         new_canteen = update.message.text.strip()
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "cafeteria", new_canteen
         )
         await update.message.reply_text(response)
@@ -99,7 +99,7 @@ class PreferenceHandler:
         Updates the user's city preference.
         """
         new_residence = update.message.text.strip()
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "city", new_residence
         )
         await update.message.reply_text(response)
@@ -110,7 +110,7 @@ class PreferenceHandler:
         Updates the user's transport preference.
         """
         new_transport = update.message.text.strip()
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "preferred_transport_medium", new_transport
         )
         await update.message.reply_text(response)
@@ -121,7 +121,7 @@ class PreferenceHandler:
         Removes one or more stock items from the user's preferences.
         """
         stocks = [s.strip() for s in update.message.text.split(",")]
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "delete_stocks", stocks
         )
         await update.message.reply_text(response)
@@ -132,7 +132,7 @@ class PreferenceHandler:
         Adds one or more stock items to the user's preferences.
         """
         stocks = [s.strip() for s in update.message.text.split(",")]
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "add_stocks", stocks
         )
         await update.message.reply_text(response)
@@ -143,7 +143,7 @@ class PreferenceHandler:
         Removes specified news topics from the user's preferences.
         """
         chosen_news = [n.strip() for n in update.message.text.split(",")]
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "delete_news", chosen_news
         )
         await update.message.reply_text(response)
@@ -154,7 +154,7 @@ class PreferenceHandler:
         Adds specified news topics to the user's preferences.
         """
         chosen_news = [n.strip() for n in update.message.text.split(",")]
-        response = api_client.put_preference(
+        response = await api_client.put_preference(
             update.effective_user.id, "add_news", chosen_news
         )
         await update.message.reply_text(response)
@@ -192,6 +192,8 @@ class PreferenceHandler:
             await query.message.reply_text(
                 "Wähle eine Option aus:", reply_markup=reply_markup
             )
+            # The conversation waits for the click on one of the options
+            return BUTTON
         elif query.data == "news":
             keyboard = [
                 [InlineKeyboardButton("Nachrichtenthemen löschen", callback_data="news_delete")],
@@ -201,6 +203,7 @@ class PreferenceHandler:
             await query.message.reply_text(
                 "Wähle eine Option aus:", reply_markup=reply_markup
             )
+            return BUTTON
         elif query.data == "stocks_delete":
             return await self.ask_user_for_preference_change(
                 update,
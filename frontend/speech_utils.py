@@ -1,84 +1,128 @@
+import io
 import os
-import tempfile
+import asyncio
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import speech_recognition as gSTT
 from gtts import gTTS
 
-# Base directory for audio files
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Maximum number of voice messages that are converted at the same time
+MAX_CONCURRENT_CONVERSIONS = int(os.getenv("SPEECH_MAX_CONCURRENT", "4"))
 
+# gTTS and the speech recognition block, so they run in their own bounded thread pool
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CONVERSIONS, thread_name_prefix="speech")
+_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CONVERSIONS)
 
-def generate_voice_message(text: str) -> str:
+# Language and encoding of generated voice messages, part of the voice cache key
+VOICE_SETTINGS = {
+    "lang": "de",
+    "codec": "libvorbis",
+    "sample_rate": "24000",
+    "bitrate": "64k",
+}
+
+# Format of the audio handed to the speech recognition: 16 kHz mono 16-bit PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# Reply to voice messages that could not be recognized
+NOT_UNDERSTOOD = "Ich konnte die Sprache nicht verstehen."
+
+
+async def _run_blocking(func, *args):
+    """
+    Runs a blocking function in the speech thread pool.
+
+    :param func: The blocking function, e.g. tts.write_to_fp.
+    :return: The return value of the function.
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def _run_ffmpeg(audio: bytes, *args: str) -> bytes:
     """
-    Converts the given text into an OGG file and returns its path.
+    Pipes audio through ffmpeg (stdin to stdout) without blocking the event loop.
+
+    :param audio: The input audio, e.g. an MP3 file.
+    :param args: The output options, e.g. ("-f", "ogg", "-acodec", "libvorbis").
+    :return: The converted audio.
+    :raises RuntimeError: If ffmpeg fails.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-i", "pipe:0", *args, "pipe:1",
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    output, _ = await process.communicate(audio)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg ist mit Code {process.returncode} fehlgeschlagen.")
+    return output
+
+
+async def generate_voice_message(text: str) -> io.BytesIO:
+    """
+    Converts the given text into an OGG voice message in memory.
     The user-facing error messages remain in German as requested.
 
     :param text: The text to be converted to speech.
-    :return: The file path to the generated OGG file.
+    :return: A buffer with the OGG audio, ready to be sent with send_voice.
     :raises ValueError: If the provided text is empty or whitespace.
     """
     if not text.strip():
         raise ValueError("Text darf nicht leer sein.")
 
-    # Create a temporary MP3 file
-    temp_mp3 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    temp_mp3.close()
-
-    # Convert text to speech (German language)
-    tts = gTTS(text=text, lang="de")
-    tts.save(temp_mp3.name)
-
-    # Use ffmpeg to create the OGG file
-    ogg_path = os.path.join(BASE_DIR, "output.ogg")
-    subprocess.run(
-        [
-            "ffmpeg", "-y", "-i", temp_mp3.name,
-            "-acodec", "libvorbis", "-ar", "24000", "-ab", "64k", ogg_path
-        ]
-    )
+    async with _semaphore:
+        # Convert text to speech (German language)
+        mp3 = io.BytesIO()
+        tts = gTTS(text=text, lang=VOICE_SETTINGS["lang"])
+        await _run_blocking(tts.write_to_fp, mp3)
 
-    # Remove the temporary MP3 file
-    os.unlink(temp_mp3.name)
+        # Use ffmpeg to create the OGG audio
+        ogg = await _run_ffmpeg(
+            mp3.getvalue(),
+            "-f", "ogg",
+            "-acodec", VOICE_SETTINGS["codec"],
+            "-ar", VOICE_SETTINGS["sample_rate"],
+            "-ab", VOICE_SETTINGS["bitrate"]
+        )
 
-    return ogg_path
+    voice = io.BytesIO(ogg)
+    voice.name = "voice.ogg"
+    return voice
 
 
-def convert_voice_to_text(file_path: str) -> str:
+async def convert_voice_to_text(voice: io.BytesIO) -> str:
     """
-    Converts a given OGG file to text and returns the result.
+    Converts a given OGG voice message to text and returns the result.
     User-facing messages remain in German as requested.
 
-    :param file_path: The path to the OGG file.
+    :param voice: A buffer with the OGG audio, e.g. downloaded with download_to_memory.
     :return: The recognized text or an error message in German.
-    :raises FileNotFoundError: If the OGG file does not exist.
+    :raises ValueError: If the voice message is empty.
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Die Datei {file_path} existiert nicht.")
-
-    # Convert OGG to WAV using ffmpeg
-    temp_wav = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    temp_wav.close()
-
-    subprocess.run(
-        [
-            "ffmpeg", "-y", "-i", file_path,
-            "-ac", "1", "-ar", "16000", "-vn", temp_wav.name
-        ]
-    )
-
-    # Process the WAV file with speech_recognition
-    recognizer = gSTT.Recognizer()
-    with open(temp_wav.name, "rb") as wav_file:
-        audio_data = gSTT.AudioData(wav_file.read(), 16000, 2)
-
-    # Remove the temporary WAV file
-    os.unlink(temp_wav.name)
-
-    # Perform speech recognition
-    try:
-        text = recognizer.recognize_google(audio_data, language="de-DE")
-        return text
-    except gSTT.UnknownValueError:
-        return "Ich konnte die Sprache nicht verstehen."
-    except gSTT.RequestError:
-        return "Fehler: Ich kann die Spracherkennung gerade nicht erreichen."
+    audio = voice.getvalue()
+    if not audio:
+        raise ValueError("Die Sprachnachricht ist leer.")
+
+    async with _semaphore:
+        # Convert OGG to raw PCM using ffmpeg
+        pcm = await _run_ffmpeg(
+            audio,
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-vn"
+        )
+
+        # Process the audio with speech_recognition
+        recognizer = gSTT.Recognizer()
+        audio_data = gSTT.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+
+        # Perform speech recognition
+        try:
+            text = await _run_blocking(
+                lambda: recognizer.recognize_google(audio_data, language="de-DE")
+            )
+            return text
+        except gSTT.UnknownValueError:
+            return NOT_UNDERSTOOD
+        except gSTT.RequestError:
+            return "Fehler: Ich kann die Spracherkennung gerade nicht erreichen."
@@ -168,14 +168,14 @@ class StartHandler:
         )
         if update.message:
             await update.message.reply_text(summary)
-            await update.message.reply_text(api_client.post_preferences(user_id, user_info))
+            await update.message.reply_text(await api_client.post_preferences(user_id, user_info))
             await update.message.reply_text(
                 "Klicke jederzeit auf das Menü, um die Präferenzen zu ändern."
             )
         elif update.callback_query:
             await update.callback_query.message.reply_text(summary)
             await update.callback_query.message.reply_text(
-                api_client.post_preferences(user_id, user_info)
+                await api_client.post_preferences(user_id, user_info)
             )
             await update.callback_query.message.reply_text(
                 "Klicke jederzeit auf das Menü, um die Präferenzen zu ändern."
@@ -1,11 +1,13 @@
 import os
 import sys
 
+import asyncio
 import unittest
-from unittest.mock import patch, Mock
-import requests
+from unittest.mock import patch
+import httpx
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import api_client
 from api_client import (
     get_answer,
     get_all_morning_messages,
@@ -16,175 +18,218 @@ from api_client import (
 )
 
 
-class TestAPIClient(unittest.TestCase):
-    @patch("requests.get")
-    def test_get_answer_success(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"response": "Testantwort"}
-        mock_get.return_value = mock_resp
+class TestAPIClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        api_client._preference_cache.clear()
+        self.requests = []
+        self.responses = []
+        patcher = patch("api_client.RETRY_BASE_DELAY", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
-        result = get_answer("Hallo", 123)
+    async def asyncSetUp(self):
+        def handler(request):
+            self.requests.append(request)
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        api_client._client = httpx.AsyncClient(
+            base_url=api_client.API_BASE_URL,
+            transport=httpx.MockTransport(handler)
+        )
+
+    async def asyncTearDown(self):
+        await api_client.close_client()
+
+    def respond(self, *responses):
+        self.responses.extend(responses)
+
+    async def test_get_answer_success(self):
+        self.respond(httpx.Response(200, json={"response": "Testantwort"}))
+
+        result = await get_answer("Hallo", 123)
         self.assertEqual(result, "Testantwort")
-        mock_get.assert_called_once()
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0].url.params["user_id"], "123")
+
+    async def test_get_answer_logs_server_timing_when_slow(self):
+        self.respond(httpx.Response(
+            200,
+            json={"response": "Testantwort"},
+            headers={"Server-Timing": "llm.classify;dur=812.4, llm.generate;dur=4100.0, total;dur=5030.2"}
+        ))
 
-    @patch("requests.get")
-    def test_get_answer_failure(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 400
-        mock_get.return_value = mock_resp
+        with patch("api_client.SLOW_ANSWER_SECONDS", 0), self.assertLogs("api_client", "WARNING") as logs:
+            await get_answer("Hallo", 123)
 
-        result = get_answer("Hallo", 123)
+        self.assertIn("llm.generate;dur=4100.0", logs.output[0])
+
+    async def test_get_answer_failure(self):
+        self.respond(httpx.Response(400))
+
+        result = await get_answer("Hallo", 123)
         self.assertIn("400: Fehler", result)
 
-    @patch("requests.get", side_effect=requests.RequestException)
-    def test_get_answer_exception(self, mock_get):
-        result = get_answer("Hallo", 123)
+    async def test_get_answer_exception(self):
+        self.respond(*[httpx.ConnectError("refused")] * 3)
+
+        result = await get_answer("Hallo", 123)
         self.assertIn("nicht mit der API verbinden", result)
+        self.assertEqual(len(self.requests), 3)
 
-    @patch("requests.get")
-    def test_get_all_morning_messages_success(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"results": ["msg1", "msg2"]}
-        mock_get.return_value = mock_resp
+    async def test_get_answer_retries_unavailable_api(self):
+        self.respond(httpx.Response(503), httpx.Response(200, json={"response": "Testantwort"}))
 
-        result = get_all_morning_messages()
+        result = await get_answer("Hallo", 123)
+        self.assertEqual(result, "Testantwort")
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_retry_backoff_releases_concurrency_slot(self):
+        self.respond(
+            httpx.Response(503),
+            httpx.Response(200, json={"results": ["msg1"]}),
+            httpx.Response(200, json={"response": "Testantwort"}),
+        )
+
+        with patch("api_client._semaphore", asyncio.Semaphore(1)), patch("api_client.RETRY_BASE_DELAY", 0.2):
+            answer = asyncio.create_task(get_answer("Hallo", 123))
+            while not self.requests:
+                await asyncio.sleep(0)
+            # Während get_answer auf den nächsten Versuch wartet, ist der einzige Platz frei
+            morning = await get_all_morning_messages()
+            self.assertEqual(await answer, "Testantwort")
+
+        self.assertEqual(morning, ["msg1"])
+        self.assertEqual([request.url.path for request in self.requests], ["/answer", "/morning", "/answer"])
+
+    async def test_get_all_morning_messages_success(self):
+        self.respond(httpx.Response(200, json={"results": ["msg1", "msg2"]}))
+
+        result = await get_all_morning_messages()
         self.assertEqual(["msg1", "msg2"], result)
 
-    @patch("requests.get")
-    def test_get_all_morning_messages_failure(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 404
-        mock_get.return_value = mock_resp
+    async def test_get_all_morning_messages_failure(self):
+        self.respond(httpx.Response(404))
 
-        result = get_all_morning_messages()
+        result = await get_all_morning_messages()
         self.assertIn("404: Fehler", result)
 
-    @patch("requests.get", side_effect=requests.RequestException)
-    def test_get_all_morning_messages_exception(self, mock_get):
-        result = get_all_morning_messages()
+    async def test_get_all_morning_messages_exception(self):
+        self.respond(*[httpx.ConnectError("refused")] * 3)
+
+        result = await get_all_morning_messages()
         self.assertIn("nicht mit der API verbinden", result)
 
-    @patch("requests.get")
-    def test_get_all_proactivity_messages_success(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"results": ["pmsg1"]}
-        mock_get.return_value = mock_resp
+    async def test_get_all_proactivity_messages_success(self):
+        self.respond(httpx.Response(200, json={"results": ["pmsg1"]}))
 
-        result = get_all_proactivity_messages()
+        result = await get_all_proactivity_messages()
         self.assertEqual(["pmsg1"], result)
 
-    @patch("requests.get")
-    def test_get_all_proactivity_messages_failure(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 500
-        mock_get.return_value = mock_resp
+    async def test_get_all_proactivity_messages_failure(self):
+        self.respond(httpx.Response(500))
 
-        result = get_all_proactivity_messages()
+        result = await get_all_proactivity_messages()
         self.assertIn("500: Fehler", result)
 
-    @patch("requests.get", side_effect=requests.RequestException)
-    def test_get_all_proactivity_messages_exception(self, mock_get):
-        result = get_all_proactivity_messages()
+    async def test_get_all_proactivity_messages_exception(self):
+        self.respond(httpx.ReadTimeout("timeout"))
+
+        result = await get_all_proactivity_messages()
         self.assertIn("nicht mit der API verbinden", result)
+        self.assertEqual(len(self.requests), 1)
 
-    @patch("requests.get")
-    def test_get_preferences_success(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 200
-        mock_resp.json.return_value = {"course": "IN22"}
-        mock_get.return_value = mock_resp
+    async def test_get_preferences_success(self):
+        self.respond(httpx.Response(200, json={"course": "IN22"}))
 
-        prefs, status = get_preferences(999)
+        prefs, status = await get_preferences(999)
         self.assertEqual(status, "success")
         self.assertEqual(prefs, {"course": "IN22"})
 
-    @patch("requests.get")
-    def test_get_preferences_failure(self, mock_get):
-        mock_resp = Mock()
-        mock_resp.status_code = 404
-        mock_get.return_value = mock_resp
+    async def test_get_preferences_revalidates_cached_copy(self):
+        self.respond(
+            httpx.Response(200, json={"course": "IN22"}, headers={"ETag": '"7-3"'}),
+            httpx.Response(304, headers={"ETag": '"7-3"'})
+        )
 
-        prefs, status = get_preferences(999)
+        await get_preferences(999)
+        prefs, status = await get_preferences(999)
+
+        self.assertEqual((prefs, status), ({"course": "IN22"}, "success"))
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"7-3"')
+
+    async def test_get_preferences_failure(self):
+        self.respond(httpx.Response(404))
+
+        prefs, status = await get_preferences(999)
         self.assertEqual(status, "error")
         self.assertIn("404: Fehler", prefs)
 
-    @patch("requests.get", side_effect=requests.RequestException)
-    def test_get_preferences_exception(self, mock_get):
-        prefs, status = get_preferences(999)
+    async def test_get_preferences_exception(self):
+        self.respond(*[httpx.ConnectError("refused")] * 3)
+
+        prefs, status = await get_preferences(999)
         self.assertEqual(status, "error")
         self.assertIn("nicht abrufen", prefs)
 
-    @patch("requests.post")
-    def test_post_preferences_success(self, mock_post):
-        mock_resp = Mock()
-        mock_resp.status_code = 200
-        mock_post.return_value = mock_resp
+    async def test_post_preferences_success(self):
+        self.respond(httpx.Response(200))
 
-        result = post_preferences(999, {"canteen": "Mensa", "stocks": ["ABC"]})
+        result = await post_preferences(999, {"canteen": "Mensa A"})
         self.assertIn("erfolgreich gespeichert", result)
 
-    @patch("requests.post")
-    def test_post_preferences_failure(self, mock_post):
-        mock_resp = Mock()
-        mock_resp.status_code = 400
-        mock_post.return_value = mock_resp
+    async def test_post_preferences_failure(self):
+        self.respond(httpx.Response(400))
 
-        result = post_preferences(999, {})
+        result = await post_preferences(999, {})
         self.assertIn("400: Fehler", result)
 
-    @patch("requests.post", side_effect=requests.RequestException)
-    def test_post_preferences_exception(self, mock_post):
-        result = post_preferences(999, {})
-        self.assertIn("schon initialisiert", result)
+    async def test_post_preferences_is_not_retried_after_server_error(self):
+        self.respond(httpx.Response(503))
+
+        result = await post_preferences(999, {})
+        self.assertIn("503: Fehler", result)
+        self.assertEqual(len(self.requests), 1)
 
-    @patch("requests.put")
-    @patch("requests.get")
-    def test_put_preference_success(self, mock_get, mock_put):
-        mock_get_resp = Mock()
-        mock_get_resp.status_code = 200
-        mock_get_resp.json.return_value = {"course": "IN22"}
-        mock_get.return_value = mock_get_resp
+    async def test_post_preferences_exception(self):
+        self.respond(*[httpx.ConnectError("refused")] * 3)
 
-        mock_put_resp = Mock()
-        mock_put_resp.status_code = 200
-        mock_put.return_value = mock_put_resp
+        result = await post_preferences(999, {})
+        self.assertIn("schon initialisiert", result)
+
+    async def test_put_preference_success(self):
+        self.respond(httpx.Response(200, json={"course": "IN23"}))
 
-        result = put_preference(999, "course", "IN23")
+        result = await put_preference(999, "course", "IN23")
         self.assertIn("erfolgreich aktualisiert", result)
+        self.assertEqual(self.requests[0].method, "PATCH")
+        self.assertEqual(self.requests[0].url.path, "/preferences/999")
+        self.assertEqual(self.requests[0].content, b'{"course":"IN23"}')
 
-    @patch("requests.put")
-    @patch("requests.get")
-    def test_put_preference_invalid_key(self, mock_get, mock_put):
-        mock_get_resp = Mock()
-        mock_get_resp.status_code = 200
-        mock_get_resp.json.return_value = {"course": "IN22"}
-        mock_get.return_value = mock_get_resp
+    async def test_put_preference_updates_cached_copy(self):
+        self.respond(httpx.Response(200, json={"city": "Berlin"}, headers={"ETag": '"7-4"'}))
 
-        result = put_preference(999, "invalid_key", "some_value")
-        self.assertIn("Ungültige Präferenz", result)
-        mock_put.assert_not_called()
+        await put_preference(999, "city", "Berlin")
 
-    @patch("requests.put")
-    @patch("requests.get")
-    def test_put_preference_failure(self, mock_get, mock_put):
-        mock_get_resp = Mock()
-        mock_get_resp.status_code = 200
-        mock_get_resp.json.return_value = {"course": "IN22"}
-        mock_get.return_value = mock_get_resp
+        self.assertEqual(api_client._preference_cache[999], ('"7-4"', {"city": "Berlin"}))
 
-        mock_put_resp = Mock()
-        mock_put_resp.status_code = 400
-        mock_put.return_value = mock_put_resp
+    async def test_put_preference_invalid_key(self):
+        result = await put_preference(999, "invalid_key", "some_value")
+        self.assertIn("Ungültige Präferenz", result)
+        self.assertEqual(self.requests, [])
+
+    async def test_put_preference_failure(self):
+        self.respond(httpx.Response(400))
 
-        result = put_preference(999, "course", "IN23")
+        result = await put_preference(999, "course", "IN23")
         self.assertIn("Fehler bei der Aktualisierung: 400", result)
 
-    @patch("requests.get", side_effect=requests.RequestException)
-    def test_put_preference_get_exception(self, mock_get):
-        result = put_preference(999, "course", "IN23")
+    async def test_put_preference_exception(self):
+        self.respond(*[httpx.ConnectError("refused")] * 3)
+
+        result = await put_preference(999, "course", "IN23")
         self.assertIn("nicht ändern", result)
 
 
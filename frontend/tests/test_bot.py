@@ -3,10 +3,13 @@ import sys
 
 import unittest
 from unittest.mock import patch, MagicMock
+from telegram import Update
 
 # Wir nehmen an, dein Modul heißt einfach "bot".
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from bot import BotApp
+from update_processor import ChatOrderedUpdateProcessor
+from benchmarks.telegram_stand_in import TelegramStandIn
 
 class TestBotApp(unittest.TestCase):
     @patch("bot.Application")
@@ -16,17 +19,71 @@ class TestBotApp(unittest.TestCase):
         mock_app_instance = MagicMock()
         mock_application_cls.builder.return_value = mock_builder
         mock_builder.token.return_value = mock_builder
+        mock_builder.concurrent_updates.return_value = mock_builder
+        mock_builder.post_shutdown.return_value = mock_builder
         mock_builder.build.return_value = mock_app_instance
 
         # BotApp anlegen
         bot_app = BotApp(token="TEST_TOKEN")
 
+        # Updates werden parallel, aber pro Chat in Reihenfolge verarbeitet
+        processor = mock_builder.concurrent_updates.call_args.args[0]
+        self.assertIsInstance(processor, ChatOrderedUpdateProcessor)
+        self.assertEqual(processor.max_concurrent_updates, 32)
+
         # run() aufrufen
         bot_app.run()
 
         # Sicherstellen, dass run_polling auf der Application aufgerufen wurde
         mock_app_instance.run_polling.assert_called_once()
 
+    @patch.dict(os.environ, {"BOT_MODE": "webhook", "WEBHOOK_URL": "https://bot.example.org", "WEBHOOK_SECRET": "geheim"})
+    @patch("bot.Application")
+    def test_bot_app_run_webhook(self, mock_application_cls):
+        mock_builder = mock_application_cls.builder.return_value
+        mock_builder.token.return_value = mock_builder
+        mock_builder.concurrent_updates.return_value = mock_builder
+        mock_builder.post_shutdown.return_value = mock_builder
+        mock_app_instance = mock_builder.build.return_value
+
+        BotApp(token="TEST_TOKEN").run()
+
+        mock_app_instance.run_polling.assert_not_called()
+        mock_app_instance.run_webhook.assert_called_once_with(
+            listen="0.0.0.0",
+            port=3000,
+            url_path="telegram",
+            webhook_url="https://bot.example.org/telegram",
+            secret_token="geheim"
+        )
+
+
+class TestBotAppWithStandIn(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.telegram = TelegramStandIn()
+        await self.telegram.start()
+        self.addAsyncCleanup(self.telegram.stop)
+
+    @patch("message_handlers.voice_cache.send")
+    @patch("message_handlers.api_client.get_answer", return_value="Antwort vom Bot")
+    async def test_text_message_is_answered_through_bot_api(self, mock_get_answer, mock_send_voice):
+        with patch.dict(os.environ, {"TELEGRAM_BASE_URL": self.telegram.base_url}):
+            bot_app = BotApp(token="123:TEST")
+        application = bot_app.application
+        await application.initialize()
+        self.addAsyncCleanup(application.shutdown)
+        await application.start()
+        self.addAsyncCleanup(application.stop)
+
+        update = Update.de_json(self.telegram.text_update(111, "Hallo Bot!"), application.bot)
+        await application.process_update(update)
+
+        # Die Antwort ging als sendMessage an den Stand-in-Server
+        mock_get_answer.assert_called_once_with("Hallo Bot!", 111)
+        replies = [call["params"] for call in self.telegram.calls if call["method"] == "sendMessage"]
+        self.assertEqual(replies[0]["chat_id"], "111")
+        self.assertEqual(replies[0]["text"], "Antwort vom Bot")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import io
+import os
+import sys
+
+import time
+import unittest
+import datetime
+from unittest.mock import patch, AsyncMock
+from telegram.error import RetryAfter, Forbidden
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from broadcaster import Broadcaster, TokenBucket, percentile
+from voice_cache import VoiceCache
+
+
+def uploaded_voices(send_voice):
+    # Hochgeladene Sprachnachrichten als (chat_id, Inhalt), bei reply_voice ist die chat_id None
+    return [(call.kwargs.get("chat_id"), call.kwargs["voice"].input_file_content) for call in send_voice.call_args_list]
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    @patch("broadcaster.asyncio.sleep", new_callable=AsyncMock)
+    async def test_acquire_waits_when_empty(self, mock_sleep):
+        bucket = TokenBucket(rate=1, capacity=2)
+
+        # Die ersten zwei Tokens sind sofort verfügbar
+        await bucket.acquire()
+        await bucket.acquire()
+        mock_sleep.assert_not_called()
+
+        # Danach muss gewartet werden, die Wartezeit füllt den Eimer wieder auf
+        with patch("broadcaster.time.monotonic", side_effect=[bucket.updated_at, bucket.updated_at + 1]):
+            await bucket.acquire()
+        mock_sleep.assert_awaited_once()
+
+
+class TestPercentile(unittest.TestCase):
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.95), 95.0)
+        self.assertEqual(percentile([], 0.95), 0.0)
+
+
+class TestBroadcaster(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch("voice_cache.speech_utils.generate_voice_message", return_value=io.BytesIO(b"FAKE AUDIO"))
+        self.mock_generate_voice = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_broadcast_sends_text_and_voice(self):
+        bot = AsyncMock()
+
+        stats = await Broadcaster(bot, senders=4, voice_cache=VoiceCache()).broadcast(
+            [(111, "Guten Morgen!"), (222, "Hallo Tag!")]
+        )
+
+        bot.send_message.assert_any_call(chat_id=111, text="Guten Morgen!")
+        bot.send_message.assert_any_call(chat_id=222, text="Hallo Tag!")
+        self.assertCountEqual(uploaded_voices(bot.send_voice), [(111, b"FAKE AUDIO"), (222, b"FAKE AUDIO")])
+        self.assertEqual(stats["sent"], 2)
+        self.assertEqual(stats["failed"], 0)
+        self.assertLessEqual(stats["p50"], stats["p95"])
+
+    async def test_broadcast_measures_latency_from_job_start(self):
+        bot = AsyncMock()
+
+        # Der Job hat die Nachrichten vor zehn Sekunden bei der API angefragt
+        stats = await Broadcaster(bot, voice_cache=VoiceCache()).broadcast(
+            [(111, "Guten Morgen!")], started_at=time.monotonic() - 10
+        )
+
+        self.assertGreaterEqual(stats["p50"], 10)
+        self.assertGreaterEqual(stats["duration"], 10)
+
+    @patch("broadcaster.asyncio.sleep", new_callable=AsyncMock)
+    async def test_broadcast_retries_after_flood_control(self, mock_sleep):
+        bot = AsyncMock()
+        bot.send_message.side_effect = [RetryAfter(datetime.timedelta(seconds=3)), None]
+
+        stats = await Broadcaster(bot, voice_cache=VoiceCache()).broadcast([(111, "Guten Morgen!")])
+
+        self.assertEqual(bot.send_message.call_count, 2)
+        mock_sleep.assert_any_await(3.0)
+        self.assertEqual(stats["sent"], 1)
+
+    async def test_broadcast_counts_failed_chats(self):
+        bot = AsyncMock()
+        bot.send_message.side_effect = [Forbidden("bot was blocked by the user"), None]
+
+        stats = await Broadcaster(bot, senders=1, voice_cache=VoiceCache()).broadcast(
+            [(111, "Guten Morgen!"), (222, "Hallo Tag!")]
+        )
+
+        # Ein blockierter Chat hält die übrigen Chats nicht auf
+        self.assertEqual(stats["sent"], 1)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(uploaded_voices(bot.send_voice), [(222, b"FAKE AUDIO")])
+
+
+if __name__ == "__main__":
+    unittest.main()
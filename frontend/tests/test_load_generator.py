@@ -0,0 +1,51 @@
+import os
+import sys
+
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from benchmarks.load_generator import main, parse_mix
+from benchmarks.api_stand_in import ApiStandIn
+
+
+class TestLoadGenerator(unittest.IsolatedAsyncioTestCase):
+    async def test_all_flows_are_answered(self):
+        argv = [
+            "--users", "8", "--rounds", "2", "--ramp-up", "0.2", "--think-time", "0",
+            "--answer-latency", "0.01", "--speech-latency", "0.01", "--telegram-latency", "0",
+            "--timeout", "10", "--mix", "text=1,voice=1,onboarding=1,preferences=1",
+        ]
+        with redirect_stdout(StringIO()):
+            results = await main(argv)
+
+        # Jeder Schritt bekam seine Antworten, kein Nutzer musste abbrechen
+        self.assertEqual(results["aborted_users"], 0)
+        self.assertTrue(all(step["timeouts"] == 0 for step in results["steps"].values()))
+        self.assertIn("text", results["steps"])
+        self.assertIn("onboarding done", results["steps"])
+        self.assertGreater(results["bot_api_calls"]["sendMessage"], 0)
+        self.assertGreater(results["api_calls"]["answer"], 0)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("text=3, voice=1"), {"text": 3.0, "voice": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("photo=1")
+        with self.assertRaises(ValueError):
+            parse_mix("text=0")
+
+
+class TestApiStandIn(unittest.TestCase):
+    def test_apply_update(self):
+        preferences = {"stocks": ["Apple"], "city": "Berlin"}
+
+        ApiStandIn._apply_update(preferences, {"add_stocks": ["Tesla", "Apple"]})
+        ApiStandIn._apply_update(preferences, {"delete_stocks": ["Apple"]})
+        ApiStandIn._apply_update(preferences, {"city": "Stuttgart"})
+
+        self.assertEqual(preferences, {"stocks": ["Tesla"], "city": "Stuttgart"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,63 @@
+import io
 import os
 import sys
 
+import time
+import asyncio
 import unittest
 import datetime
-from unittest.mock import patch, MagicMock, AsyncMock, mock_open, ANY
+from unittest.mock import patch, MagicMock, AsyncMock
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from message_handlers import MessageHandlers
+from voice_cache import voice_cache
+
+
+def uploaded_voices(send_voice):
+    # Hochgeladene Sprachnachrichten als (chat_id, Inhalt), bei reply_voice ist die chat_id None
+    return [(call.kwargs.get("chat_id"), call.kwargs["voice"].input_file_content) for call in send_voice.call_args_list]
 
 
 class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        voice_cache.clear()
+        self.tasks = []
+
+    def make_context(self, chat_data=None, all_chat_data=None):
+        # Kontext mit echten chat_data, Hintergrund-Tasks werden gesammelt und im Test abgewartet
+        context = AsyncMock()
+        context.chat_data = chat_data if chat_data is not None else {}
+        context.application.chat_data = all_chat_data if all_chat_data is not None else {}
+        context.application.create_task = MagicMock(
+            side_effect=lambda coroutine, update=None: self.tasks.append(asyncio.ensure_future(coroutine))
+        )
+        return context
+
+    async def finish_tasks(self):
+        await asyncio.gather(*self.tasks)
+
+    @patch("message_handlers.Broadcaster")
+    @patch("message_handlers.api_client.get_all_morning_messages")
+    async def test_send_morning_message_measures_from_job_start(self, mock_get_morning, MockBroadcaster):
+        MockBroadcaster.return_value.broadcast = AsyncMock()
+
+        async def get_morning():
+            # Das Abrufen der Morgenmeldungen zählt zur Latenz der Zustellung
+            await asyncio.sleep(0.05)
+            return [{"response": "Guten Morgen!", "user_id": "111"}]
+        mock_get_morning.side_effect = get_morning
+
+        before = time.monotonic()
+        await MessageHandlers().send_morning_message(self.make_context())
+
+        started_at = MockBroadcaster.return_value.broadcast.await_args.args[2]
+        self.assertGreaterEqual(started_at, before)
+        self.assertLessEqual(started_at, before + 0.05)
+
     @patch("message_handlers.api_client.get_all_morning_messages")
     @patch("message_handlers.speech_utils.generate_voice_message")
-    @patch("message_handlers.open", new_callable=mock_open, read_data=b"FAKE AUDIO")
     async def test_send_morning_message_success(
         self,
-        mock_file_open,
         mock_generate_voice,
         mock_get_morning
     ):
@@ -24,10 +66,10 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
             {"response": "Guten Morgen!", "user_id": 111},
             {"response": "Hallo Tag!", "user_id": 222}
         ]
-        mock_generate_voice.return_value = "/fake/path/to/audio.ogg"
+        mock_generate_voice.return_value = io.BytesIO(b"FAKE AUDIO")
 
         mh = MessageHandlers()
-        context = AsyncMock()
+        context = self.make_context()
         await mh.send_morning_message(context)
 
         # 1) Wir erwarten zwei Nachrichten + zwei Sprachnachrichten
@@ -36,8 +78,7 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
         context.bot.send_message.assert_any_call(chat_id=222, text="Hallo Tag!")
 
         self.assertEqual(context.bot.send_voice.call_count, 2)
-        context.bot.send_voice.assert_any_call(chat_id=111, voice=ANY)
-        context.bot.send_voice.assert_any_call(chat_id=222, voice=ANY)
+        self.assertCountEqual(uploaded_voices(context.bot.send_voice), [(111, b"FAKE AUDIO"), (222, b"FAKE AUDIO")])
 
     @patch("message_handlers.api_client.get_all_morning_messages")
     @patch("message_handlers.logging.Logger.warning")
@@ -46,7 +87,7 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
         mock_api.return_value = "Fehler: 404"
 
         mh = MessageHandlers()
-        context = AsyncMock()
+        context = self.make_context()
         await mh.send_morning_message(context)
 
         # Keine Send-Calls, stattdessen Warnung geloggt
@@ -58,10 +99,8 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
 
     @patch("message_handlers.api_client.get_all_proactivity_messages")
     @patch("message_handlers.speech_utils.generate_voice_message")
-    @patch("message_handlers.open", new_callable=mock_open, read_data=b"FAKE AUDIO")
     async def test_send_proactivity_message_success(
         self,
-        mock_file_open,
         mock_generate_voice,
         mock_get_proactivity
     ):
@@ -69,10 +108,10 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
             {"response": "Proaktive Info 1", "user_id": 333},
             {"response": "Proaktive Info 2", "user_id": 444}
         ]
-        mock_generate_voice.return_value = "/fake/path/to/audio.ogg"
+        mock_generate_voice.return_value = io.BytesIO(b"FAKE AUDIO")
 
         mh = MessageHandlers()
-        context = AsyncMock()
+        context = self.make_context()
         await mh.send_proactivity_message(context)
 
         self.assertEqual(context.bot.send_message.call_count, 2)
@@ -87,7 +126,7 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
         mock_api.return_value = "Fehler: 500"
 
         mh = MessageHandlers()
-        context = AsyncMock()
+        context = self.make_context()
         await mh.send_proactivity_message(context)
 
         context.bot.send_message.assert_not_called()
@@ -98,19 +137,17 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
 
     @patch("message_handlers.api_client.get_answer")
     @patch("message_handlers.speech_utils.generate_voice_message")
-    @patch("message_handlers.open", new_callable=mock_open, read_data=b"FAKE AUDIO")
     async def test_handle_incoming_message_text(
         self,
-        mock_file_open,
         mock_gen_voice,
         mock_get_answer
     ):
         mock_get_answer.return_value = "Antwort auf Textnachricht"
-        mock_gen_voice.return_value = "/fake/path/out.ogg"
+        mock_gen_voice.return_value = io.BytesIO(b"FAKE AUDIO")
 
         mh = MessageHandlers()
         update = AsyncMock()
-        context = AsyncMock()
+        context = self.make_context()
 
         # Wir simulieren eine Textnachricht
         update.message.voice = None
@@ -118,30 +155,29 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
         update.effective_user.id = 12345
 
         await mh.handle_incoming_message(update, context)
+        await self.finish_tasks()
 
         mock_get_answer.assert_called_once_with("Hallo Bot!", 12345)
         context.bot.send_message.assert_not_called()  # die Antwort geht als reply_text
         update.message.reply_text.assert_called_once_with("Antwort auf Textnachricht")
-        update.message.reply_voice.assert_called_once()
+        self.assertEqual(uploaded_voices(update.message.reply_voice), [(None, b"FAKE AUDIO")])
 
     @patch("message_handlers.api_client.get_answer")
     @patch("message_handlers.speech_utils.convert_voice_to_text")
     @patch("message_handlers.speech_utils.generate_voice_message")
-    @patch("message_handlers.open", new_callable=mock_open, read_data=b"FAKE AUDIO")
     async def test_handle_incoming_message_voice(
         self,
-        mock_file_open,
         mock_gen_voice,
         mock_conv_voice,
         mock_get_answer
     ):
         mock_conv_voice.return_value = "Gesprochener Text"
         mock_get_answer.return_value = "Antwort auf Sprache"
-        mock_gen_voice.return_value = "/fake/path/out.ogg"
+        mock_gen_voice.return_value = io.BytesIO(b"FAKE AUDIO")
 
         mh = MessageHandlers()
         update = AsyncMock()
-        context = AsyncMock()
+        context = self.make_context()
 
         # Wir simulieren eine Voice-Nachricht
         update.message.voice = AsyncMock()
@@ -152,14 +188,165 @@ class TestMessageHandlers(unittest.IsolatedAsyncioTestCase):
         update.message.voice.get_file.return_value = mock_file
 
         await mh.handle_incoming_message(update, context)
-        mock_file.download_to_drive.assert_awaited()  # Voice-Datei wurde heruntergeladen
-        mock_conv_voice.assert_called_once_with(
-            mh.BASE_DIR + "/output.ogg"
-        )
+        await self.finish_tasks()
+        mock_file.download_to_memory.assert_awaited_once()  # Voice-Datei wurde in den Speicher geladen
+        voice = mock_file.download_to_memory.call_args.args[0]
+        mock_conv_voice.assert_called_once_with(voice)
         mock_get_answer.assert_called_once_with("Gesprochener Text", 55555)
         update.message.reply_text.assert_called_once_with("Antwort auf Sprache")
         update.message.reply_voice.assert_called_once()
 
+    @patch("message_handlers.api_client.get_answer")
+    @patch("message_handlers.speech_utils.convert_voice_to_text")
+    async def test_handle_incoming_message_voice_conversion_fails(self, mock_conv_voice, mock_get_answer):
+        mh = MessageHandlers()
+        context = self.make_context()
+
+        for error in (RuntimeError("ffmpeg ist mit Code 1 fehlgeschlagen."), ValueError("Die Sprachnachricht ist leer.")):
+            with self.subTest(error=error):
+                mock_conv_voice.side_effect = error
+                update = AsyncMock()
+                update.message.voice.get_file.return_value = AsyncMock()
+
+                await mh.handle_incoming_message(update, context)
+
+                # Der Nutzer bekommt trotzdem eine Antwort, die API wird nicht gefragt
+                update.message.reply_text.assert_awaited_once_with("Ich konnte die Sprache nicht verstehen.")
+                mock_get_answer.assert_not_called()
+
+    @patch("message_handlers.api_client.get_answer")
+    @patch("message_handlers.speech_utils.convert_voice_to_text")
+    @patch("message_handlers.speech_utils.generate_voice_message")
+    async def test_handle_incoming_message_voice_concurrently(
+        self,
+        mock_gen_voice,
+        mock_conv_voice,
+        mock_get_answer
+    ):
+        # Zwei Chats schicken gleichzeitig eine Sprachnachricht
+        async def convert(voice):
+            await asyncio.sleep(0)
+            return voice.getvalue().decode()
+
+        mock_conv_voice.side_effect = convert
+        mock_get_answer.side_effect = lambda text, user_id: f"Antwort auf {text}"
+        mock_gen_voice.side_effect = lambda text: io.BytesIO(text.encode())
+
+        def voice_update(audio):
+            update = AsyncMock()
+            mock_file = AsyncMock()
+            mock_file.download_to_memory.side_effect = lambda out: out.write(audio)
+            update.message.voice.get_file.return_value = mock_file
+            return update
+
+        first, second = voice_update(b"Eins"), voice_update(b"Zwei")
+        mh = MessageHandlers()
+        await asyncio.gather(
+            mh.handle_incoming_message(first, self.make_context()),
+            mh.handle_incoming_message(second, self.make_context())
+        )
+        await self.finish_tasks()
+
+        # Jeder Chat bekommt seine eigene Antwort und Audiodatei
+        first.message.reply_text.assert_called_once_with("Antwort auf Eins")
+        self.assertEqual(uploaded_voices(first.message.reply_voice), [(None, b"Antwort auf Eins")])
+        second.message.reply_text.assert_called_once_with("Antwort auf Zwei")
+        self.assertEqual(uploaded_voices(second.message.reply_voice), [(None, b"Antwort auf Zwei")])
+
+    @patch("message_handlers.api_client.get_answer")
+    @patch("message_handlers.speech_utils.generate_voice_message")
+    async def test_handle_incoming_message_text_before_voice(self, mock_gen_voice, mock_get_answer):
+        mock_get_answer.return_value = "Antwort"
+        mock_gen_voice.return_value = io.BytesIO(b"FAKE AUDIO")
+
+        mh = MessageHandlers()
+        update = AsyncMock()
+        update.message.voice = None
+        update.effective_chat.id = 12345
+        context = self.make_context()
+
+        await mh.handle_incoming_message(update, context)
+
+        # Der Text ist schon da, bevor die Sprachnachricht erzeugt wurde
+        update.message.reply_text.assert_called_once_with("Antwort")
+        mock_gen_voice.assert_not_called()
+
+        await self.finish_tasks()
+        context.bot.send_chat_action.assert_any_call(chat_id=12345, action="record_voice")
+        self.assertEqual(uploaded_voices(update.message.reply_voice), [(None, b"FAKE AUDIO")])
+
+    @patch("message_handlers.api_client.get_answer")
+    @patch("message_handlers.speech_utils.generate_voice_message")
+    async def test_handle_incoming_message_without_voice(self, mock_gen_voice, mock_get_answer):
+        mock_get_answer.return_value = "Antwort"
+
+        mh = MessageHandlers()
+        update = AsyncMock()
+        update.message.voice = None
+        context = self.make_context(chat_data={"voice": False})
+
+        await mh.handle_incoming_message(update, context)
+        await self.finish_tasks()
+
+        # Keine Synthese und keine Sprachnachricht, wenn der Chat sie ausgeschaltet hat
+        update.message.reply_text.assert_called_once_with("Antwort")
+        context.application.create_task.assert_not_called()
+        mock_gen_voice.assert_not_called()
+        update.message.reply_voice.assert_not_called()
+
+    async def test_toggle_voice(self):
+        mh = MessageHandlers()
+        update = AsyncMock()
+        context = self.make_context()
+
+        await mh.toggle_voice(update, context)
+        self.assertEqual(context.chat_data, {"voice": False})
+
+        await mh.toggle_voice(update, context)
+        self.assertEqual(context.chat_data, {"voice": True})
+        self.assertEqual(update.message.reply_text.call_count, 2)
+
+    @patch("message_handlers.api_client.get_all_morning_messages")
+    @patch("message_handlers.speech_utils.generate_voice_message")
+    async def test_send_morning_message_respects_voice_opt_out(self, mock_generate_voice, mock_get_morning):
+        mock_get_morning.return_value = [
+            # Die API liefert die user_id als String (Benutzername)
+            {"response": "Guten Morgen!", "user_id": "111"},
+            {"response": "Hallo Tag!", "user_id": "222"}
+        ]
+        mock_generate_voice.return_value = io.BytesIO(b"FAKE AUDIO")
+
+        mh = MessageHandlers()
+        context = self.make_context(all_chat_data={111: {"voice": False}, 222: {}})
+        await mh.send_morning_message(context)
+
+        self.assertEqual(context.bot.send_message.call_count, 2)
+        self.assertEqual(uploaded_voices(context.bot.send_voice), [(222, b"FAKE AUDIO")])
+
+    @patch("message_handlers.api_client.get_all_morning_messages")
+    @patch("message_handlers.speech_utils.generate_voice_message")
+    async def test_send_morning_message_skips_invalid_user_ids(self, mock_generate_voice, mock_get_morning):
+        mock_get_morning.return_value = [
+            {"response": "Guten Morgen!", "user_id": "111"},
+            # Benutzer, die sich über die API statt über Telegram angemeldet haben
+            {"response": "Hallo Anna!", "user_id": "anna"},
+            {"response": "Hallo!", "user_id": None},
+            {"response": "Hallo Tag!", "user_id": 222}
+        ]
+        mock_generate_voice.return_value = io.BytesIO(b"FAKE AUDIO")
+
+        mh = MessageHandlers()
+        context = self.make_context()
+        with self.assertLogs("message_handlers", level="WARNING") as logs:
+            await mh.send_morning_message(context)
+
+        # Die übrigen Benutzer bekommen ihre Nachricht trotzdem
+        self.assertEqual(context.bot.send_message.call_count, 2)
+        context.bot.send_message.assert_any_call(chat_id=111, text="Guten Morgen!")
+        context.bot.send_message.assert_any_call(chat_id=222, text="Hallo Tag!")
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("anna", logs.output[0])
+
     @patch("message_handlers.datetime")
     def test_configure_proactivity_jobs(self, mock_datetime):
         # mock datetime.time, falls dein Code dynamische Zeitzugriffe hat
@@ -150,6 +150,25 @@ class TestPreferenceHandler(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(next_state, 6)  # CANTEEN_UPDATE
 
+    async def test_process_preference_button_click_submenu(self):
+        handler = PreferenceHandler()
+        update = AsyncMock()
+        context = AsyncMock()
+        update.callback_query.data = "stocks"
+
+        next_state = await handler.process_preference_button_click(update, context)
+
+        # Nach dem Untermenü wartet die Konversation auf den nächsten Klick
+        self.assertEqual(next_state, 5)  # BUTTON
+
+        update.callback_query.data = "stocks_add"
+        next_state = await handler.process_preference_button_click(update, context)
+
+        update.callback_query.message.reply_text.assert_awaited_with(
+            "Welche Aktien möchtest du hinzufügen?"
+        )
+        self.assertEqual(next_state, 10)  # STOCKS_ADD
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,134 +1,93 @@
+import io
 import os
 import sys
 
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock, AsyncMock
 import speech_recognition as sr
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from speech_utils import generate_voice_message, convert_voice_to_text
 
 
-class TestSpeechUtils(unittest.TestCase):
-    @patch("speech_utils.gTTS")
-    @patch("speech_utils.tempfile.NamedTemporaryFile")
-    @patch("speech_utils.subprocess.run")
-    @patch("speech_utils.os.unlink")
-    def test_generate_voice_message_success(
-        self, mock_unlink, mock_subprocess_run, mock_tempfile, mock_gtts
-    ):
-        mock_temp = MagicMock()
-        mock_temp.name = "/tmp/fakefile.mp3"
-        mock_tempfile.return_value = mock_temp
+def fake_ffmpeg(output=b"FAKE AUDIO DATA", returncode=0):
+    process = MagicMock()
+    process.returncode = returncode
+    process.communicate = AsyncMock(return_value=(output, None))
+    return AsyncMock(return_value=process)
+
 
+class TestSpeechUtils(unittest.IsolatedAsyncioTestCase):
+    @patch("speech_utils.gTTS")
+    @patch("speech_utils.asyncio.create_subprocess_exec", new_callable=lambda: fake_ffmpeg(output=b"OGG"))
+    async def test_generate_voice_message_success(self, mock_subprocess_exec, mock_gtts):
         mock_tts_instance = MagicMock()
+        mock_tts_instance.write_to_fp.side_effect = lambda fp: fp.write(b"MP3")
         mock_gtts.return_value = mock_tts_instance
 
-        result = generate_voice_message("Hallo Welt")
-        self.assertIn("output.ogg", result)
+        result = await generate_voice_message("Hallo Welt")
+        self.assertIsInstance(result, io.BytesIO)
+        self.assertEqual(result.getvalue(), b"OGG")
         mock_gtts.assert_called_once_with(text="Hallo Welt", lang="de")
-        mock_tts_instance.save.assert_called_once_with("/tmp/fakefile.mp3")
-        mock_subprocess_run.assert_called_once()
-        mock_unlink.assert_called_once_with("/tmp/fakefile.mp3")
 
-    def test_generate_voice_message_empty_text(self):
+        # Die MP3-Daten werden über stdin an ffmpeg übergeben, das OGG kommt über stdout zurück
+        args = mock_subprocess_exec.call_args.args
+        self.assertEqual(args[:3], ("ffmpeg", "-i", "pipe:0"))
+        self.assertEqual(args[-1], "pipe:1")
+        mock_subprocess_exec.return_value.communicate.assert_awaited_once_with(b"MP3")
+
+    @patch("speech_utils.gTTS")
+    @patch("speech_utils.asyncio.create_subprocess_exec", new_callable=lambda: fake_ffmpeg(returncode=1))
+    async def test_generate_voice_message_ffmpeg_failure(self, mock_subprocess_exec, mock_gtts):
+        with self.assertRaises(RuntimeError):
+            await generate_voice_message("Hallo Welt")
+
+    async def test_generate_voice_message_empty_text(self):
+        with self.assertRaises(ValueError):
+            await generate_voice_message("   ")
+
+    async def test_convert_voice_to_text_empty_voice(self):
         with self.assertRaises(ValueError):
-            generate_voice_message("   ")
-
-    @patch("speech_utils.os.path.exists", return_value=False)
-    def test_convert_voice_to_text_file_not_found(self, mock_exists):
-        with self.assertRaises(FileNotFoundError):
-            convert_voice_to_text("/path/does/not/exist.ogg")
-
-    @patch("speech_utils.os.path.exists", return_value=True)
-    @patch("speech_utils.tempfile.NamedTemporaryFile")
-    @patch("speech_utils.subprocess.run")
-    @patch("speech_utils.os.unlink")
-    @patch("speech_utils.open", new_callable=mock_open, read_data=b"FAKE AUDIO DATA")
+            await convert_voice_to_text(io.BytesIO())
+
+    @patch("speech_utils.asyncio.create_subprocess_exec", new_callable=fake_ffmpeg)
     @patch("speech_utils.gSTT.Recognizer")
-    def test_convert_voice_to_text_success(
-        self,
-        mock_recognizer_cls,
-        mock_file_open,
-        mock_unlink,
-        mock_subprocess_run,
-        mock_tempfile,
-        mock_exists
-    ):
+    async def test_convert_voice_to_text_success(self, mock_recognizer_cls, mock_subprocess_exec):
         mock_recognizer = MagicMock()
         mock_recognizer.recognize_google.return_value = "Hallo erkannt"
         mock_recognizer_cls.return_value = mock_recognizer
 
-        mock_temp = MagicMock()
-        mock_temp.name = "/tmp/fakefile.wav"
-        mock_tempfile.return_value = mock_temp
-
-        result = convert_voice_to_text("/path/to/input.ogg")
+        result = await convert_voice_to_text(io.BytesIO(b"OGG"))
         self.assertEqual(result, "Hallo erkannt")
-        mock_subprocess_run.assert_called_once()
-        mock_file_open.assert_called_with("/tmp/fakefile.wav", "rb")
-        mock_unlink.assert_called_once_with("/tmp/fakefile.wav")
-
-    @patch("speech_utils.os.path.exists", return_value=True)
-    @patch("speech_utils.tempfile.NamedTemporaryFile")
-    @patch("speech_utils.subprocess.run")
-    @patch("speech_utils.os.unlink")
-    @patch("speech_utils.open", new_callable=mock_open, read_data=b"FAKE AUDIO DATA")
+        mock_subprocess_exec.return_value.communicate.assert_awaited_once_with(b"OGG")
+
+        # Die PCM-Daten von ffmpeg gehen direkt an die Spracherkennung
+        audio_data = mock_recognizer.recognize_google.call_args.args[0]
+        self.assertEqual(audio_data.frame_data, b"FAKE AUDIO DATA")
+        self.assertEqual(audio_data.sample_rate, 16000)
+
+    @patch("speech_utils.asyncio.create_subprocess_exec", new_callable=fake_ffmpeg)
     @patch("speech_utils.gSTT.Recognizer")
-    def test_convert_voice_to_text_unknown_value(
-        self,
-        mock_recognizer_cls,
-        mock_file_open,
-        mock_unlink,
-        mock_subprocess_run,
-        mock_tempfile,
-        mock_exists
-    ):
+    async def test_convert_voice_to_text_unknown_value(self, mock_recognizer_cls, mock_subprocess_exec):
         mock_recognizer = MagicMock()
         # Jetzt wirklich eine UnknownValueError aus speech_recognition auslösen.
         mock_recognizer.recognize_google.side_effect = sr.UnknownValueError()
         mock_recognizer_cls.return_value = mock_recognizer
 
-        mock_temp = MagicMock()
-        mock_temp.name = "/tmp/fakefile.wav"
-        mock_tempfile.return_value = mock_temp
-
-        result = convert_voice_to_text("/path/to/input.ogg")
+        result = await convert_voice_to_text(io.BytesIO(b"OGG"))
         self.assertIn("Ich konnte die Sprache nicht verstehen.", result)
-        mock_subprocess_run.assert_called_once()
-        mock_file_open.assert_called_with("/tmp/fakefile.wav", "rb")
-        mock_unlink.assert_called_once_with("/tmp/fakefile.wav")
-
-    @patch("speech_utils.os.path.exists", return_value=True)
-    @patch("speech_utils.tempfile.NamedTemporaryFile")
-    @patch("speech_utils.subprocess.run")
-    @patch("speech_utils.os.unlink")
-    @patch("speech_utils.open", new_callable=mock_open, read_data=b"FAKE AUDIO DATA")
+
+    @patch("speech_utils.asyncio.create_subprocess_exec", new_callable=fake_ffmpeg)
     @patch("speech_utils.gSTT.Recognizer")
-    def test_convert_voice_to_text_request_error(
-        self,
-        mock_recognizer_cls,
-        mock_file_open,
-        mock_unlink,
-        mock_subprocess_run,
-        mock_tempfile,
-        mock_exists
-    ):
+    async def test_convert_voice_to_text_request_error(self, mock_recognizer_cls, mock_subprocess_exec):
         mock_recognizer = MagicMock()
         # Jetzt eine RequestError auslösen
         mock_recognizer.recognize_google.side_effect = sr.RequestError("API nicht erreichbar")
         mock_recognizer_cls.return_value = mock_recognizer
 
-        mock_temp = MagicMock()
-        mock_temp.name = "/tmp/fakefile.wav"
-        mock_tempfile.return_value = mock_temp
-
-        result = convert_voice_to_text("/path/to/input.ogg")
+        result = await convert_voice_to_text(io.BytesIO(b"OGG"))
         self.assertIn("Fehler: Ich kann die Spracherkennung gerade nicht erreichen.", result)
-        mock_subprocess_run.assert_called_once()
-        mock_file_open.assert_called_with("/tmp/fakefile.wav", "rb")
-        mock_unlink.assert_called_once_with("/tmp/fakefile.wav")
 
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import asyncio
+import unittest
+from telegram import Update
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from update_processor import ChatOrderedUpdateProcessor
+
+
+def text_update(update_id, chat_id):
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": "Hallo"
+        }
+    }, None)
+
+
+class TestChatOrderedUpdateProcessor(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_of_one_chat_stay_in_order(self):
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+        events = []
+
+        async def handle(name, delay):
+            events.append(f"{name} start")
+            await asyncio.sleep(delay)
+            events.append(f"{name} end")
+
+        # Die erste Nachricht von Chat 1 dauert länger, die zweite muss trotzdem warten
+        await asyncio.gather(
+            processor.process_update(text_update(1, 1), handle("1a", 0.02)),
+            processor.process_update(text_update(2, 1), handle("1b", 0)),
+            processor.process_update(text_update(3, 2), handle("2a", 0)),
+        )
+
+        self.assertLess(events.index("1a end"), events.index("1b start"))
+        # Chat 2 wird parallel verarbeitet und ist vor Chat 1 fertig
+        self.assertLess(events.index("2a end"), events.index("1a end"))
+        self.assertEqual(processor.chat_queues, {})
+
+    async def test_flooded_chat_does_not_block_other_chats(self):
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=2)
+        release = asyncio.Event()
+        events = []
+
+        async def handle(name, wait=False):
+            if wait:
+                await release.wait()
+            events.append(name)
+
+        # Chat 1 schickt mehr Updates als es Slots gibt, das erste hängt
+        flood = [
+            asyncio.create_task(processor.process_update(text_update(i, 1), handle(f"1-{i}", wait=i == 1)))
+            for i in range(1, 6)
+        ]
+        await asyncio.sleep(0)
+        await asyncio.wait_for(processor.process_update(text_update(10, 2), handle("2")), timeout=1)
+
+        # Chat 2 kam durch, obwohl Chat 1 noch wartet
+        self.assertEqual(events, ["2"])
+        release.set()
+        await asyncio.gather(*flood)
+        self.assertEqual(events, ["2", "1-1", "1-2", "1-3", "1-4", "1-5"])
+        self.assertEqual(processor.chat_queues, {})
+
+    async def test_updates_without_chat_are_processed(self):
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=1)
+        done = []
+
+        async def handle():
+            done.append(True)
+
+        await processor.process_update(object(), handle())
+        self.assertEqual(done, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
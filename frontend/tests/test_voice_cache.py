@@ -0,0 +1,98 @@
+import io
+import os
+import sys
+
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+from telegram import InputFile
+from telegram.error import BadRequest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from voice_cache import VoiceCache, voice_cache_key
+
+
+def uploaded(call):
+    # Inhalt einer hochgeladenen Sprachnachricht, eine file_id bleibt unverändert
+    voice = call.kwargs["voice"]
+    return voice if isinstance(voice, str) else voice.input_file_content
+
+
+def sent_voice(file_id):
+    message = MagicMock()
+    message.voice.file_id = file_id
+    return message
+
+
+class TestVoiceCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch("voice_cache.speech_utils.generate_voice_message", return_value=io.BytesIO(b"OGG"))
+        self.mock_generate_voice = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_key_depends_on_text_and_settings(self):
+        key = voice_cache_key("Hallo")
+        self.assertEqual(key, voice_cache_key("Hallo"))
+        self.assertNotEqual(key, voice_cache_key("Hallo!"))
+        with patch.dict("voice_cache.speech_utils.VOICE_SETTINGS", {"lang": "en"}):
+            self.assertNotEqual(key, voice_cache_key("Hallo"))
+
+    async def test_send_reuses_file_id(self):
+        cache = VoiceCache()
+        send_voice = AsyncMock(return_value=sent_voice("FILE_1"))
+
+        await cache.send(send_voice, "Ich kann mich gerade nicht mit der API verbinden.")
+        await cache.send(send_voice, "Ich kann mich gerade nicht mit der API verbinden.")
+
+        # Nur beim ersten Mal wird synthetisiert und hochgeladen
+        self.mock_generate_voice.assert_awaited_once()
+        self.assertEqual(uploaded(send_voice.call_args_list[0]), b"OGG")
+        self.assertEqual(uploaded(send_voice.call_args_list[1]), "FILE_1")
+
+    async def test_upload_is_an_ogg_file(self):
+        cache = VoiceCache()
+        send_voice = AsyncMock(return_value=sent_voice("FILE_1"))
+
+        await cache.send(send_voice, "Hallo")
+
+        # Ohne Dateinamen würde Telegram die Daten als application/octet-stream bekommen
+        voice = send_voice.call_args.kwargs["voice"]
+        self.assertIsInstance(voice, InputFile)
+        self.assertEqual(voice.filename, "voice.ogg")
+        self.assertEqual(voice.mimetype, "audio/ogg")
+        self.assertEqual(voice.input_file_content, b"OGG")
+
+    async def test_send_uploads_again_after_invalid_file_id(self):
+        cache = VoiceCache()
+        send_voice = AsyncMock(side_effect=[sent_voice("FILE_1"), BadRequest("Wrong file identifier"), sent_voice("FILE_2")])
+
+        await cache.send(send_voice, "Hallo")
+        await cache.send(send_voice, "Hallo")
+
+        # Die gespeicherten Audiodaten werden ohne erneute Synthese hochgeladen
+        self.mock_generate_voice.assert_awaited_once()
+        self.assertEqual(uploaded(send_voice.call_args_list[2]), b"OGG")
+        self.assertEqual(cache.entries[voice_cache_key("Hallo")]["file_id"], "FILE_2")
+
+    async def test_concurrent_sends_synthesize_once(self):
+        cache = VoiceCache()
+        send_voice = AsyncMock(return_value=sent_voice("FILE_1"))
+
+        await asyncio.gather(*(cache.send(send_voice, "Proaktive Info") for _ in range(5)))
+
+        self.mock_generate_voice.assert_awaited_once()
+        self.assertEqual(send_voice.call_count, 5)
+
+    async def test_least_recently_used_entry_is_dropped(self):
+        cache = VoiceCache(max_size=2)
+        send_voice = AsyncMock(return_value=sent_voice("FILE"))
+
+        for text in ("Eins", "Zwei", "Drei"):
+            await cache.send(send_voice, text)
+
+        self.assertNotIn(voice_cache_key("Eins"), cache.entries)
+        self.assertIn(voice_cache_key("Drei"), cache.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
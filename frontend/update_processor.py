@@ -0,0 +1,89 @@
+"""Module for processing updates of different chats concurrently while keeping each chat in order."""
+
+import asyncio
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes up to `max_concurrent_updates` updates at the same time, but the updates of one chat
+    strictly one after another, so conversations never see their messages out of order.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        """
+        Initialize the processor.
+
+        :param max_concurrent_updates: Maximum number of updates processed at the same time.
+        """
+        super().__init__(max_concurrent_updates)
+        self.chat_queues = {}
+        self._workers = set()
+
+    async def process_update(self, update: object, coroutine):
+        """
+        Hands an update to the worker of its chat and waits until it is processed.
+        Only the update a chat is working on holds one of the `max_concurrent_updates` slots,
+        so a chat with many pending updates cannot block the other chats.
+
+        :param update: The update to be processed.
+        :param coroutine: The coroutine processing the update.
+        """
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await super().process_update(update, coroutine)
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        queue = self.chat_queues.get(chat.id)
+        if queue is None:
+            queue = self.chat_queues[chat.id] = deque()
+            worker = asyncio.create_task(self._process_chat(chat.id, queue))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+        queue.append((update, coroutine, done))
+        await done
+
+    async def _process_chat(self, chat_id: int, queue: deque):
+        """
+        Processes the pending updates of a chat one after another.
+
+        :param chat_id: The chat.
+        :param queue: Update, coroutine and future of every pending update.
+        """
+        try:
+            while queue:
+                update, coroutine, done = queue.popleft()
+                try:
+                    await super().process_update(update, coroutine)
+                except Exception as e:
+                    if not done.done():
+                        done.set_exception(e)
+                    continue
+                if not done.done():
+                    done.set_result(None)
+        finally:
+            # Queues of idle chats are dropped, so the number of queues stays bounded by the active chats
+            del self.chat_queues[chat_id]
+
+    async def do_process_update(self, update: object, coroutine):
+        """
+        Processes an update, called with one of the slots held.
+
+        :param update: The update to be processed.
+        :param coroutine: The coroutine processing the update.
+        """
+        await coroutine
+
+    async def initialize(self):
+        """
+        Nothing to allocate, the chat queues are created on demand.
+        """
+
+    async def shutdown(self):
+        """
+        Nothing to free, the chat queues are dropped when their chat is idle.
+        """
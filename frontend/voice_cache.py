@@ -0,0 +1,120 @@
+"""Module for reusing generated voice messages instead of synthesizing and uploading them again."""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+
+from telegram import InputFile
+from telegram.error import BadRequest
+
+import speech_utils
+
+# Maximum number of different texts whose voice message is kept
+MAX_CACHED_VOICES = int(os.getenv("VOICE_CACHE_SIZE", "256"))
+
+# Raw bytes are uploaded as application/octet-stream, the file name makes Telegram get audio/ogg
+VOICE_FILENAME = "voice.ogg"
+
+
+def voice_cache_key(text: str) -> str:
+    """
+    Returns the cache key of a voice message, a hash of the text and the voice settings.
+
+    :param text: The text to be spoken.
+    :return: The SHA-256 hex digest, e.g. "3f2a...".
+    """
+    content = json.dumps([text, speech_utils.VOICE_SETTINGS], sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class VoiceCache:
+    """
+    Keeps the OGG audio of voice messages and the Telegram file_id of their first upload,
+    so repeated texts are sent without synthesis and without upload.
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_VOICES):
+        """
+        Initialize an empty cache.
+
+        :param max_size: Maximum number of cached voice messages, the least recently used is dropped first.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.pending = {}
+
+    def clear(self):
+        """
+        Removes all cached voice messages.
+        """
+        self.entries.clear()
+
+    def _store(self, key: str, entry: dict):
+        """
+        Stores an entry, dropping the least recently used entry when the cache is full.
+
+        :param key: The cache key of the voice message.
+        :param entry: The audio and, once known, the file_id of the voice message.
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def _get_audio(self, key: str, text: str) -> bytes:
+        """
+        Returns the audio of a voice message, synthesizing it only once even for concurrent callers.
+
+        :param key: The cache key of the voice message.
+        :param text: The text to be spoken.
+        :return: The OGG audio.
+        """
+        entry = self.entries.get(key)
+        if entry:
+            return entry["audio"]
+
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(speech_utils.generate_voice_message(text))
+        future = self.pending[key]
+        try:
+            audio = (await asyncio.shield(future)).getvalue()
+        finally:
+            if future.done():
+                self.pending.pop(key, None)
+        if key not in self.entries:
+            self._store(key, {"audio": audio, "file_id": None})
+        return audio
+
+    async def send(self, send_voice, text: str):
+        """
+        Sends the voice message for a text, reusing the file_id of an earlier upload when possible.
+
+        :param send_voice: Coroutine function sending a voice, e.g. update.message.reply_voice.
+        :param text: The text to be spoken.
+        :return: The sent message.
+        """
+        key = voice_cache_key(text)
+        entry = self.entries.get(key)
+        if entry and entry["file_id"]:
+            self.entries.move_to_end(key)
+            try:
+                return await send_voice(voice=entry["file_id"])
+            except BadRequest as e:
+                self.logger.info(f"Gespeicherte Sprachnachricht ist nicht mehr gültig: {e}")
+                entry["file_id"] = None
+
+        audio = await self._get_audio(key, text)
+        message = await send_voice(voice=InputFile(audio, filename=VOICE_FILENAME))
+
+        # Later sends of the same text reuse the uploaded file
+        file_id = getattr(getattr(message, "voice", None), "file_id", None)
+        if isinstance(file_id, str) and key in self.entries:
+            self.entries[key]["file_id"] = file_id
+        return message
+
+
+voice_cache = VoiceCache()